@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -31,6 +33,194 @@ ALLOWED_HOSTS = []
 
 # Twilio settings
 TWILIO_VOICE_URL = config('TWILIO_VOICE_URL')
+# Override the Twilio REST API host, e.g. to point at a local fake API
+TWILIO_API_BASE_URL = config('TWILIO_API_BASE_URL', default='')
+# Seconds before a Twilio API request or recording download gives up
+TWILIO_REQUEST_TIMEOUT = config('TWILIO_REQUEST_TIMEOUT', default=30, cast=float)
+
+# Public URL of POST /calls/recording-status/ handed to Twilio as the
+# recording status callback; leave empty to rely on polling only
+TWILIO_RECORDING_STATUS_CALLBACK_URL = config(
+    'TWILIO_RECORDING_STATUS_CALLBACK_URL', default='')
+# Reject webhook requests without a valid X-Twilio-Signature
+TWILIO_VALIDATE_WEBHOOKS = config(
+    'TWILIO_VALIDATE_WEBHOOKS', default=True, cast=bool)
+
+# Recording pipeline (calls/recording_pipeline.py): fetch recordings of
+# completed calls in the background, then transcribe and summarize them
+RECORDING_PIPELINE_ENABLED = config(
+    'RECORDING_PIPELINE_ENABLED', default=True, cast=bool)
+RECORDING_PIPELINE_EAGER = False
+RECORDING_FETCH_MAX_WORKERS = config(
+    'RECORDING_FETCH_MAX_WORKERS', default=4, cast=int)
+RECORDING_PROCESS_MAX_WORKERS = config(
+    'RECORDING_PROCESS_MAX_WORKERS', default=2, cast=int)
+RECORDING_FETCH_INITIAL_DELAY = config(
+    'RECORDING_FETCH_INITIAL_DELAY', default=5, cast=float)
+RECORDING_FETCH_MAX_DELAY = config(
+    'RECORDING_FETCH_MAX_DELAY', default=300, cast=float)
+RECORDING_FETCH_MAX_ATTEMPTS = config(
+    'RECORDING_FETCH_MAX_ATTEMPTS', default=8, cast=int)
+# Work on completed calls idle for this long is requeued by
+# `manage.py reconcile_call_statuses` (e.g. lost with a recycled worker)
+RECORDING_PIPELINE_STALE_MINUTES = config(
+    'RECORDING_PIPELINE_STALE_MINUTES', default=30, cast=int)
+
+# Audio stage (calls/audio_processing.py): downmix, trim silence and
+# compress recordings with ffmpeg before storage and transcription
+AUDIO_TRANSCODE_ENABLED = config('AUDIO_TRANSCODE_ENABLED', default=True, cast=bool)
+FFMPEG_BINARY = config('FFMPEG_BINARY', default='ffmpeg')
+AUDIO_TRANSCODE_CODEC = config('AUDIO_TRANSCODE_CODEC', default='opus')  # opus or mp3
+AUDIO_TRANSCODE_BITRATE = config('AUDIO_TRANSCODE_BITRATE', default='16k')
+AUDIO_TRANSCODE_SAMPLE_RATE = config(
+    'AUDIO_TRANSCODE_SAMPLE_RATE', default=16000, cast=int)
+AUDIO_TRANSCODE_CHANNELS = config('AUDIO_TRANSCODE_CHANNELS', default=1, cast=int)
+AUDIO_TRANSCODE_SILENCE_THRESHOLD = config(
+    'AUDIO_TRANSCODE_SILENCE_THRESHOLD', default='-50dB')
+AUDIO_TRANSCODE_MAX_PROCESSES = config(
+    'AUDIO_TRANSCODE_MAX_PROCESSES', default=2, cast=int)
+AUDIO_TRANSCODE_TIMEOUT = config('AUDIO_TRANSCODE_TIMEOUT', default=300, cast=int)
+
+# Transcripts: record calls with one leg per channel and transcribe each
+# channel separately to attribute segments to speakers (channel order).
+# Each channel is its own Whisper request, billed for the full call length,
+# so this doubles transcription cost; the channels are sent concurrently, so
+# latency stays that of one request.
+TRANSCRIPT_DIARIZE_BY_CHANNEL = config(
+    'TRANSCRIPT_DIARIZE_BY_CHANNEL', default=False, cast=bool)
+TRANSCRIPT_CHANNEL_SPEAKERS = config(
+    'TRANSCRIPT_CHANNEL_SPEAKERS', default='agent,lead', cast=Csv())
+
+# Call status reconciliation (manage.py reconcile_call_statuses)
+CALL_RECONCILE_STALE_MINUTES = config(
+    'CALL_RECONCILE_STALE_MINUTES', default=10, cast=int)
+CALL_RECONCILE_BATCH_SIZE = config(
+    'CALL_RECONCILE_BATCH_SIZE', default=500, cast=int)
+CALL_RECONCILE_MAX_WORKERS = config(
+    'CALL_RECONCILE_MAX_WORKERS', default=8, cast=int)
+CALL_RECONCILE_RATE_PER_SECOND = config(
+    'CALL_RECONCILE_RATE_PER_SECOND', default=10, cast=float)
+
+# Status polling (calls/status_writes.py): open-call status changes are
+# written in batches at most this many seconds later (0 writes them at
+# once), or as soon as this many calls are pending
+CALL_STATUS_COALESCE_SECONDS = config(
+    'CALL_STATUS_COALESCE_SECONDS', default=2.0, cast=float)
+CALL_STATUS_MAX_PENDING = config('CALL_STATUS_MAX_PENDING', default=500, cast=int)
+
+# Call exports (calls/export.py): rows fetched per database round trip.
+# Background exports are written into CALL_EXPORT_DIR by
+# `manage.py run_call_exports`; one without a heartbeat for
+# CALL_EXPORT_STALE_MINUTES is marked failed
+CALL_EXPORT_CHUNK_SIZE = config('CALL_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+CALL_EXPORT_HEARTBEAT_SECONDS = config('CALL_EXPORT_HEARTBEAT_SECONDS', default=30, cast=int)
+CALL_EXPORT_STALE_MINUTES = config('CALL_EXPORT_STALE_MINUTES', default=10, cast=int)
+CALL_EXPORT_DIR = config('CALL_EXPORT_DIR', default='exports')
+CALL_EXPORT_EAGER = False
+
+# Bulk call endpoints (calls/bulk.py): calls per request, and Twilio
+# requests in flight at once for one bulk request
+BULK_CALL_MAX_ITEMS = config('BULK_CALL_MAX_ITEMS', default=200, cast=int)
+BULK_CALL_MAX_WORKERS = config('BULK_CALL_MAX_WORKERS', default=8, cast=int)
+
+# Call archival (calls/archive.py, manage.py archive_calls): finished calls
+# older than CALL_ARCHIVE_AFTER_DAYS have their transcript and summary
+# compressed into CallArchive and their recording re-encoded into
+# CALL_ARCHIVE_RECORDINGS_DIR, throttled to CALL_ARCHIVE_IO_BYTES_PER_SECOND
+CALL_ARCHIVE_AFTER_DAYS = config('CALL_ARCHIVE_AFTER_DAYS', default=180, cast=int)
+CALL_ARCHIVE_BATCH_SIZE = config('CALL_ARCHIVE_BATCH_SIZE', default=100, cast=int)
+CALL_ARCHIVE_MAX_CALLS = config('CALL_ARCHIVE_MAX_CALLS', default=5000, cast=int)
+CALL_ARCHIVE_IO_BYTES_PER_SECOND = config(
+    'CALL_ARCHIVE_IO_BYTES_PER_SECOND', default=5_000_000, cast=int)
+CALL_ARCHIVE_RECORDINGS_DIR = config(
+    'CALL_ARCHIVE_RECORDINGS_DIR', default='recordings/archive')
+CALL_ARCHIVE_AUDIO_BITRATE = config('CALL_ARCHIVE_AUDIO_BITRATE', default='8k')
+CALL_ARCHIVE_COMPRESSION_LEVEL = config(
+    'CALL_ARCHIVE_COMPRESSION_LEVEL', default=9, cast=int)
+
+# Monthly partitioning of calls_call on PostgreSQL (calls/partitioning.py,
+# manage.py partition_calls): partitions created ahead of time, and rows
+# per transaction when converting an existing table
+CALL_PARTITION_MONTHS_AHEAD = config('CALL_PARTITION_MONTHS_AHEAD', default=3, cast=int)
+CALL_PARTITION_COPY_BATCH_SIZE = config(
+    'CALL_PARTITION_COPY_BATCH_SIZE', default=10000, cast=int)
+# Days of calls a paginated history request returns when no `started_after`
+# is given, so it only reads the most recent partitions (0 returns
+# everything). Unpaginated requests always list every call.
+CALL_HISTORY_DEFAULT_DAYS = config('CALL_HISTORY_DEFAULT_DAYS', default=90, cast=int)
+
+# Change feed for offline clients (sync/changes.py): rows per stream and
+# page, seconds of recent changes sent again to catch late commits, and
+# days deletions are remembered (manage.py prune_tombstones)
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+SYNC_MAX_PAGE_SIZE = config('SYNC_MAX_PAGE_SIZE', default=2000, cast=int)
+SYNC_OVERLAP_SECONDS = config('SYNC_OVERLAP_SECONDS', default=5, cast=int)
+SYNC_TOMBSTONE_RETENTION_DAYS = config(
+    'SYNC_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+
+# Override the OpenAI API base URL (including /v1), e.g. to point at a local fake API
+OPENAI_API_BASE_URL = config('OPENAI_API_BASE_URL', default='')
+# Seconds before an OpenAI request gives up; long recordings take minutes
+# to transcribe, keep GUNICORN_GRACEFUL_TIMEOUT above this
+OPENAI_REQUEST_TIMEOUT = config('OPENAI_REQUEST_TIMEOUT', default=300, cast=float)
+
+# AI usage accounting (calls/ai_usage.py): every OpenAI request is recorded
+# in the AIUsage ledger and charged against per-user and global budgets
+AI_USAGE_TRACKING_ENABLED = config(
+    'AI_USAGE_TRACKING_ENABLED', default=True, cast=bool)
+# Spend budgets in USD per hour, enforced with token buckets (0 disables)
+AI_BUDGET_USER_PER_HOUR = config('AI_BUDGET_USER_PER_HOUR', default=2.0, cast=float)
+AI_BUDGET_GLOBAL_PER_HOUR = config('AI_BUDGET_GLOBAL_PER_HOUR', default=20.0, cast=float)
+# How many times the pipeline defers a throttled recording before failing it
+AI_BUDGET_MAX_DEFERRALS = config('AI_BUDGET_MAX_DEFERRALS', default=12, cast=int)
+# USD prices: per 1M input/output tokens for chat models, per audio minute
+# for transcription models
+AI_MODEL_PRICES = {
+    'gpt-4o-mini': {'input': 0.15, 'output': 0.60},
+    'gpt-4o': {'input': 2.50, 'output': 10.00},
+    'whisper-1': {'audio_minute': 0.006},
+}
+
+# Request metrics (monitoring app), served in Prometheus format at /metrics
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Shared directory for per-process snapshots when running several worker
+# processes (gunicorn); leave empty for a single process
+METRICS_MULTIPROC_DIR = config('METRICS_MULTIPROC_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=1.0, cast=float)
+# Bearer token required to scrape /metrics. Without one, /metrics is only
+# served with METRICS_PUBLIC (the default with DEBUG)
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+METRICS_PUBLIC = config('METRICS_PUBLIC', default=DEBUG, cast=bool)
+
+# Tracing (monitoring/tracing.py): "none", "json" (JSON lines file), "otlp"
+# (OTLP/HTTP collector) or a dotted path to a custom exporter class
+TRACING_EXPORTER = config('TRACING_EXPORTER', default='none')
+TRACING_JSON_PATH = config('TRACING_JSON_PATH', default=str(BASE_DIR / 'logs' / 'traces.jsonl'))
+TRACING_OTLP_ENDPOINT = config(
+    'TRACING_OTLP_ENDPOINT', default='http://localhost:4318/v1/traces')
+TRACING_SERVICE_NAME = config('TRACING_SERVICE_NAME', default='smartcallr-backend')
+# Fraction of traces recorded, decided at the root span
+TRACING_SAMPLE_RATE = config('TRACING_SAMPLE_RATE', default=1.0, cast=float)
+# Also emit a span per SQL query in request traces
+TRACING_DB_QUERIES = config('TRACING_DB_QUERIES', default=False, cast=bool)
+
+# On-demand profiling (monitoring/profiling.py), enabled per endpoint by
+# staff through ProfilingRule entries in the admin
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=True, cast=bool)
+PROFILING_RULES_CACHE_SECONDS = config('PROFILING_RULES_CACHE_SECONDS', default=10, cast=float)
+# Seconds between stack samples of a profiled request
+PROFILING_SAMPLE_INTERVAL = config('PROFILING_SAMPLE_INTERVAL', default=0.005, cast=float)
+PROFILING_RETENTION_DAYS = config('PROFILING_RETENTION_DAYS', default=7, cast=int)
+PROFILING_MAX_CAPTURES = config('PROFILING_MAX_CAPTURES', default=500, cast=int)
+
+# Warmup (monitoring/warmup.py) when the WSGI application is loaded, reported
+# at /ready/
+WARMUP_ENABLED = config('WARMUP_ENABLED', default=True, cast=bool)
+# Import the provider SDKs during warmup rather than on the first request
+WARMUP_PROVIDER_SDKS = config('WARMUP_PROVIDER_SDKS', default=True, cast=bool)
+
+# Country calling code assumed for phone numbers entered without a "+" prefix
+DEFAULT_PHONE_COUNTRY_CODE = config('DEFAULT_PHONE_COUNTRY_CODE', default='1')
 
 # Application definition
 
@@ -47,9 +237,14 @@ INSTALLED_APPS = [
     'users',
     'leads',
     'calls',
+    'monitoring',
+    'sync',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.middleware.TracingMiddleware',
+    'monitoring.middleware.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -91,9 +286,56 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        # Keep connections open between requests (seconds, None for no
+        # limit); each thread that queries holds one. Per gunicorn worker
+        # that is GUNICORN_THREADS (8) request threads and the status write
+        # thread (1), plus one per running recording pipeline task (4 fetch
+        # + 2 process), closed when the task ends: at most 15 (19 with
+        # TRANSCRIPT_DIARIZE_BY_CHANNEL, whose two channel threads per process
+        # task each hold one briefly), so 9 workers can open 135 connections
+        # per host against PostgreSQL's default max_connections of 100. Bulk
+        # call and reconciliation threads only talk to Twilio. Size max_connections for every host, use DB_POOL,
+        # or put PgBouncer in front.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        # Check a reused connection before a request, so a server restart
+        # or idle timeout doesn't fail the first query
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
     }
 }
 
+# Connection pool shared by the threads of a worker, instead of one
+# persistent connection per thread: at most DB_POOL_MAX_SIZE connections per
+# worker. Requires psycopg 3 with the pool extra, which isn't in
+# requirements.txt (pip install "psycopg[binary,pool]"); replaces CONN_MAX_AGE.
+if config('DB_POOL', default=False, cast=bool):
+    if find_spec('psycopg') is None or find_spec('psycopg_pool') is None:
+        raise ImproperlyConfigured(
+            'DB_POOL requires psycopg 3 and psycopg_pool: '
+            'pip install "psycopg[binary,pool]"')
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+    }
+
+# Optional read replica for list and search endpoints (utils/db_routing.py);
+# everything else, including reads right after writes, uses the primary
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['utils.db_routing.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
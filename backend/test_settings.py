@@ -1,12 +1,17 @@
+from decouple import config
+
 from .settings import *
 
-# Use in-memory SQLite database for testing
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': ':memory:',
+# Use in-memory SQLite database for testing. With TEST_DATABASE=postgresql
+# the tests run against the DB_* server instead, which also runs the
+# PostgreSQL-only tests (e.g. converting calls_call to partitions)
+if config('TEST_DATABASE', default='sqlite') != 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
     }
-}
 
 # Disable migrations for faster tests
 
@@ -46,3 +51,12 @@ OPENAI_API_KEY = 'test-key'
 TWILIO_ACCOUNT_SID = 'test-sid'
 TWILIO_AUTH_TOKEN = 'test-token'
 TWILIO_PHONE_NUMBER = '+1234567890'
+
+# Run the recording pipeline inline instead of on background threads
+RECORDING_PIPELINE_EAGER = True
+
+# Write call status changes through instead of buffering them on a thread
+CALL_STATUS_COALESCE_SECONDS = 0
+
+# Write background exports inline
+CALL_EXPORT_EAGER = True
@@ -22,4 +22,6 @@ urlpatterns = [
     path('', include('users.urls')),
     path('', include('leads.urls')),
     path('', include('calls.urls')),
+    path('', include('monitoring.urls')),
+    path('', include('sync.urls')),
 ]
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.WARMUP_ENABLED:
+    # Under `gunicorn --preload` this runs once, before workers are forked
+    from monitoring.warmup import warmup
+    warmup()
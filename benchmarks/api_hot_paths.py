@@ -0,0 +1,417 @@
+"""
+Benchmark the API hot paths against a seeded dataset.
+
+Seeds users, leads and calls with the factories in `tests/factories.py`
+(built in memory and inserted with `bulk_create`, so 1M rows stay practical),
+then drives the lead and call endpoints in-process through the Django test
+client and reports throughput and p50/p95/p99 latency per endpoint.
+
+Twilio and OpenAI are replaced by in-process stand-ins with a configurable
+latency, so results measure our own request handling: the views,
+serializers and queries. The recording pipeline is disabled, which makes
+download-recording cover the Twilio fetch and the file write only.
+
+Usage:
+    python benchmarks/api_hot_paths.py --leads 10000 --calls-per-lead 3
+    python benchmarks/api_hot_paths.py --leads 1000000 --keep-db --output results.json
+    python benchmarks/api_hot_paths.py --output new.json --compare baseline.json
+
+Runs against a fresh test database of the configured settings module
+(in-memory SQLite by default). Set DJANGO_SETTINGS_MODULE=backend.settings to
+benchmark PostgreSQL. With --keep-db the test database and its seeded data
+are kept and reused by the next run with the same dataset options.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.test_settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import factory.random  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from calls.models import Call  # noqa: E402
+from leads.models import Lead  # noqa: E402
+from tests import factories  # noqa: E402
+from tests.factories import CallFactory, LeadFactory, UserFactory  # noqa: E402
+from utils.phone import normalize_phone_number  # noqa: E402
+
+ENDPOINTS = [
+    'leads.list', 'leads.detail', 'calls.history', 'calls.initiate',
+    'calls.status', 'calls.download_recording', 'calls.serve_audio',
+]
+# Endpoints returning every row of the user; they get --list-iterations
+UNPAGED_ENDPOINTS = {'calls.history'}
+
+
+class FakeTwilioService:
+    """
+    Stand-in for `TwilioService` answering instantly, or after `latency`.
+    """
+    latency = 0.0
+    recording_bytes = b''
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def initiate_call(self, to_number, from_number=None):
+        self._wait()
+        return {'success': True, 'call_sid': f"CA{random.getrandbits(128):032x}",
+                'status': 'queued'}
+
+    def get_call_status(self, call_sid):
+        self._wait()
+        return {'success': True, 'status': 'completed', 'duration': '95',
+                'end_time': timezone.now()}
+
+    def get_call_recordings(self, call_sid):
+        self._wait()
+        return {'success': True, 'recordings': [{
+            'sid': f"RE{call_sid[2:]}", 'duration': '95', 'status': 'completed',
+            'date_created': timezone.now(), 'uri': f"/Recordings/RE{call_sid[2:]}.json",
+        }]}
+
+    def download_recording(self, recording_sid, file_path):
+        self._wait()
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as f:
+            f.write(self.recording_bytes)
+        return {'success': True, 'file_path': file_path, 'duration': '95'}
+
+
+class FakeAIService:
+    """
+    Stand-in for `AIService`, so no benchmark request can reach OpenAI.
+    """
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def transcribe_audio(self, audio_file_path):
+        return {'success': True, 'transcription': 'Agent: Hello.\nLead: Hi.'}
+
+    def transcribe_audio_segments(self, audio_file_path):
+        return {'success': True, 'transcription': 'Hello. Hi.', 'segments': [
+            {'start_ms': 0, 'end_ms': 1200, 'text': 'Hello.'},
+            {'start_ms': 1300, 'end_ms': 2000, 'text': 'Hi.'},
+        ]}
+
+    def summarize_transcription(self, transcription_text):
+        return {'success': True, 'summary': 'Short greeting.'}
+
+    def summarize_structured(self, transcription_text, reference_date=None):
+        return {'success': True, 'summary': {
+            'purpose': 'Greeting', 'key_points': [], 'decisions': [], 'action_items': [],
+            'interest_level': 'unknown', 'next_step': '', 'next_step_date': None,
+            'additional_notes': '',
+        }}
+
+
+@contextmanager
+def fake_providers(latency, recording_bytes):
+    FakeTwilioService.latency = latency
+    FakeTwilioService.recording_bytes = recording_bytes
+    with mock.patch('calls.views.TwilioService', FakeTwilioService), \
+            mock.patch('calls.recording_pipeline.TwilioService', FakeTwilioService), \
+            mock.patch('calls.views.AIService', FakeAIService), \
+            mock.patch('calls.recording_pipeline.AIService', FakeAIService):
+        yield
+
+
+@contextmanager
+def explicit_start_time():
+    """Let bulk_create store our spread-out start times instead of now()"""
+    field = Call._meta.get_field('start_time')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed(args):
+    """
+    Create `args.users` users owning `args.leads` leads round-robin, each
+    lead with `args.calls_per_lead` calls spread over the last year.
+    """
+    factory.random.reseed_random(args.seed)
+    factories.fake.seed_instance(args.seed)
+    rng = random.Random(args.seed)
+
+    users = UserFactory.create_batch(args.users)
+    now = timezone.now()
+    started = time.perf_counter()
+    created_leads = created_calls = 0
+
+    for offset in range(0, args.leads, args.batch_size):
+        count = min(args.batch_size, args.leads - offset)
+        leads = [LeadFactory.build(created_by=users[(offset + index) % len(users)])
+                 for index in range(count)]
+        for lead in leads:
+            # bulk_create skips Lead.save(), which fills phone_e164
+            lead.phone_e164 = normalize_phone_number(lead.phone) or ''
+        leads = Lead.objects.bulk_create(leads)
+
+        calls = []
+        for lead in leads:
+            for _ in range(args.calls_per_lead):
+                call = CallFactory.build(lead=lead)
+                call.phone_e164 = lead.phone_e164
+                call.start_time = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+                calls.append(call)
+        with explicit_start_time():
+            Call.objects.bulk_create(calls, batch_size=args.batch_size)
+
+        created_leads += len(leads)
+        created_calls += len(calls)
+        print(f"\rSeeded {created_leads}/{args.leads} leads, {created_calls} calls",
+              end='', flush=True)
+    print(f" in {time.perf_counter() - started:.1f}s")
+
+
+def dataset_matches(args):
+    return (
+        Lead.objects.count() == args.leads
+        and Call.objects.count() == args.leads * args.calls_per_lead
+    )
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of already sorted values"""
+    index = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(latencies, elapsed, errors):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def build_requests(user, rng):
+    """
+    Map each endpoint to a function returning the next `(method, url, data)`.
+    """
+    lead_ids = list(Lead.objects.filter(created_by=user).values_list('id', flat=True))
+    dialable = list(
+        Lead.objects.filter(created_by=user).exclude(phone_e164='')
+        .values_list('id', 'phone_e164')[:1000]
+    )
+    call_ids = list(
+        Call.objects.filter(user=user).exclude(twilio_call_sid__isnull=True)
+        .values_list('id', flat=True)
+    )
+    page_count = max(len(lead_ids) // 50, 1)
+
+    return {
+        'leads.list': lambda: (
+            'get', reverse('leads-list-leads'),
+            {'page': rng.randint(1, page_count), 'page_size': 50}),
+        'leads.detail': lambda: (
+            'get', reverse('leads-get-lead', args=[rng.choice(lead_ids)]), None),
+        'calls.history': lambda: ('get', reverse('calls-get-call-history'), None),
+        'calls.initiate': lambda: (
+            'post', reverse('calls-initiate-call'),
+            dict(zip(('lead_id', 'phone_number'), rng.choice(dialable)))),
+        'calls.status': lambda: (
+            'get', reverse('calls-get-call-status', args=[rng.choice(call_ids)]), None),
+        'calls.download_recording': lambda: (
+            'post', reverse('calls-download-recording', args=[rng.choice(call_ids)]), None),
+        'calls.serve_audio': lambda: (
+            'get', reverse('calls-serve-audio', args=[rng.choice(call_ids)]), None),
+    }
+
+
+def prepare_audio(user, recording_bytes):
+    """Give every call of `user` a recording file for serve_audio"""
+    os.makedirs('recordings', exist_ok=True)
+    path = os.path.join('recordings', 'benchmark.mp3')
+    with open(path, 'wb') as f:
+        f.write(recording_bytes)
+    Call.objects.filter(user=user).update(recording_file_path=path)
+
+
+def run_endpoint(client, next_request, iterations, warmup):
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for index in range(warmup + iterations):
+        if index == warmup:
+            latencies = []
+            errors = 0
+            started = time.perf_counter()
+        method, url, data = next_request()
+        request_started = time.perf_counter()
+        response = getattr(client, method)(url, data, format='json' if method != 'get' else None)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        response.close()
+        latencies.append(time.perf_counter() - request_started)
+        if response.status_code >= 400:
+            errors += 1
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    """
+    Print latency changes against a baseline report; return the endpoints
+    whose p99 grew by more than `threshold` (a fraction).
+    """
+    regressions = []
+    print(f"\nCompared with {baseline.get('git_revision') or 'baseline'}:")
+    for name, result in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        changes = {
+            key: (result[key] - previous[key]) / previous[key] if previous[key] else 0.0
+            for key in ('p50_ms', 'p99_ms')
+        }
+        regressed = changes['p99_ms'] > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:26} p50 {changes['p50_ms']:+7.1%}  p99 {changes['p99_ms']:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--leads', type=int, default=10000)
+    parser.add_argument('--calls-per-lead', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--list-iterations', type=int, default=10,
+                        help="Iterations for endpoints returning all of a user's rows")
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--provider-latency', type=float, default=0.0,
+                        help="Seconds added to every fake Twilio request")
+    parser.add_argument('--recording-kb', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--keep-db', action='store_true',
+                        help="Keep the test database and reuse its seeded data")
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    parser.add_argument('--compare', help="Baseline JSON report to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="p99 growth over the baseline reported as a regression")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keep_db)
+    rng = random.Random(args.seed)
+    recording_bytes = rng.randbytes(args.recording_kb * 1024)
+
+    try:
+        if not (args.keep_db and dataset_matches(args)):
+            if Lead.objects.exists():
+                sys.exit("Kept test database holds a different dataset; run without --keep-db")
+            seed(args)
+        user = User.objects.order_by('id').first()
+        last_seeded_call = Call.objects.order_by('-id').values_list('id', flat=True).first()
+
+        workdir = tempfile.TemporaryDirectory()
+        cwd = os.getcwd()
+        # Recording paths are relative to the working directory
+        os.chdir(workdir.name)
+        try:
+            prepare_audio(user, recording_bytes)
+            client = APIClient()
+            client.force_authenticate(user=user)
+            requests = build_requests(user, rng)
+
+            results = {}
+            with fake_providers(args.provider_latency, recording_bytes), \
+                    override_settings(RECORDING_PIPELINE_ENABLED=False,
+                                      AUDIO_TRANSCODE_ENABLED=False):
+                for name in args.endpoints:
+                    iterations = (args.list_iterations if name in UNPAGED_ENDPOINTS
+                                  else args.iterations)
+                    results[name] = run_endpoint(
+                        client, requests[name], iterations, args.warmup)
+                    print(f"{name:26} {results[name]['throughput_rps']:>8} req/s  "
+                          f"p50 {results[name]['p50_ms']:>8} ms  "
+                          f"p99 {results[name]['p99_ms']:>8} ms  "
+                          f"errors {results[name]['errors']}")
+        finally:
+            os.chdir(cwd)
+            workdir.cleanup()
+            # Keep the dataset size stable for the next --keep-db run
+            Call.objects.filter(id__gt=last_seeded_call).delete()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keep_db)
+
+    report = {
+        'git_revision': git_revision(),
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'settings_module': os.environ['DJANGO_SETTINGS_MODULE'],
+        'dataset': {
+            'users': args.users,
+            'leads': args.leads,
+            'calls': args.leads * args.calls_per_lead,
+            'seed': args.seed,
+        },
+        'provider_latency_seconds': args.provider_latency,
+        'endpoints': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(f"p99 regressed by more than {args.threshold:.0%}: "
+                     f"{', '.join(regressions)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark the audio processing stage on a corpus of synthetic recordings.
+
+Generates Twilio-like recordings (8 kHz MP3 with leading/trailing silence
+around a speech-like signal), runs them through
+`calls.audio_processing.transcode_audio` with the configured worker pool and
+reports original vs compressed sizes and transcode time.
+
+Usage:
+    python benchmarks/audio_transcode.py --files 20 --min-seconds 30 --max-seconds 600
+    python benchmarks/audio_transcode.py --codec mp3 --bitrate 32k --output results.json
+
+Requires ffmpeg on PATH (or FFMPEG_BINARY).
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.test_settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from calls.audio_processing import ffmpeg_available, transcode_audio  # noqa: E402
+
+
+def generate_recording(path, seconds, lead_silence, tail_silence, channels):
+    """
+    Write a synthetic call recording: silence, a two-tone signal amplitude
+    modulated at syllable rate over pink noise, then silence.
+    """
+    speech = (
+        f"aevalsrc='0.4*(sin(2*PI*180*t)+0.5*sin(2*PI*720*t))"
+        f"*(0.5+0.5*sin(2*PI*4*t))':s=8000:d={seconds}"
+    )
+    noise = f"anoisesrc=color=pink:amplitude=0.02:r=8000:d={seconds}"
+    filter_graph = (
+        f"{speech}[s];{noise}[n];[s][n]amix=inputs=2[mix];"
+        f"[mix]adelay={int(lead_silence * 1000)}:all=1,"
+        f"apad=pad_dur={tail_silence}"
+    )
+    subprocess.run([
+        settings.FFMPEG_BINARY, '-nostdin', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', filter_graph,
+        '-ac', str(channels), '-ar', '8000', '-c:a', 'libmp3lame', '-b:a', '32k',
+        path,
+    ], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--min-seconds', type=int, default=30)
+    parser.add_argument('--max-seconds', type=int, default=300)
+    parser.add_argument('--channels', type=int, default=2,
+                        help="Channels of the synthetic source (Twilio dual-channel is 2)")
+    parser.add_argument('--codec', choices=['opus', 'mp3'], default=None)
+    parser.add_argument('--bitrate', default=None)
+    parser.add_argument('--workers', type=int, default=settings.AUDIO_TRANSCODE_MAX_PROCESSES)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    if not ffmpeg_available():
+        sys.exit(f"{settings.FFMPEG_BINARY} not found; install ffmpeg to run this benchmark")
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        sources = []
+        for index in range(args.files):
+            path = os.path.join(workdir, f"call_{index}.mp3")
+            seconds = rng.randint(args.min_seconds, args.max_seconds)
+            generate_recording(path, seconds, lead_silence=rng.uniform(1, 5),
+                               tail_silence=rng.uniform(2, 10), channels=args.channels)
+            sources.append((path, seconds))
+
+        def run(source):
+            path, seconds = source
+            started = time.perf_counter()
+            result = transcode_audio(path, codec=args.codec, bitrate=args.bitrate)
+            result['elapsed'] = time.perf_counter() - started
+            result['seconds'] = seconds
+            return result
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            results = list(executor.map(run, sources))
+        wall_time = time.perf_counter() - started
+
+    failed = [result for result in results if not result['success']]
+    done = [result for result in results if result['success']]
+    original = sum(result['original_size'] for result in done)
+    compressed = sum(result['compressed_size'] for result in done)
+    audio_seconds = sum(result['seconds'] for result in done)
+
+    report = {
+        'files': len(results),
+        'failed': len(failed),
+        'codec': args.codec or settings.AUDIO_TRANSCODE_CODEC,
+        'bitrate': args.bitrate or settings.AUDIO_TRANSCODE_BITRATE,
+        'workers': args.workers,
+        'audio_seconds': audio_seconds,
+        'original_bytes': original,
+        'compressed_bytes': compressed,
+        'compression_ratio': round(original / compressed, 2) if compressed else None,
+        'wall_time_seconds': round(wall_time, 3),
+        'realtime_factor': round(audio_seconds / wall_time, 1) if wall_time else None,
+        'per_file': [
+            {key: result.get(key) for key in
+             ('seconds', 'original_size', 'compressed_size', 'elapsed')}
+            for result in done
+        ],
+    }
+
+    print(f"{report['files']} files, {audio_seconds}s of audio, "
+          f"{original / 1024:.0f} KiB -> {compressed / 1024:.0f} KiB "
+          f"(x{report['compression_ratio']}), {wall_time:.1f}s wall, "
+          f"{report['realtime_factor']}x realtime")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
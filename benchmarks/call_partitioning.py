@@ -0,0 +1,158 @@
+"""
+Benchmark call queries before and after partitioning calls_call by month.
+
+Seeds a test database with calls spread over the past months, runs the
+queries that filter on `start_time` against the plain table, converts it
+with `calls.partitioning.convert_to_partitioned` and runs them again:
+
+- history_recent: one user's calls of the last 30 days
+- history_page: the first history page of one user (no date bounds)
+- archive_scan: the archival mover's query for calls older than 180 days
+- month_calls: all calls of one month
+
+For each it reports p50/p99 latency and the number of table partitions
+the plan reads (from EXPLAIN), which shows whether pruning applied.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=backend.settings python benchmarks/call_partitioning.py
+    DJANGO_SETTINGS_MODULE=backend.settings python benchmarks/call_partitioning.py \
+        --calls 2000000 --months 24 --output partitioning.json
+
+Needs a PostgreSQL server (DB_* environment variables). A test database is
+created and dropped.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from calls.models import Call, OPEN_CALL_STATUSES  # noqa: E402
+from calls.partitioning import add_months, convert_to_partitioned, month_start  # noqa: E402
+from tests.factories import LeadFactory, UserFactory  # noqa: E402
+
+
+def seed(calls_count, months, users_count):
+    users = UserFactory.create_batch(users_count)
+    leads = [LeadFactory(created_by=user) for user in users]
+    batch = []
+    for n in range(calls_count):
+        lead = leads[n % len(leads)]
+        batch.append(Call(user_id=lead.created_by_id, lead=lead, phone_number=lead.phone,
+                          status='completed', duration=60))
+        if len(batch) == 5000:
+            Call.objects.bulk_create(batch)
+            batch = []
+    Call.objects.bulk_create(batch)
+
+    # start_time is set on insert; spread the calls over the period
+    hours = months * 30 * 24
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE calls_call SET start_time = %s - ((id * 7919) %% %s) * interval '1 hour', "
+            "updated_at = %s", [timezone.now(), hours, timezone.now()])
+        cursor.execute("ANALYZE calls_call")
+    return users[0]
+
+
+def queries(user):
+    """`{name: queryset}` of the benchmarked queries"""
+    now = timezone.now()
+    month = add_months(month_start(now), -2)
+    return {
+        'history_recent': Call.objects.filter(
+            user=user, start_time__gte=now - timedelta(days=30)),
+        'history_page': Call.objects.filter(user=user)[:50],
+        # What calls.archive.find_archivable_calls runs
+        'archive_scan': Call.objects.filter(
+            archived_at__isnull=True, start_time__lt=now - timedelta(days=180))
+        .exclude(status__in=OPEN_CALL_STATUSES).order_by('start_time', 'id')[:500],
+        'month_calls': Call.objects.filter(
+            start_time__gte=month, start_time__lt=add_months(month, 1)),
+    }
+
+
+def tables_read(plan):
+    """Names of the calls_call tables (or partitions) a JSON plan scans"""
+    relations = set()
+    if plan.get('Relation Name', '').startswith('calls_call'):
+        relations.add(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        relations |= tables_read(child)
+    return relations
+
+
+def run(user, repeat):
+    results = {}
+    for name, queryset in queries(user).items():
+        latencies = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            # A fresh clone each time so the result cache isn't reused
+            list(queryset.all())
+            latencies.append(time.perf_counter() - started)
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        latencies.sort()
+        results[name] = {
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+            'p99_ms': round(latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000, 3),
+            'tables_read': len(tables_read(plan)),
+        }
+        print(f"  {name:15} p50 {results[name]['p50_ms']:>9} ms  "
+              f"p99 {results[name]['p99_ms']:>9} ms  tables {results[name]['tables_read']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit("Partitioning needs PostgreSQL")
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        user = seed(args.calls, args.months, args.users)
+        print("Unpartitioned:")
+        before = run(user, args.repeat)
+        convert_to_partitioned(log=lambda message: None)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE calls_call")
+        print("Partitioned by month:")
+        after = run(user, args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    report = {
+        'calls': args.calls,
+        'months': args.months,
+        'users': args.users,
+        'before': before,
+        'after': after,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
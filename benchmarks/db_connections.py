@@ -0,0 +1,148 @@
+"""
+Benchmark per-request database connection overhead.
+
+Runs small endpoints (call status and notes) in-process and closes
+connections between requests the way Django's request handler does. This
+is repeated with each connection strategy:
+
+- new: CONN_MAX_AGE=0, a new connection for every request
+- persistent: CONN_MAX_AGE with health checks
+- pool: psycopg 3 connection pool (skipped unless psycopg[pool] is installed)
+
+For each strategy it reports p50/p99 latency and the number of connections
+opened.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=backend.settings python benchmarks/db_connections.py
+    DJANGO_SETTINGS_MODULE=backend.settings python benchmarks/db_connections.py \
+        --requests 2000 --output connections.json
+
+Needs a PostgreSQL server (DB_* environment variables). A test database is
+created and dropped. On SQLite connecting is nearly free, so results there
+only check that the script works.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import close_old_connections, connection  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from tests.factories import CallFactory, LeadFactory, UserFactory  # noqa: E402
+
+
+def pool_available():
+    if connection.vendor != 'postgresql':
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def configure(strategy, conn_max_age):
+    """Switch the default connection to `strategy` and drop open connections"""
+    connection.close()
+    settings_dict = connection.settings_dict
+    options = settings_dict.setdefault('OPTIONS', {})
+    options.pop('pool', None)
+    settings_dict['CONN_HEALTH_CHECKS'] = strategy == 'persistent'
+    settings_dict['CONN_MAX_AGE'] = conn_max_age if strategy == 'persistent' else 0
+    if strategy == 'pool':
+        options['pool'] = {'min_size': 1, 'max_size': 4}
+
+
+def run(client, url, method, requests_count):
+    opened = []
+
+    def count(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection_created.connect(count)
+    latencies = []
+    try:
+        for _ in range(requests_count):
+            started = time.perf_counter()
+            # What django.core.handlers does around every request
+            close_old_connections()
+            response = getattr(client, method)(url, {'notes': 'Follow up'}, format='json')
+            close_old_connections()
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.content
+    finally:
+        connection_created.disconnect(count)
+
+    latencies.sort()
+    return {
+        'requests': requests_count,
+        'connections_opened': len(opened),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--conn-max-age', type=int, default=60)
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        user = UserFactory()
+        # No Twilio SID, so the status endpoint stays a pure database request
+        call = CallFactory(lead=LeadFactory(created_by=user), twilio_call_sid=None)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        endpoints = {
+            'calls.status': (reverse('calls-get-call-status', args=[call.id]), 'get'),
+            'calls.notes': (reverse('calls-update-notes', args=[call.id]), 'patch'),
+        }
+
+        strategies = ['new', 'persistent'] + (['pool'] if pool_available() else [])
+        results = {}
+        for strategy in strategies:
+            configure(strategy, args.conn_max_age)
+            results[strategy] = {}
+            for name, (url, method) in endpoints.items():
+                result = run(client, url, method, args.requests)
+                results[strategy][name] = result
+                print(f"{strategy:11} {name:13} p50 {result['p50_ms']:>8} ms  "
+                      f"p99 {result['p99_ms']:>8} ms  "
+                      f"connections {result['connections_opened']}")
+        if 'pool' in strategies:
+            connection.close_pool()
+        configure('new', args.conn_max_age)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    report = {
+        'database': connection.vendor,
+        'host': connection.settings_dict.get('HOST'),
+        'strategies': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
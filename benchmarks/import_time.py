@@ -0,0 +1,174 @@
+"""
+Profile process start-up with `python -X importtime`.
+
+Starts a fresh interpreter for each scenario, several times, and reports
+the fastest wall time plus the import time spent per top-level package
+(self time summed over its modules) for the fastest run:
+
+- setup: `django.setup()`, what every `manage.py` command pays
+- wsgi: the WSGI application and URL conf, without warmup
+- wsgi-warm: the same with warmup (monitoring/warmup.py), what a gunicorn
+  worker does before its first request
+- check: `manage.py check` end to end
+
+Fails if a `--forbid` package (the provider SDKs by default) is imported
+by a scenario other than wsgi-warm, which imports them on purpose, or with
+`--compare` if a scenario got slower than the baseline by more than
+`--threshold`.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --output startup.json
+    python benchmarks/import_time.py --output new.json --compare startup.json
+
+Uses DJANGO_SETTINGS_MODULE (backend.settings by default); the settings'
+environment variables must be set as they are for `manage.py`.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (interpreter arguments, extra environment)
+SCENARIOS = {
+    'setup': (['-c', 'import django; django.setup()'], {}),
+    'wsgi': (['-c', 'import backend.wsgi, backend.urls'], {'WARMUP_ENABLED': 'False'}),
+    'wsgi-warm': (['-c', 'import backend.wsgi, backend.urls'], {'WARMUP_ENABLED': 'True'}),
+    'check': (['manage.py', 'check'], {}),
+}
+# Scenarios expected to import the provider SDKs
+WARM_SCENARIOS = {'wsgi-warm'}
+DEFAULT_FORBIDDEN = ['openai', 'groq', 'twilio']
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_importtime(stderr):
+    """Return `{module: (self_us, cumulative_us)}` from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+
+def run_scenario(argv, env):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *argv], cwd=ROOT, env=env,
+        capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        sys.exit(f"{' '.join(argv)} failed:\n{result.stderr[-2000:]}")
+    return elapsed, parse_importtime(result.stderr)
+
+
+def summarize(modules, top):
+    packages = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        packages[name.split('.')[0]] += self_us
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {
+        'modules_imported': len(modules),
+        'import_ms': round(sum(self_us for self_us, _ in modules.values()) / 1000, 1),
+        'packages_ms': {name: round(us / 1000, 1) for name, us in ranked[:top]},
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Print wall time changes against a baseline report; return the scenarios
+    that got slower by more than `threshold` (a fraction).
+    """
+    regressions = []
+    print(f"\nCompared with {baseline.get('git_revision') or 'baseline'}:")
+    for name, result in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or not previous['wall_ms']:
+            continue
+        change = (result['wall_ms'] - previous['wall_ms']) / previous['wall_ms']
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:9} wall {change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Runs per scenario; the fastest one is reported")
+    parser.add_argument('--top', type=int, default=15,
+                        help="Packages listed per scenario")
+    parser.add_argument('--forbid', nargs='*', default=DEFAULT_FORBIDDEN,
+                        help="Packages that must not be imported at start-up")
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    parser.add_argument('--compare', help="Baseline JSON report to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="Wall time growth over the baseline reported as a regression")
+    args = parser.parse_args()
+
+    env = {**os.environ}
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+    scenarios = {}
+    violations = []
+    for name in args.scenarios:
+        argv, extra_env = SCENARIOS[name]
+        runs = [run_scenario(argv, {**env, **extra_env}) for _ in range(args.repeat)]
+        wall, modules = min(runs, key=lambda run: run[0])
+        imported = sorted(
+            package for package in args.forbid
+            if any(module == package or module.startswith(f"{package}.") for module in modules))
+        if name not in WARM_SCENARIOS:
+            violations += [f"{name}: {package}" for package in imported]
+        scenarios[name] = {'wall_ms': round(wall * 1000, 1), **summarize(modules, args.top),
+                           'forbidden_imported': imported}
+
+        result = scenarios[name]
+        print(f"{name:9} wall {result['wall_ms']:>8} ms  imports {result['import_ms']:>8} ms  "
+              f"({result['modules_imported']} modules)")
+        for package, ms in result['packages_ms'].items():
+            print(f"    {package:32} {ms:>8} ms")
+
+    report = {
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'settings': env['DJANGO_SETTINGS_MODULE'],
+        'repeat': args.repeat,
+        'scenarios': scenarios,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if violations:
+        print(f"\nImported at start-up: {', '.join(violations)}")
+        failed = True
+    if args.compare:
+        with open(args.compare) as f:
+            failed = bool(compare(report, json.load(f), args.threshold)) or failed
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+"""
+Load-test a running API server with mixed traffic against fake providers.
+
+Starts the fake Twilio and OpenAI servers from `tests/fake_providers.py`
+(with configurable latency and error rates), optionally launches the API
+server under test pointed at them, then drives a mix of lead and call
+requests over HTTP at increasing concurrency levels. Each level reports
+throughput, p50/p95/p99 latency and error rate, and the run reports the
+saturation point: the level after which throughput stops growing, p99
+exceeds the SLO or errors exceed the budget.
+
+Usage:
+    python benchmarks/load_test.py \
+        --server-cmd "gunicorn backend.wsgi:application -b 127.0.0.1:8000 -w 4" \
+        --concurrency 1 4 16 64 --duration 20 --output gunicorn.json
+    python benchmarks/load_test.py \
+        --server-cmd "uvicorn backend.asgi:application --port 8000 --workers 4" \
+        --twilio-latency 0.3 --openai-latency 2 --error-rate 0.01
+
+Without --server-cmd, start the server yourself with TWILIO_API_BASE_URL and
+OPENAI_API_BASE_URL pointing at the fakes (fixed with --twilio-port and
+--openai-port). The load user is registered on first use and leads are
+created through the API, so any database the server uses works.
+"""
+import argparse
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fake_providers import FakeOpenAIAPI, FakeTwilioAPI, lognormal_latency  # noqa: E402
+
+DEFAULT_MIX = {
+    'leads.list': 30,
+    'leads.detail': 20,
+    'calls.history': 2,
+    'calls.initiate': 10,
+    'calls.status': 20,
+    'calls.download_recording': 5,
+    'calls.serve_audio': 10,
+    'calls.summarize': 3,
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    index = max(int(round(fraction * len(sorted_values))) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class LoadState:
+    """
+    Lead and call ids shared by the workers; calls created during the run
+    feed the status, download and audio requests.
+    """
+
+    def __init__(self, leads):
+        self.leads = leads
+        self.calls = deque(maxlen=5000)
+        self.recorded_calls = deque(maxlen=5000)
+        self.page_count = max(len(leads) // 50, 1)
+
+
+def next_request(operation, state, rng):
+    """
+    Return `(method, path, json_body)` for `operation`, or None when it has
+    no target yet (e.g. no recording downloaded so far).
+    """
+    if operation == 'leads.list':
+        return 'GET', f"/leads/list/?page={rng.randint(1, state.page_count)}&page_size=50", None
+    if operation == 'leads.detail':
+        return 'GET', f"/leads/{rng.choice(state.leads)['id']}/detail/", None
+    if operation == 'calls.history':
+        return 'GET', '/calls/history/', None
+    if operation == 'calls.initiate':
+        lead = rng.choice(state.leads)
+        return 'POST', '/calls/initiate/', {'lead_id': lead['id'], 'phone_number': lead['phone']}
+
+    pool = state.recorded_calls if operation in ('calls.serve_audio', 'calls.summarize') \
+        else state.calls
+    if not pool:
+        return None
+    call_id = rng.choice(pool)
+    return {
+        'calls.status': ('GET', f"/calls/{call_id}/status/", None),
+        'calls.download_recording': ('POST', f"/calls/{call_id}/download-recording/", None),
+        'calls.serve_audio': ('GET', f"/calls/{call_id}/audio/", None),
+        'calls.summarize': ('POST', f"/calls/{call_id}/summarize/", None),
+    }[operation]
+
+
+def worker(target, token, mix, state, stop, results, seed):
+    rng = random.Random(seed)
+    session = requests.Session()
+    session.headers['Authorization'] = f"Bearer {token}"
+    operations, weights = zip(*mix.items())
+
+    while not stop.is_set():
+        operation = rng.choices(operations, weights)[0]
+        request = next_request(operation, state, rng)
+        if request is None:
+            operation = 'calls.initiate'
+            request = next_request(operation, state, rng)
+        method, path, body = request
+
+        started = time.perf_counter()
+        try:
+            response = session.request(method, target + path, json=body, timeout=60)
+            status_code = response.status_code
+            payload = response.json() if 'json' in response.headers.get('Content-Type', '') else None
+        except requests.RequestException:
+            status_code, payload = 'connection_error', None
+        elapsed = time.perf_counter() - started
+        results.append((operation, elapsed, status_code, time.perf_counter()))
+
+        if status_code == 201 and operation == 'calls.initiate':
+            state.calls.append(payload['data']['id'])
+        elif status_code == 200 and operation == 'calls.download_recording':
+            state.recorded_calls.append(payload['data']['id'])
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample[1] for sample in samples)
+    statuses = Counter(str(sample[2]) for sample in samples)
+    errors = sum(count for status, count in statuses.items()
+                 if not status.isdigit() or int(status) >= 500)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else None,
+        'error_rate': round(errors / len(samples), 4) if samples else None,
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'statuses': dict(statuses),
+    }
+
+
+def run_level(args, concurrency, token, mix, state, fakes):
+    """Run `concurrency` closed-loop workers for warmup plus duration seconds"""
+    results = []
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=worker, daemon=True, args=(
+            args.target, token, mix, state, stop, results, args.seed + index))
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.warmup)
+    for fake in fakes.values():
+        fake.reset_stats()
+    measured_from = time.perf_counter()
+    time.sleep(args.duration)
+    measured_until = time.perf_counter()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    samples = [sample for sample in results if measured_from <= sample[3] <= measured_until]
+    level = summarize(samples, measured_until - measured_from)
+    level['concurrency'] = concurrency
+    level['operations'] = {
+        operation: summarize([sample for sample in samples if sample[0] == operation],
+                             measured_until - measured_from)
+        for operation in mix
+    }
+    level['providers'] = {
+        name: {'requests': fake.request_count, 'errors': fake.error_count,
+               'max_in_flight': fake.max_in_flight}
+        for name, fake in fakes.items()
+    }
+    return level
+
+
+def find_saturation(levels, slo_p99_ms, error_budget, min_gain):
+    """
+    The last level worth its concurrency: the one before throughput gains
+    drop under `min_gain`, p99 breaks the SLO or errors exceed the budget.
+    """
+    best = None
+    for level in levels:
+        reasons = []
+        if level['p99_ms'] is not None and level['p99_ms'] > slo_p99_ms:
+            reasons.append(f"p99 {level['p99_ms']} ms over the {slo_p99_ms} ms SLO")
+        if level['error_rate'] is not None and level['error_rate'] > error_budget:
+            reasons.append(f"error rate {level['error_rate']:.2%} over budget")
+        if best and level['throughput_rps'] < best['throughput_rps'] * (1 + min_gain):
+            reasons.append(f"throughput gain under {min_gain:.0%}")
+        if reasons:
+            return {'concurrency': best and best['concurrency'],
+                    'throughput_rps': best and best['throughput_rps'],
+                    'limited_at': level['concurrency'], 'reasons': reasons}
+        best = level
+    return {'concurrency': best and best['concurrency'],
+            'throughput_rps': best and best['throughput_rps'],
+            'limited_at': None, 'reasons': ['not saturated at the highest level tested']}
+
+
+def authenticate(target, username, password):
+    """Log in as the load user, registering it first if needed"""
+    response = requests.post(f"{target}/users/login/",
+                             json={'username': username, 'password': password}, timeout=30)
+    if response.status_code != 200:
+        response = requests.post(f"{target}/users/register/", json={
+            'username': username, 'email': f"{username}@example.com",
+            'password': password, 'password_confirm': password,
+        }, timeout=30)
+    response.raise_for_status()
+    return response.json()['data']['access_token']
+
+
+def ensure_leads(target, token, count, seed):
+    """Create leads through the API until the load user has `count`"""
+    headers = {'Authorization': f"Bearer {token}"}
+    leads = requests.get(f"{target}/leads/list/", headers=headers, timeout=60).json()['data']
+    rng = random.Random(seed)
+    with requests.Session() as session:
+        session.headers.update(headers)
+        for index in range(len(leads), count):
+            response = session.post(f"{target}/leads/create/", json={
+                'name': f"Load Lead {index}",
+                'phone': f"+1555{rng.randint(0, 9999999):07d}",
+                'email': f"lead{index}@example.com",
+            }, timeout=30)
+            response.raise_for_status()
+            leads.append(response.json()['data'])
+    return [{'id': lead['id'], 'phone': lead['phone']} for lead in leads[:count]]
+
+
+def wait_for_server(target, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            sys.exit(f"Server exited with code {process.returncode}")
+        try:
+            requests.get(f"{target}/leads/list/", timeout=2)
+            return
+        except requests.RequestException:
+            time.sleep(0.5)
+    sys.exit(f"Server at {target} did not start within {timeout}s")
+
+
+def parse_mix(values):
+    mix = dict(DEFAULT_MIX)
+    for value in values or []:
+        operation, _, weight = value.partition('=')
+        if operation not in DEFAULT_MIX:
+            sys.exit(f"Unknown operation {operation!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[operation] = float(weight)
+    return {operation: weight for operation, weight in mix.items() if weight > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--target', default='http://127.0.0.1:8000')
+    parser.add_argument('--server-cmd', help="Command starting the server under test")
+    parser.add_argument('--startup-timeout', type=float, default=60)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--duration', type=float, default=20, help="Seconds measured per level")
+    parser.add_argument('--warmup', type=float, default=3, help="Unmeasured seconds per level")
+    parser.add_argument('--mix', nargs='+', metavar='OPERATION=WEIGHT',
+                        help=f"Override traffic weights (defaults: {DEFAULT_MIX})")
+    parser.add_argument('--leads', type=int, default=500)
+    parser.add_argument('--username', default='loadtest')
+    parser.add_argument('--password', default='loadtest-password')
+    parser.add_argument('--twilio-latency', type=float, default=0.15,
+                        help="Median seconds per fake Twilio request (log-normal)")
+    parser.add_argument('--openai-latency', type=float, default=1.0,
+                        help="Median seconds per fake OpenAI request (log-normal)")
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Fraction of provider requests answered with a 5xx")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help="Fraction of provider requests answered with a 429")
+    parser.add_argument('--twilio-port', type=int, default=0)
+    parser.add_argument('--openai-port', type=int, default=0)
+    parser.add_argument('--slo-p99-ms', type=float, default=1000)
+    parser.add_argument('--error-budget', type=float, default=0.01)
+    parser.add_argument('--min-gain', type=float, default=0.10,
+                        help="Throughput growth a level must add to count as unsaturated")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    args = parser.parse_args()
+    args.target = args.target.rstrip('/')
+    mix = parse_mix(args.mix)
+
+    rng = random.Random(args.seed)
+    errors = {503: args.error_rate, 429: args.rate_limit_rate}
+    fakes = {
+        'twilio': FakeTwilioAPI(
+            latency=lognormal_latency(args.twilio_latency, args.latency_sigma, rng)
+            if args.twilio_latency else 0.0,
+            errors=errors, seed=args.seed, port=args.twilio_port).start(),
+        'openai': FakeOpenAIAPI(
+            latency=lognormal_latency(args.openai_latency, args.latency_sigma, rng)
+            if args.openai_latency else 0.0,
+            errors=errors, seed=args.seed, port=args.openai_port).start(),
+    }
+    provider_env = {
+        'TWILIO_API_BASE_URL': fakes['twilio'].base_url,
+        'OPENAI_API_BASE_URL': fakes['openai'].base_url,
+    }
+    print(' '.join(f"{key}={value}" for key, value in provider_env.items()))
+
+    process = None
+    if args.server_cmd:
+        env = {**os.environ, **provider_env}
+        env.setdefault('OPENAI_API_KEY', 'fake-key')
+        process = subprocess.Popen(shlex.split(args.server_cmd), env=env)
+    try:
+        wait_for_server(args.target, process, args.startup_timeout)
+        token = authenticate(args.target, args.username, args.password)
+        state = LoadState(ensure_leads(args.target, token, args.leads, args.seed))
+
+        levels = []
+        for concurrency in args.concurrency:
+            level = run_level(args, concurrency, token, mix, state, fakes)
+            levels.append(level)
+            print(f"concurrency {concurrency:>4}: {level['throughput_rps']:>8} req/s  "
+                  f"p50 {level['p50_ms']} ms  p99 {level['p99_ms']} ms  "
+                  f"errors {level['error_rate']:.2%}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        for fake in fakes.values():
+            fake.stop()
+
+    saturation = find_saturation(levels, args.slo_p99_ms, args.error_budget, args.min_gain)
+    print(f"Saturation: {saturation['throughput_rps']} req/s at concurrency "
+          f"{saturation['concurrency']} ({'; '.join(saturation['reasons'])})")
+
+    if args.output:
+        report = {
+            'server_cmd': args.server_cmd,
+            'target': args.target,
+            'mix': mix,
+            'providers': {
+                'twilio_latency_median': args.twilio_latency,
+                'openai_latency_median': args.openai_latency,
+                'latency_sigma': args.latency_sigma,
+                'error_rate': args.error_rate,
+                'rate_limit_rate': args.rate_limit_rate,
+            },
+            'levels': levels,
+            'saturation': saturation,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
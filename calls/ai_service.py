@@ -1,31 +1,188 @@
 import os
+import json
 import logging
+import time
+from functools import cached_property
 from decouple import config
-from openai import OpenAI
-from groq import Groq
+from django.conf import settings
+
+from monitoring.metrics import track_external
+from monitoring.tracing import span
+from .ai_usage import AIBudgetExceeded, check_budget, estimate_cost, record_usage
 
 logger = logging.getLogger(__name__)
 
+# JSON schema for structured call summaries (OpenAI structured outputs,
+# strict mode: every property required, optional values are nullable)
+CALL_SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "purpose": {"type": "string"},
+        "key_points": {"type": "array", "items": {"type": "string"}},
+        "decisions": {"type": "array", "items": {"type": "string"}},
+        "action_items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "description": {"type": "string"},
+                    "owner": {"type": "string"},
+                    "due_date": {"type": ["string", "null"]}
+                },
+                "required": ["description", "owner", "due_date"],
+                "additionalProperties": False
+            }
+        },
+        "interest_level": {"type": "string", "enum": ["unknown", "low", "medium", "high"]},
+        "next_step": {"type": "string"},
+        "next_step_date": {"type": ["string", "null"]},
+        "additional_notes": {"type": "string"}
+    },
+    "required": [
+        "purpose", "key_points", "decisions", "action_items",
+        "interest_level", "next_step", "next_step_date", "additional_notes"
+    ],
+    "additionalProperties": False
+}
+
+
+TRANSCRIPTION_MODEL = "whisper-1"
+
+
+def _throttled_response(error):
+    return {
+        'success': False,
+        'error': str(error),
+        'throttled': True,
+        'retry_after': error.retry_after
+    }
+
 
 class AIService:
-    def __init__(self):
-        openai_key = config('OPENAI_API_KEY', default='')
-        groq_key = config('GROQ_API_KEY', default='')
-        openai_model = config('OPENAI_MODEL', default='gpt-4o-mini')
+    def __init__(self, user=None, call=None, base_url=None):
+        # Usage is attributed to this user and call in the AIUsage ledger
+        self.user_id = getattr(user, 'id', user)
+        self.call_id = getattr(call, 'id', call)
+        self.openai_key = config('OPENAI_API_KEY', default='')
+        self.groq_key = config('GROQ_API_KEY', default='')
+        self.openai_model = config('OPENAI_MODEL', default='gpt-4o-mini')
+        # Allows pointing the service at a local fake OpenAI API
+        self.base_url = base_url or settings.OPENAI_API_BASE_URL or None
 
-        if not openai_key:
+        if not self.openai_key:
             logger.warning("OPENAI_API_KEY not found in environment variables")
-        if not groq_key:
+        if not self.groq_key:
             logger.warning("GROQ_API_KEY not found in environment variables")
 
-        self.openai_client = OpenAI(api_key=openai_key)
-        self.groq_client = Groq(api_key=groq_key)
-        self.openai_model = openai_model
+    # The SDKs are imported on first use: they take a large share of process
+    # start-up, and most processes never talk to a provider.
+    @cached_property
+    def openai_client(self):
+        from openai import OpenAI
+        return OpenAI(api_key=self.openai_key, base_url=self.base_url,
+                      timeout=settings.OPENAI_REQUEST_TIMEOUT)
+
+    @cached_property
+    def groq_client(self):
+        from groq import Groq
+        return Groq(api_key=self.groq_key)
+
+    def _request(self, operation, model, send, **attributes):
+        """
+        Run one provider request through the budget check and usage ledger.
+
+        Raises:
+            AIBudgetExceeded: If the user's or the global budget is spent.
+        """
+        with span(f'openai.{operation}', kind='client', **{
+                'ai.model': model, 'call.id': self.call_id, 'user.id': self.user_id,
+                **attributes}) as current:
+            check_budget(self.user_id)
+
+            started = time.monotonic()
+            try:
+                with track_external('openai'):
+                    response = send()
+            except Exception:
+                record_usage(operation, model, self.user_id, self.call_id,
+                             latency_ms=int((time.monotonic() - started) * 1000), error=True)
+                raise
+            latency_ms = int((time.monotonic() - started) * 1000)
+
+            # Chat completions report tokens, transcriptions report audio duration
+            usage = getattr(response, 'usage', None)
+            prompt_tokens = getattr(usage, 'prompt_tokens', None) or 0
+            completion_tokens = getattr(usage, 'completion_tokens', None) or 0
+            audio_seconds = float(getattr(response, 'duration', None) or 0)
+            cost = record_usage(
+                operation, model, self.user_id, self.call_id,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                audio_seconds=audio_seconds,
+                latency_ms=latency_ms,
+            )
+            current.set_attribute('ai.prompt_tokens', prompt_tokens)
+            current.set_attribute('ai.completion_tokens', completion_tokens)
+            current.set_attribute('ai.audio_seconds', audio_seconds)
+            current.set_attribute('ai.cost_usd', float(cost))
+            return response
+
+    def check_transcription_budget(self, audio_seconds, requests=1):
+        """
+        Check that the budgets cover `requests` transcriptions of `audio_seconds`
+        sent at once, before any of them is charged
+        """
+        try:
+            check_budget(self.user_id, reserve=estimate_cost(
+                TRANSCRIPTION_MODEL, audio_seconds=audio_seconds or 0) * requests)
+        except AIBudgetExceeded as e:
+            logger.warning(f"AI request throttled: {e}")
+            return _throttled_response(e)
+        return {'success': True}
 
     def transcribe_audio(self, audio_file_path):
         """
         Transcribe audio file using OpenAI Whisper
         """
+        try:
+            if not os.path.exists(audio_file_path):
+                return {
+                    'success': False,
+                    'error': 'Audio file not found'
+                }
+
+            # verbose_json reports the audio duration used for accounting
+            with open(audio_file_path, 'rb') as audio_file:
+                transcription = self._request(
+                    'transcription', TRANSCRIPTION_MODEL,
+                    lambda: self.openai_client.audio.transcriptions.create(
+                        model=TRANSCRIPTION_MODEL,
+                        file=audio_file,
+                        response_format="verbose_json"
+                    ),
+                    **{'audio.bytes': os.path.getsize(audio_file_path)}
+                )
+
+            logger.info(f"Audio transcription completed for {audio_file_path}")
+            return {
+                'success': True,
+                'transcription': transcription.text
+            }
+
+        except AIBudgetExceeded as e:
+            logger.warning(f"AI request throttled: {e}")
+            return _throttled_response(e)
+        except Exception as e:
+            logger.error(f"Failed to transcribe audio: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def transcribe_audio_segments(self, audio_file_path):
+        """
+        Transcribe audio file using OpenAI Whisper, keeping segment timestamps
+        """
         try:
             if not os.path.exists(audio_file_path):
                 return {
@@ -34,18 +191,36 @@ class AIService:
                 }
 
             with open(audio_file_path, 'rb') as audio_file:
-                transcription = self.openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
+                transcription = self._request(
+                    'transcription', TRANSCRIPTION_MODEL,
+                    lambda: self.openai_client.audio.transcriptions.create(
+                        model=TRANSCRIPTION_MODEL,
+                        file=audio_file,
+                        response_format="verbose_json",
+                        timestamp_granularities=["segment"]
+                    ),
+                    **{'audio.bytes': os.path.getsize(audio_file_path)}
                 )
 
+            segments = [
+                {
+                    'start_ms': int(segment.start * 1000),
+                    'end_ms': int(segment.end * 1000),
+                    'text': segment.text.strip()
+                }
+                for segment in (transcription.segments or [])
+            ]
+
             logger.info(f"Audio transcription completed for {audio_file_path}")
             return {
                 'success': True,
-                'transcription': transcription
+                'transcription': transcription.text,
+                'segments': segments
             }
 
+        except AIBudgetExceeded as e:
+            logger.warning(f"AI request throttled: {e}")
+            return _throttled_response(e)
         except Exception as e:
             logger.error(f"Failed to transcribe audio: {str(e)}")
             return {
@@ -97,20 +272,23 @@ class AIService:
             [Any other important information, contact details, dates, numbers mentioned]
             """
 
-            chat_completion = self.openai_client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional business call analyst. Your job is to create clear, actionable summaries of phone conversations that help users quickly understand what was discussed and what needs to be done next."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.openai_model,
-                temperature=0.3,
-                max_tokens=1000
+            chat_completion = self._request(
+                'summary', self.openai_model,
+                lambda: self.openai_client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a professional business call analyst. Your job is to create clear, actionable summaries of phone conversations that help users quickly understand what was discussed and what needs to be done next."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    model=self.openai_model,
+                    temperature=0.3,
+                    max_tokens=1000
+                )
             )
 
             summary = chat_completion.choices[0].message.content
@@ -121,9 +299,81 @@ class AIService:
                 'summary': summary
             }
 
+        except AIBudgetExceeded as e:
+            logger.warning(f"AI request throttled: {e}")
+            return _throttled_response(e)
         except Exception as e:
             logger.error(f"Failed to generate summary: {str(e)}")
             return {
                 'success': False,
                 'error': str(e)
             }
+
+    def summarize_structured(self, transcription_text, reference_date=None):
+        """
+        Extract a structured summary of a transcription using OpenAI structured outputs
+        """
+        try:
+            prompt = f"""
+            Analyze the following business phone call transcription and extract a structured summary.
+
+            **Instructions:**
+            - purpose: one or two sentences on why the call took place
+            - key_points: the main topics discussed
+            - decisions: decisions that were made, if any
+            - action_items: follow-up tasks with who is responsible (owner, empty if unclear) and
+              the due date as YYYY-MM-DD if one was agreed (null otherwise)
+            - interest_level: for sales/lead calls, the lead's interest (low, medium, high);
+              unknown if it can't be judged
+            - next_step / next_step_date: what happens next and when (YYYY-MM-DD or null)
+            - additional_notes: other important details, contact details, dates or numbers
+            - Resolve relative dates ("next Tuesday") against today's date: {reference_date or 'unknown'}
+
+            **Call Transcription:**
+            {transcription_text}
+            """
+
+            chat_completion = self._request(
+                'summary', self.openai_model,
+                lambda: self.openai_client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are a professional business call analyst. You extract accurate, actionable structured data from phone conversations."
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    model=self.openai_model,
+                    temperature=0.3,
+                    max_tokens=1000,
+                    response_format={
+                        "type": "json_schema",
+                        "json_schema": {
+                            "name": "call_summary",
+                            "strict": True,
+                            "schema": CALL_SUMMARY_SCHEMA
+                        }
+                    }
+                )
+            )
+
+            summary = json.loads(chat_completion.choices[0].message.content)
+
+            logger.info("Structured call summary generated successfully")
+            return {
+                'success': True,
+                'summary': summary
+            }
+
+        except AIBudgetExceeded as e:
+            logger.warning(f"AI request throttled: {e}")
+            return _throttled_response(e)
+        except Exception as e:
+            logger.error(f"Failed to generate structured summary: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
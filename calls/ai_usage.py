@@ -0,0 +1,166 @@
+"""
+Usage accounting and budgets for AI provider requests.
+
+`AIService` reports every OpenAI request here. Tokens, audio seconds,
+latency and estimated cost are added to the aggregated `AIUsage` ledger.
+The cost is charged against a per-user and a global spend budget.
+
+Budgets are token buckets denominated in USD that refill at
+`AI_BUDGET_*_PER_HOUR` per hour. Costs are only known once a response
+arrives, so requests are charged afterwards and a bucket can go negative.
+A request is admitted only while both of its buckets are positive. Bucket
+balances are `AIBudget` rows, debited under `select_for_update`, so every
+server process and worker shares the same budgets.
+"""
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AIBudget, AIUsage
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_BUDGET = 'global'
+
+
+class AIBudgetExceeded(Exception):
+    """Raised when a request would exceed a user or global AI budget"""
+
+    def __init__(self, scope, retry_after):
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(
+            f"AI usage budget exceeded ({scope}), retry in {retry_after:.0f}s")
+
+
+def estimate_cost(model, prompt_tokens=0, completion_tokens=0, audio_seconds=0):
+    """
+    Estimate the USD cost of a request from `AI_MODEL_PRICES`.
+
+    Unknown models cost 0 and are logged, so they show up in the ledger
+    without blocking requests.
+    """
+    prices = settings.AI_MODEL_PRICES.get(model)
+    if prices is None:
+        logger.warning(f"No price configured for AI model {model}")
+        return Decimal('0')
+
+    cost = (
+        Decimal(str(prices.get('input', 0))) * prompt_tokens / 1_000_000
+        + Decimal(str(prices.get('output', 0))) * completion_tokens / 1_000_000
+        + Decimal(str(prices.get('audio_minute', 0))) * Decimal(str(audio_seconds)) / 60
+    )
+    return cost.quantize(Decimal('0.000001'))
+
+
+def _budget_scopes(user_id):
+    """(scope, USD per hour) of the budgets a request of `user_id` is charged to"""
+    scopes = [(GLOBAL_BUDGET, settings.AI_BUDGET_GLOBAL_PER_HOUR)]
+    if user_id is not None:
+        scopes.append((f'user:{user_id}', settings.AI_BUDGET_USER_PER_HOUR))
+    return [(scope, per_hour) for scope, per_hour in scopes if per_hour]
+
+
+def _balance(budget, per_hour, now):
+    """Balance of `budget` refilled up to `now`, capped at one hour's worth"""
+    capacity = Decimal(str(per_hour))
+    if budget is None:
+        return capacity
+    elapsed = Decimal(str(max((now - budget.updated_at).total_seconds(), 0)))
+    return min(capacity, budget.balance + capacity * elapsed / 3600)
+
+
+def check_budget(user_id=None, reserve=0):
+    """
+    Raise `AIBudgetExceeded` if the user's or the global budget is spent, or
+    can't cover a `reserve` (USD) of requests about to be sent together.
+    """
+    if not settings.AI_USAGE_TRACKING_ENABLED:
+        return
+    scopes = _budget_scopes(user_id)
+    if not scopes:
+        return
+
+    now = timezone.now()
+    budgets = AIBudget.objects.in_bulk([scope for scope, _ in scopes], field_name='scope')
+    for scope, per_hour in scopes:
+        balance = _balance(budgets.get(scope), per_hour, now) - reserve
+        if balance <= 0:
+            retry_after = float(-balance) * 3600 / per_hour
+            raise AIBudgetExceeded(
+                'global' if scope == GLOBAL_BUDGET else scope.replace(':', ' '),
+                max(retry_after, 1))
+
+
+def charge_budget(user_id, cost):
+    """Debit `cost` (USD) from the user's and the global budget"""
+    scopes = _budget_scopes(user_id)
+    if not scopes or not cost:
+        return
+
+    # Rows are always locked global first, so concurrent charges can't deadlock
+    with transaction.atomic():
+        now = timezone.now()
+        for scope, per_hour in scopes:
+            budget, created = AIBudget.objects.select_for_update().get_or_create(
+                scope=scope,
+                defaults={'balance': _balance(None, per_hour, now) - cost, 'updated_at': now},
+            )
+            if not created:
+                budget.balance = _balance(budget, per_hour, now) - cost
+                budget.updated_at = now
+                budget.save(update_fields=['balance', 'updated_at'])
+
+
+def record_usage(operation, model, user_id=None, call_id=None, prompt_tokens=0,
+                 completion_tokens=0, audio_seconds=0, latency_ms=0, error=False):
+    """
+    Add one request to the usage ledger and charge its cost to the budgets.
+
+    The matching ledger row is incremented in place with a single UPDATE
+    and created on the first request of the day.
+
+    Returns:
+        Decimal: The estimated cost of the request.
+    """
+    if not settings.AI_USAGE_TRACKING_ENABLED:
+        return Decimal('0')
+
+    cost = estimate_cost(model, prompt_tokens, completion_tokens, audio_seconds)
+    key = {
+        'date': timezone.localdate(),
+        'user_id': user_id,
+        'call_id': call_id,
+        'operation': operation,
+        'model': model,
+    }
+    values = {
+        'request_count': 1,
+        'error_count': 1 if error else 0,
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'audio_seconds': audio_seconds,
+        'latency_ms': latency_ms,
+        'cost': cost,
+    }
+    increments = {field: F(field) + value for field, value in values.items()}
+    increments['updated_at'] = timezone.now()
+
+    try:
+        if not AIUsage.objects.filter(**key).update(**increments):
+            try:
+                with transaction.atomic():
+                    AIUsage.objects.create(**key, **values)
+            except IntegrityError:
+                # Created concurrently by another request
+                AIUsage.objects.filter(**key).update(**increments)
+        charge_budget(user_id, cost)
+    except Exception:
+        # Accounting must never fail the request it describes
+        logger.error("Failed to record AI usage", exc_info=True)
+
+    return cost
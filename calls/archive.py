@@ -0,0 +1,238 @@
+"""
+Archival of old calls.
+
+Transcripts, summaries and recordings make up most of the size of a call
+but are rarely read once the call is a few months old. `archive_calls`
+moves them out of the hot tables and the recordings directory:
+
+- the transcript, summary and transcript segments are stored as one
+  zlib-compressed JSON document in `CallArchive`, and cleared from
+  `CallContent` and `TranscriptSegment`
+- the recording is re-encoded at `CALL_ARCHIVE_AUDIO_BITRATE` (when ffmpeg
+  is available) into `CALL_ARCHIVE_RECORDINGS_DIR`, and the original is
+  removed once the batch is committed
+
+Calls are archived in batches of `CALL_ARCHIVE_BATCH_SIZE` with one
+`bulk_create`/`bulk_update` per batch, and file and compression I/O is
+throttled to `CALL_ARCHIVE_IO_BYTES_PER_SECOND` so a run doesn't starve
+the database and disks serving live traffic.
+
+Archived calls keep their row, status, duration, notes and structured
+summary. Reads fetch through: `CallSerializer` fills in the archived
+transcript and summary for single calls, and the segments endpoint serves
+archived segments. Actions that rewrite the transcript or summary
+(transcribe, summarize) restore the call first with `restore_call`.
+"""
+import json
+import logging
+import os
+import shutil
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from monitoring.tracing import span
+from utils.rate_limit import TokenBucket
+from .audio_processing import ffmpeg_available, probe_channels, transcode_audio
+from .models import Call, CallArchive, CallContent, OPEN_CALL_STATUSES, TranscriptSegment
+
+logger = logging.getLogger(__name__)
+
+
+def compress_payload(data):
+    """Return the compressed JSON of `data` and its uncompressed size"""
+    raw = json.dumps(data, separators=(',', ':')).encode()
+    return zlib.compress(raw, settings.CALL_ARCHIVE_COMPRESSION_LEVEL), len(raw)
+
+
+def decompress_payload(payload):
+    return json.loads(zlib.decompress(bytes(payload)))
+
+
+def find_archivable_calls(cutoff, limit):
+    """Return finished calls that started before `cutoff`, oldest first"""
+    return list(
+        Call.objects.filter(archived_at__isnull=True, start_time__lt=cutoff)
+        .exclude(status__in=OPEN_CALL_STATUSES)
+        .select_related('content')
+        .order_by('start_time', 'id')[:limit]
+    )
+
+
+def archive_recording(call):
+    """
+    Copy the recording of `call` into the archive directory, re-encoded at
+    the archive bitrate when ffmpeg is available.
+
+    Returns:
+        str: The full path of the archived file, or None without a recording.
+    """
+    if not call.recording_file_path:
+        return None
+    source_path = os.path.join(os.getcwd(), call.recording_file_path)
+    if not os.path.exists(source_path):
+        return None
+
+    archive_dir = os.path.join(os.getcwd(), settings.CALL_ARCHIVE_RECORDINGS_DIR)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    archived_path = source_path
+    if ffmpeg_available():
+        # Stored recordings are already trimmed; trimming again would shift
+        # the transcript timestamps
+        options = {'bitrate': settings.CALL_ARCHIVE_AUDIO_BITRATE, 'trim_silence': False}
+        channels = probe_channels(source_path)
+        if channels:
+            options['channels'] = channels
+        result = transcode_audio(source_path, keep_original=True, **options)
+        if result['success']:
+            archived_path = result['file_path']
+
+    target_path = os.path.join(archive_dir, os.path.basename(archived_path))
+    if archived_path == source_path:
+        shutil.copy2(source_path, target_path)
+    else:
+        os.replace(archived_path, target_path)
+    return target_path
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove archived recording {path}: {e}")
+
+
+def _archive_batch(calls, limiter):
+    segments = {}
+    for segment in TranscriptSegment.objects.filter(call__in=calls).order_by('call', 'start_ms'):
+        segments.setdefault(segment.call_id, []).append(
+            [segment.start_ms, segment.end_ms, segment.speaker, segment.text])
+
+    now = timezone.now()
+    archives = []
+    replaced_files = []
+    summary = {'calls': len(calls), 'payload_bytes': 0, 'compressed_bytes': 0, 'recordings': 0}
+    for call in calls:
+        payload, payload_size = compress_payload({
+            'transcribe_content': call.transcribe_content,
+            'summary_content': call.summary_content,
+            'segments': segments.get(call.id, []),
+        })
+        archives.append(CallArchive(
+            call=call, payload=payload, payload_size=payload_size,
+            compressed_size=len(payload)))
+        summary['payload_bytes'] += payload_size
+        summary['compressed_bytes'] += len(payload)
+        io_bytes = payload_size + len(payload)
+
+        archived_path = archive_recording(call)
+        if archived_path:
+            source_path = os.path.join(os.getcwd(), call.recording_file_path)
+            io_bytes += os.path.getsize(source_path) + os.path.getsize(archived_path)
+            if archived_path != source_path:
+                replaced_files.append(source_path)
+            call.recording_file_path = os.path.relpath(archived_path, os.getcwd())
+            call.recording_size = os.path.getsize(archived_path)
+            summary['recordings'] += 1
+
+        call.archived_at = now
+
+        limiter.debit(io_bytes)
+        time.sleep(limiter.time_until_positive())
+
+    with transaction.atomic():
+        CallArchive.objects.bulk_create(archives)
+        TranscriptSegment.objects.filter(call__in=calls).delete()
+        CallContent.objects.filter(call__in=calls).update(
+            transcribe_content='', summary_content='')
+        # `updated_at` is left alone: archiving doesn't change the call for
+        # sync clients, which keep their copy of the transcript
+        Call.objects.bulk_update(
+            calls, ['recording_file_path', 'recording_size', 'archived_at'])
+        transaction.on_commit(lambda: _remove_files(replaced_files))
+    return summary
+
+
+def archive_calls(older_than=None, limit=None, batch_size=None, io_bytes_per_second=None):
+    """
+    Archive up to `limit` finished calls that started more than
+    `older_than` ago, in batches of `batch_size`.
+
+    Returns:
+        dict: Counts of archived `calls` and `recordings`, and the
+        `payload_bytes` and `compressed_bytes` of the archived text.
+    """
+    older_than = older_than or timedelta(days=settings.CALL_ARCHIVE_AFTER_DAYS)
+    limit = limit or settings.CALL_ARCHIVE_MAX_CALLS
+    batch_size = batch_size or settings.CALL_ARCHIVE_BATCH_SIZE
+    limiter = TokenBucket(io_bytes_per_second or settings.CALL_ARCHIVE_IO_BYTES_PER_SECOND)
+    cutoff = timezone.now() - older_than
+
+    totals = {'calls': 0, 'recordings': 0, 'payload_bytes': 0, 'compressed_bytes': 0}
+    while totals['calls'] < limit:
+        calls = find_archivable_calls(cutoff, min(batch_size, limit - totals['calls']))
+        if not calls:
+            break
+        with span('archive.batch', calls=len(calls)):
+            summary = _archive_batch(calls, limiter)
+        for key in totals:
+            totals[key] += summary[key]
+
+    logger.info("Call archival finished", extra=totals)
+    return totals
+
+
+def load_archived(call):
+    """
+    Return the archived payload of `call` (`transcribe_content`,
+    `summary_content` and `segments`), or None if it isn't archived.
+    """
+    if not call.archived_at:
+        return None
+    if not hasattr(call, '_archived_payload'):
+        archive = CallArchive.objects.filter(call_id=call.id).only('payload').first()
+        call._archived_payload = archive and decompress_payload(archive.payload)
+    return call._archived_payload
+
+
+def archived_segments(call, start_ms=None, end_ms=None, limit=None):
+    """Archived transcript segments of `call` overlapping a time window"""
+    segments = [
+        {'id': None, 'start_ms': start, 'end_ms': end, 'speaker': speaker, 'text': text}
+        for start, end, speaker, text in (load_archived(call) or {}).get('segments', [])
+        if (end_ms is None or start < end_ms) and (start_ms is None or end > start_ms)
+    ]
+    return segments[:limit]
+
+
+def restore_call(call):
+    """
+    Move the archived transcript, summary and segments of `call` back to
+    the hot tables. The recording stays in the archive directory.
+    """
+    payload = load_archived(call)
+    if payload is None:
+        return
+
+    with transaction.atomic():
+        TranscriptSegment.objects.bulk_create(
+            [
+                TranscriptSegment(call=call, start_ms=start, end_ms=end,
+                                  speaker=speaker, text=text)
+                for start, end, speaker, text in payload['segments']
+            ],
+            batch_size=500,
+        )
+        call.transcribe_content = payload['transcribe_content']
+        call.summary_content = payload['summary_content']
+        call.archived_at = None
+        call.save(update_fields=[
+            'transcribe_content', 'summary_content', 'archived_at', 'updated_at'])
+        CallArchive.objects.filter(call_id=call.id).delete()
+    del call._archived_payload
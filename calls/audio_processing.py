@@ -0,0 +1,257 @@
+"""
+Audio processing stage run on recordings before storage and transcription.
+
+Twilio delivers MP3s as-is. Before they are stored and sent to Whisper we
+downmix them to mono 16 kHz (all speech recognition needs; dual-channel
+recordings keep both legs when diarizing by channel), strip leading and
+trailing silence, and encode them as low-bitrate Opus (or MP3). Work
+is done by `ffmpeg` subprocesses; a semaphore bounds how many run at once
+across all pipeline threads.
+"""
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+from django.conf import settings
+
+from monitoring.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Output container/extension and encoder arguments per codec
+CODECS = {
+    'opus': ('.ogg', ['-c:a', 'libopus', '-application', 'voip']),
+    'mp3': ('.mp3', ['-c:a', 'libmp3lame']),
+}
+
+CONTENT_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.ogg': 'audio/ogg',
+    '.opus': 'audio/ogg',
+    '.wav': 'audio/wav',
+}
+
+# Trim silence at both ends only: `areverse` lets the same start-trimming
+# filter handle the tail. Pauses inside the conversation are kept so
+# transcript timestamps still line up with the stored audio.
+TRIM_SILENCE_FILTER = (
+    'silenceremove=start_periods=1:start_silence=0.25:start_threshold={threshold},'
+    'areverse,'
+    'silenceremove=start_periods=1:start_silence=0.25:start_threshold={threshold},'
+    'areverse'
+)
+
+CHANNELS_RE = re.compile(r'Audio: [^\n]*?, \d+ Hz, (mono|stereo|(\d+) channels)')
+DURATION_RE = re.compile(r'Duration: (\d+):(\d\d):(\d\d(?:\.\d+)?)')
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def _transcode_slots():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(settings.AUDIO_TRANSCODE_MAX_PROCESSES)
+        return _slots
+
+
+def ffmpeg_available():
+    return shutil.which(settings.FFMPEG_BINARY) is not None
+
+
+def content_type_for(file_path):
+    """Return the audio MIME type for a stored recording path"""
+    extension = os.path.splitext(file_path)[1].lower()
+    return CONTENT_TYPES.get(extension, 'application/octet-stream')
+
+
+def build_transcode_command(source_path, target_path, codec=None, bitrate=None,
+                            sample_rate=None, channels=None, trim_silence=True):
+    """
+    Build the ffmpeg command line for `transcode_audio`.
+    """
+    codec = codec or settings.AUDIO_TRANSCODE_CODEC
+    _, codec_args = CODECS[codec]
+    command = [
+        settings.FFMPEG_BINARY, '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+        '-i', source_path,
+        '-vn',
+        '-ac', str(channels or settings.AUDIO_TRANSCODE_CHANNELS),
+        '-ar', str(sample_rate or settings.AUDIO_TRANSCODE_SAMPLE_RATE),
+    ]
+    if trim_silence:
+        command += ['-af', TRIM_SILENCE_FILTER.format(
+            threshold=settings.AUDIO_TRANSCODE_SILENCE_THRESHOLD)]
+    command += codec_args
+    command += ['-b:a', bitrate or settings.AUDIO_TRANSCODE_BITRATE, target_path]
+    return command
+
+
+def transcode_audio(source_path, codec=None, keep_original=False, **options):
+    """
+    Transcode a recording for storage and transcription.
+
+    The output is written next to the source with the codec's extension.
+    If the result is not smaller than the source, it is discarded and the
+    source is kept.
+
+    Returns:
+        dict: `success`, `file_path` (the file to keep), `original_size` and
+        `compressed_size` in bytes, or `error` on failure.
+    """
+    codec = codec or settings.AUDIO_TRANSCODE_CODEC
+    extension, _ = CODECS[codec]
+    original_size = os.path.getsize(source_path)
+
+    base = os.path.splitext(source_path)[0]
+    target_path = f"{base}{extension}"
+    if target_path == source_path:
+        target_path = f"{base}.transcoded{extension}"
+    tmp_path = f"{target_path}.part"
+
+    command = build_transcode_command(source_path, tmp_path, codec=codec, **options)
+    # ffmpeg picks the muxer from the extension, which ".part" hides
+    command.insert(-1, '-f')
+    command.insert(-1, 'ogg' if extension == '.ogg' else extension.lstrip('.'))
+
+    try:
+        with _transcode_slots():
+            subprocess.run(
+                command, check=True, capture_output=True,
+                timeout=settings.AUDIO_TRANSCODE_TIMEOUT
+            )
+    except (OSError, subprocess.SubprocessError) as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        stderr = getattr(e, 'stderr', None)
+        detail = stderr.decode(errors='replace').strip() if stderr else str(e)
+        logger.error(f"Failed to transcode {source_path}: {detail}")
+        return {'success': False, 'error': detail}
+
+    compressed_size = os.path.getsize(tmp_path)
+    if compressed_size >= original_size:
+        os.remove(tmp_path)
+        return {
+            'success': True,
+            'file_path': source_path,
+            'original_size': original_size,
+            'compressed_size': original_size,
+        }
+
+    os.replace(tmp_path, target_path)
+    if not keep_original:
+        os.remove(source_path)
+
+    logger.info(
+        f"Transcoded {source_path}: {original_size} -> {compressed_size} bytes")
+    return {
+        'success': True,
+        'file_path': target_path,
+        'original_size': original_size,
+        'compressed_size': compressed_size,
+    }
+
+
+def _probe(file_path):
+    """Stream info ffmpeg prints for `file_path`, or '' if it can't be read"""
+    try:
+        # `ffmpeg -i` without an output exits non-zero but prints stream info
+        result = subprocess.run(
+            [settings.FFMPEG_BINARY, '-nostdin', '-hide_banner', '-i', file_path],
+            capture_output=True, timeout=30
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ''
+    return result.stderr.decode(errors='replace')
+
+
+def probe_duration(file_path):
+    """
+    Return the duration of `file_path` in seconds, or None if unknown.
+    """
+    match = DURATION_RE.search(_probe(file_path))
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def probe_channels(file_path):
+    """
+    Return the number of audio channels in `file_path`, or None if unknown.
+    """
+    match = CHANNELS_RE.search(_probe(file_path))
+    if not match:
+        return None
+    if match.group(1) == 'mono':
+        return 1
+    if match.group(1) == 'stereo':
+        return 2
+    return int(match.group(2))
+
+
+def split_channels(file_path, output_dir, channels=2):
+    """
+    Extract each channel of `file_path` into its own mono file.
+
+    Returns:
+        list: The per-channel file paths in channel order, or [] on failure.
+    """
+    codec = settings.AUDIO_TRANSCODE_CODEC
+    extension, codec_args = CODECS[codec]
+    command = [settings.FFMPEG_BINARY, '-nostdin', '-loglevel', 'error', '-y',
+               '-i', file_path]
+    outputs = []
+    for channel in range(channels):
+        output = os.path.join(output_dir, f"channel_{channel}{extension}")
+        command += ['-map', '0:a', '-af', f'pan=mono|c0=c{channel}',
+                    *codec_args, '-b:a', settings.AUDIO_TRANSCODE_BITRATE, output]
+        outputs.append(output)
+
+    try:
+        with _transcode_slots():
+            subprocess.run(command, check=True, capture_output=True,
+                           timeout=settings.AUDIO_TRANSCODE_TIMEOUT)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.error(f"Failed to split channels of {file_path}: {e}")
+        return []
+    return outputs
+
+
+def process_downloaded_recording(call, full_path):
+    """
+    Run the audio stage on a freshly downloaded recording of `call`.
+
+    Updates `recording_file_path` and the size fields on `call` (unsaved).
+    Without ffmpeg, or if the stage is disabled, the original is kept.
+    """
+    if not os.path.exists(full_path):
+        return
+
+    call.recording_original_size = os.path.getsize(full_path)
+    call.recording_size = call.recording_original_size
+
+    if not settings.AUDIO_TRANSCODE_ENABLED:
+        return
+    if not ffmpeg_available():
+        logger.warning("ffmpeg not found, storing recording without transcoding")
+        return
+
+    options = {}
+    if settings.TRANSCRIPT_DIARIZE_BY_CHANNEL and probe_channels(full_path) == 2:
+        # Keep both legs of a dual-channel recording for diarization
+        options['channels'] = 2
+
+    with span('audio.transcode', **{'call.id': call.id, 'bytes_in': call.recording_original_size}) as current:
+        result = transcode_audio(full_path, **options)
+        if not result['success']:
+            current.set_error(result['error'])
+            return
+        current.set_attribute('bytes_out', result['compressed_size'])
+
+    call.recording_file_path = os.path.relpath(result['file_path'], os.getcwd())
+    call.recording_size = result['compressed_size']
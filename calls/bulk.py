@@ -0,0 +1,205 @@
+"""
+Batch versions of the per-call actions of `CallViewSet`.
+
+A supervisor closing out a shift can refresh, end, annotate or
+re-summarize hundreds of calls in one request instead of one request per
+call. Every function takes the requested call ids of one user and returns
+one result per id, in request order:
+
+    {'call_id': 7, 'success': True, 'call': <Call>}
+    {'call_id': 8, 'success': False, 'status_code': 404, 'error': "Call not found"}
+
+Twilio requests run concurrently on at most `BULK_CALL_MAX_WORKERS`
+threads. Database reads and writes stay on the calling thread: the calls
+are loaded with one query and written back with one `bulk_update`.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from monitoring.tracing import span
+from .archive import restore_call
+from .models import Call, CallContent
+from .reconciliation import RECONCILED_FIELDS, apply_twilio_status, status_snapshot
+from .recording_pipeline import enqueue_recording_processing, on_call_completed
+from .status_writes import status_writes
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND = {'success': False, 'status_code': 404, 'error': "Call not found"}
+
+
+def load_calls(user, call_ids):
+    """Return the user's calls among `call_ids`, by id"""
+    calls = Call.objects.filter(user=user, pk__in=call_ids).select_related('lead', 'content')
+    return {call.id: call for call in calls}
+
+
+def run_concurrently(fn, items, max_workers=None):
+    """`map(fn, items)` on at most `max_workers` threads"""
+    max_workers = min(max_workers or settings.BULK_CALL_MAX_WORKERS, len(items))
+    if max_workers <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=max_workers,
+                            thread_name_prefix='bulk-calls') as executor:
+        return list(executor.map(fn, items))
+
+
+def _results(call_ids, calls, outcomes):
+    """Merge per-call outcomes into results in request order"""
+    results = []
+    for call_id in call_ids:
+        if call_id not in calls:
+            results.append({'call_id': call_id, **NOT_FOUND})
+            continue
+        outcome = outcomes.get(call_id)
+        if outcome is None:
+            results.append({'call_id': call_id, 'success': True, 'call': calls[call_id]})
+        else:
+            results.append({'call_id': call_id, 'success': False, **outcome})
+    return results
+
+
+def refresh_statuses(user, call_ids, twilio_service):
+    """
+    Fetch the current Twilio status of each call and store it.
+
+    Calls without a Twilio call SID, or whose status, duration and end time
+    didn't change, are returned without being written.
+    """
+    calls = load_calls(user, call_ids)
+    tracked = [call for call in calls.values() if call.twilio_call_sid]
+
+    with span('bulk.refresh_statuses', calls=len(tracked)):
+        fetched = run_concurrently(
+            lambda call: twilio_service.get_call_status(call.twilio_call_sid), tracked)
+
+    now = timezone.now()
+    outcomes = {}
+    updated = []
+    changed = []
+    for call, result in zip(tracked, fetched):
+        if not result['success']:
+            outcomes[call.id] = {'status_code': 502, 'error': result['error']}
+            continue
+        previous, updated_at = status_snapshot(call), call.updated_at
+        if apply_twilio_status(call, result, now):
+            changed.append(call)
+        if status_snapshot(call) == previous:
+            call.updated_at = updated_at
+            continue
+        status_writes.discard(call.id)
+        updated.append(call)
+
+    with transaction.atomic():
+        Call.objects.bulk_update(updated, RECONCILED_FIELDS, batch_size=500)
+        for call in changed:
+            on_call_completed(call)
+    return _results(call_ids, calls, outcomes)
+
+
+def save_notes(calls):
+    """Write the notes of `calls` to their `CallContent` rows in one upsert"""
+    CallContent.objects.bulk_create(
+        [CallContent(call_id=call.id, notes=call.notes) for call in calls],
+        update_conflicts=True, unique_fields=['call'], update_fields=['notes'],
+        batch_size=500,
+    )
+
+
+def end_calls(user, items, twilio_service):
+    """
+    End calls and mark them completed.
+
+    `items` are `{'call_id', 'duration'?, 'notes'?}` dicts. Without a
+    duration, the time since the call started is stored. Notes are only
+    replaced when given.
+    """
+    call_ids = [item['call_id'] for item in items]
+    calls = load_calls(user, call_ids)
+    live = [call for call in calls.values() if call.twilio_call_sid]
+
+    # Like the single end action, the call is completed here even if
+    # Twilio already hung up or the request fails
+    with span('bulk.end_calls', calls=len(live)):
+        run_concurrently(lambda call: twilio_service.end_call(call.twilio_call_sid), live)
+
+    now = timezone.now()
+    ended = []
+    noted = []
+    for item in items:
+        call = calls.get(item['call_id'])
+        if call is None:
+            continue
+        call.end_time = now
+        call.duration = item.get('duration')
+        if call.duration is None:
+            call.duration = max(int((now - call.start_time).total_seconds()), 0)
+        if 'notes' in item:
+            call.notes = item['notes']
+            noted.append(call)
+        call.status = 'completed'
+        call.updated_at = now
+        ended.append(call)
+
+    with transaction.atomic():
+        Call.objects.bulk_update(
+            ended, ['end_time', 'duration', 'status', 'updated_at'], batch_size=500)
+        save_notes(noted)
+        for call in ended:
+            on_call_completed(call)
+    return _results(call_ids, calls, {})
+
+
+def update_notes(user, items):
+    """Replace the notes of calls; `items` are `{'call_id', 'notes'}` dicts"""
+    call_ids = [item['call_id'] for item in items]
+    calls = load_calls(user, call_ids)
+
+    now = timezone.now()
+    for item in items:
+        call = calls.get(item['call_id'])
+        if call is not None:
+            call.notes = item['notes']
+            call.updated_at = now
+
+    with transaction.atomic():
+        Call.objects.bulk_update(calls.values(), ['updated_at'], batch_size=500)
+        save_notes(calls.values())
+    return _results(call_ids, calls, {})
+
+
+def resummarize(user, call_ids):
+    """
+    Queue the summaries of transcribed calls to be generated again.
+
+    Summaries are generated by the recording pipeline's process pool (see
+    `recording_pipeline.process_recording`), so a large batch never holds
+    the request open for OpenAI. Queued calls have `summary_status`
+    "pending" until then.
+    """
+    calls = load_calls(user, call_ids)
+
+    now = timezone.now()
+    outcomes = {}
+    queued = []
+    for call in calls.values():
+        if call.archived_at:
+            restore_call(call)
+        if not call.transcribe_content:
+            outcomes[call.id] = {
+                'status_code': 400, 'error': "No transcription available for this call"}
+            continue
+        call.summary_status = 'pending'
+        call.updated_at = now
+        queued.append(call)
+
+    with transaction.atomic():
+        Call.objects.bulk_update(queued, ['summary_status', 'updated_at'], batch_size=500)
+        for call in queued:
+            enqueue_recording_processing(call.id, summary_only=True)
+    logger.info(f"Queued {len(queued)} calls for summarizing")
+    return _results(call_ids, calls, outcomes)
@@ -0,0 +1,366 @@
+"""
+Exports of call logs as CSV, JSON Lines or Parquet.
+
+`GET /calls/export/` streams the file in the response: rows are read with
+`QuerySet.iterator(chunk_size=CALL_EXPORT_CHUNK_SIZE)` (a server-side
+cursor on PostgreSQL) and written out chunk by chunk, so memory stays flat
+however many calls are exported. `POST /calls/exports/` only records a
+pending `CallExport`, for ranges that would take too long for one request.
+`manage.py run_call_exports` writes it into `CALL_EXPORT_DIR`. Each runner
+claims pending exports with `SELECT ... FOR UPDATE SKIP LOCKED`, so several
+can run side by side. A running export refreshes `heartbeat_at`; one whose
+runner died is marked failed and its partial `.tmp` file removed
+(`fail_stale_exports`). The file is downloaded once the export is completed.
+
+Transcripts and summaries are only read when asked for. Archived calls
+(calls/archive.py) export an empty transcript and summary. Parquet needs
+pyarrow, which isn't a requirement of the app.
+"""
+import csv
+import glob
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from monitoring.tracing import span
+from utils.db_routing import read_from_replica
+from .models import Call, CallExport
+
+logger = logging.getLogger(__name__)
+
+# (column, lookup, type) of every export
+COLUMNS = [
+    ('id', 'id', 'int'),
+    ('start_time', 'start_time', 'datetime'),
+    ('end_time', 'end_time', 'datetime'),
+    ('status', 'status', 'text'),
+    ('duration', 'duration', 'int'),
+    ('phone_number', 'phone_number', 'text'),
+    ('phone_e164', 'phone_e164', 'text'),
+    ('lead_id', 'lead_id', 'int'),
+    ('lead_name', 'lead__name', 'text'),
+    ('twilio_call_sid', 'twilio_call_sid', 'text'),
+    ('recording_file_path', 'recording_file_path', 'text'),
+    ('transcribe_status', 'transcribe_status', 'text'),
+    ('summary_status', 'summary_status', 'text'),
+    ('notes', 'content__notes', 'text'),
+    ('archived_at', 'archived_at', 'datetime'),
+]
+TRANSCRIPT_COLUMNS = [('transcript', 'content__transcribe_content', 'text')]
+SUMMARY_COLUMNS = [
+    ('summary', 'content__summary_content', 'text'),
+    ('interest_level', 'structured_summary__interest_level', 'text'),
+    ('next_step', 'structured_summary__next_step', 'text'),
+    ('next_step_date', 'structured_summary__next_step_date', 'date'),
+]
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+EXTENSIONS = {'csv': 'csv', 'jsonl': 'jsonl', 'parquet': 'parquet'}
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_columns(include_transcripts=False, include_summaries=False):
+    columns = list(COLUMNS)
+    if include_transcripts:
+        columns += TRANSCRIPT_COLUMNS
+    if include_summaries:
+        columns += SUMMARY_COLUMNS
+    return columns
+
+
+def export_queryset(user, params):
+    """
+    The user's calls matching the export query `params`, oldest first.
+    """
+    calls = Call.objects.filter(user=user)
+    if params.get('started_after'):
+        calls = calls.filter(start_time__gte=params['started_after'])
+    if params.get('started_before'):
+        calls = calls.filter(start_time__lt=params['started_before'])
+    if params.get('status'):
+        calls = calls.filter(status=params['status'])
+    if params.get('lead'):
+        calls = calls.filter(lead_id=params['lead'])
+    return calls.order_by('start_time', 'id')
+
+
+def export_rows(queryset, columns):
+    """Yield one row of values per call, fetched `CALL_EXPORT_CHUNK_SIZE` at a time"""
+    text_indexes = [i for i, (_, _, kind) in enumerate(columns) if kind == 'text']
+    rows = queryset.values_list(*(lookup for _, lookup, _ in columns))
+    for row in rows.iterator(chunk_size=settings.CALL_EXPORT_CHUNK_SIZE):
+        if any(row[i] is None for i in text_indexes):
+            # Calls without content or a structured summary
+            row = list(row)
+            for i in text_indexes:
+                if row[i] is None:
+                    row[i] = ''
+        yield row
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Echo:
+    """File object for csv.writer that hands back what it is given"""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _, _ in columns])
+    for chunk in chunked(rows, settings.CALL_EXPORT_CHUNK_SIZE):
+        yield ''.join(writer.writerow(row) for row in chunk)
+
+
+def jsonl_chunks(columns, rows):
+    names = [name for name, _, _ in columns]
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for chunk in chunked(rows, settings.CALL_EXPORT_CHUNK_SIZE):
+        yield ''.join(f"{encoder.encode(dict(zip(names, row)))}\n" for row in chunk)
+
+
+class _ByteSink:
+    """
+    Write-only file object for pyarrow whose contents are taken out as
+    they are written, so the Parquet file is never held in memory.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def parquet_chunks(columns, rows):
+    """One row group per chunk of rows"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        'int': pa.int64(),
+        'text': pa.string(),
+        'date': pa.date32(),
+        'datetime': pa.timestamp('us', tz='UTC'),
+    }
+    schema = pa.schema([(name, types[kind]) for name, _, kind in columns])
+    sink = _ByteSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    try:
+        for chunk in chunked(rows, settings.CALL_EXPORT_CHUNK_SIZE):
+            writer.write_batch(pa.record_batch(
+                [pa.array([row[i] for row in chunk], type=field.type)
+                 for i, field in enumerate(schema)],
+                schema=schema,
+            ))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+WRITERS = {
+    'csv': csv_chunks,
+    'jsonl': jsonl_chunks,
+    'parquet': parquet_chunks,
+}
+
+
+def export_chunks(queryset, file_format, columns):
+    """Yield the export file as str (CSV, JSON Lines) or bytes (Parquet) chunks"""
+    return WRITERS[file_format](columns, export_rows(queryset, columns))
+
+
+def export_filename(file_format, now=None):
+    now = now or timezone.now()
+    return f"calls-{now:%Y%m%d-%H%M%S}.{EXTENSIONS[file_format]}"
+
+
+# Background exports
+
+def export_dir():
+    return os.path.join(os.getcwd(), settings.CALL_EXPORT_DIR)
+
+
+def enqueue_export(export):
+    """
+    Leave `export` pending for `manage.py run_call_exports`, or write it
+    right away with `CALL_EXPORT_EAGER` (tests).
+    """
+    if settings.CALL_EXPORT_EAGER:
+        claimed = claim_export(export.id)
+        if claimed:
+            _run_export_task(claimed)
+
+
+def claim_export(export_id=None):
+    """
+    Mark the oldest pending export (or export `export_id`) running and
+    return it; None if there is none, or it is claimed by another runner.
+    """
+    with transaction.atomic():
+        pending = CallExport.objects.select_for_update(skip_locked=True).filter(status='pending')
+        if export_id is not None:
+            pending = pending.filter(pk=export_id)
+        export = pending.order_by('created_at', 'id').first()
+        if export is None:
+            return None
+        export.status = 'running'
+        export.heartbeat_at = timezone.now()
+        export.save(update_fields=['status', 'heartbeat_at'])
+    return export
+
+
+def _run_export_task(export):
+    try:
+        run_export(export)
+    except Exception:
+        # Recorded on the export by run_export
+        logger.error(f"Call export {export.id} failed", exc_info=True)
+
+
+def run_pending_exports(limit=None):
+    """
+    Write pending exports one after the other until none is left (or
+    `limit` were written); return how many were run.
+    """
+    count = 0
+    while limit is None or count < limit:
+        export = claim_export()
+        if export is None:
+            break
+        _run_export_task(export)
+        count += 1
+    return count
+
+
+def fail_stale_exports(stale_after=None):
+    """
+    Mark running exports whose runner stopped sending heartbeats as failed,
+    and remove partial files nobody is writing anymore; return how many
+    exports failed.
+    """
+    stale_after = stale_after or timedelta(minutes=settings.CALL_EXPORT_STALE_MINUTES)
+    cutoff = timezone.now() - stale_after
+    stale = list(CallExport.objects.filter(status='running', heartbeat_at__lt=cutoff)
+                 .values_list('id', flat=True))
+    failed = CallExport.objects.filter(pk__in=stale, status='running').update(
+        status='failed', error="The export was interrupted; please request it again",
+        completed_at=timezone.now())
+    if failed:
+        logger.warning(f"Marked {failed} interrupted call exports as failed")
+
+    # A running export writes its .tmp file continuously
+    for path in glob.glob(os.path.join(export_dir(), '*.tmp')):
+        try:
+            if os.path.getmtime(path) < cutoff.timestamp():
+                os.remove(path)
+        except OSError:
+            pass
+    return failed
+
+
+def run_export(export):
+    """
+    Write a claimed (running) `CallExport` into `CALL_EXPORT_DIR`.
+
+    The file is written under a temporary name and renamed when complete,
+    so a download never sees a partial file.
+    """
+    from .serializers import CallExportQuerySerializer
+
+    query = CallExportQuerySerializer(data=export.filters)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+    columns = export_columns(params['include_transcripts'], params['include_summaries'])
+
+    os.makedirs(export_dir(), exist_ok=True)
+    file_path = os.path.join(
+        export_dir(), f"{export.id}-{export_filename(export.file_format, export.created_at)}")
+    tmp_path = f"{file_path}.tmp"
+    row_count = 0
+    heartbeat = time.monotonic()
+
+    def count(rows):
+        nonlocal row_count, heartbeat
+        for row in rows:
+            row_count += 1
+            if time.monotonic() - heartbeat >= settings.CALL_EXPORT_HEARTBEAT_SECONDS:
+                heartbeat = time.monotonic()
+                CallExport.objects.filter(pk=export.id).update(heartbeat_at=timezone.now())
+            yield row
+
+    try:
+        with span('export.write', **{'export.id': export.id, 'format': export.file_format}), \
+                read_from_replica():
+            queryset = export_queryset(export.user, params)
+            rows = export_rows(queryset, columns)
+            with open(tmp_path, 'wb') as f:
+                for chunk in WRITERS[export.file_format](columns, count(rows)):
+                    f.write(chunk.encode() if isinstance(chunk, str) else chunk)
+        os.replace(tmp_path, file_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        export.status = 'failed'
+        export.error = str(e)
+        export.completed_at = timezone.now()
+        export.save(update_fields=['status', 'error', 'completed_at'])
+        raise
+
+    export.status = 'completed'
+    export.file_path = os.path.relpath(file_path, os.getcwd())
+    export.file_size = os.path.getsize(file_path)
+    export.row_count = row_count
+    export.completed_at = timezone.now()
+    export.save(update_fields=['status', 'file_path', 'file_size', 'row_count', 'completed_at'])
+    logger.info(f"Call export {export.id} written", extra={'rows': row_count})
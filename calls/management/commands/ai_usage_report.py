@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from calls.models import AIUsage
+
+
+class Command(BaseCommand):
+    help = "Summarize AI usage and estimated cost from the AIUsage ledger."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help="Report on the last N days, including today")
+        parser.add_argument(
+            '--by', choices=['user', 'call', 'model', 'operation', 'date'], default='user',
+            help="Group totals by this column")
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help="Number of rows to show, most expensive first")
+
+    def handle(self, *args, **options):
+        since = timezone.localdate() - timedelta(days=options['days'] - 1)
+        group = options['by']
+        column = {'user': 'user__username', 'call': 'call_id'}.get(group, group)
+
+        rows = (
+            AIUsage.objects.filter(date__gte=since)
+            .values(column)
+            .annotate(
+                requests=Sum('request_count'),
+                errors=Sum('error_count'),
+                prompt_tokens=Sum('prompt_tokens'),
+                completion_tokens=Sum('completion_tokens'),
+                audio_seconds=Sum('audio_seconds'),
+                latency_ms=Sum('latency_ms'),
+                cost=Sum('cost'),
+            )
+            .order_by('-cost')[:options['top']]
+        )
+
+        self.stdout.write(
+            f"{group:<24} {'requests':>9} {'errors':>7} {'prompt':>10} "
+            f"{'completion':>10} {'audio min':>10} {'avg ms':>8} {'cost $':>11}")
+        for row in rows:
+            avg_latency = row['latency_ms'] / row['requests'] if row['requests'] else 0
+            self.stdout.write(
+                f"{str(row[column]):<24} {row['requests']:>9} {row['errors']:>7} "
+                f"{row['prompt_tokens']:>10} {row['completion_tokens']:>10} "
+                f"{row['audio_seconds'] / 60:>10.1f} {avg_latency:>8.0f} {row['cost']:>11.4f}")
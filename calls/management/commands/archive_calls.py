@@ -0,0 +1,58 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from calls.archive import archive_calls
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the transcripts, summaries and recordings of old calls to "
+        "compressed cold storage. Run once (e.g. from cron) or with "
+        "--interval as a long-lived worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=settings.CALL_ARCHIVE_AFTER_DAYS,
+            help="Archive calls that started more than this many days ago")
+        parser.add_argument(
+            '--limit', type=int, default=settings.CALL_ARCHIVE_MAX_CALLS,
+            help="Maximum number of calls per run")
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.CALL_ARCHIVE_BATCH_SIZE,
+            help="Calls written per transaction")
+        parser.add_argument(
+            '--io-rate', type=int, default=settings.CALL_ARCHIVE_IO_BYTES_PER_SECOND,
+            help="Maximum bytes read and written per second")
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Repeat every N seconds; 0 runs a single pass")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                summary = archive_calls(
+                    older_than=timedelta(days=options['older_than_days']),
+                    limit=options['limit'],
+                    batch_size=options['batch_size'],
+                    io_bytes_per_second=options['io_rate'],
+                )
+                self.stdout.write(
+                    f"Archived {summary['calls']} calls and {summary['recordings']} "
+                    f"recordings, text {summary['payload_bytes']} -> "
+                    f"{summary['compressed_bytes']} bytes"
+                )
+            except Exception:
+                if not options['interval']:
+                    raise
+                logger.error("Call archival failed", exc_info=True)
+
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
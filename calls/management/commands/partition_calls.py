@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from calls.partitioning import convert_to_partitioned, ensure_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the upcoming monthly partitions of calls_call (run daily, "
+        "e.g. from cron), or with --convert turn an existing calls_call into "
+        "a partitioned table. PostgreSQL only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=settings.CALL_PARTITION_MONTHS_AHEAD,
+            help="Create partitions up to this many months from now")
+        parser.add_argument(
+            '--convert', action='store_true',
+            help="Copy calls_call into a partitioned table and swap them")
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.CALL_PARTITION_COPY_BATCH_SIZE,
+            help="Rows copied per transaction with --convert")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(f"Partitioning is not supported on {connection.vendor}, skipping")
+            return
+
+        if options['convert']:
+            try:
+                convert_to_partitioned(batch_size=options['batch_size'], log=self.stdout.write)
+            except RuntimeError as e:
+                raise CommandError(str(e))
+
+        if not is_partitioned():
+            self.stdout.write("calls_call is not partitioned; run with --convert first")
+            return
+        created = ensure_partitions(options['months_ahead'])
+        self.stdout.write(f"Created {len(created)} partitions")
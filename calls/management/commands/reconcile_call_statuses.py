@@ -0,0 +1,64 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from calls.reconciliation import reconcile_call_statuses
+from calls.recording_pipeline import requeue_stalled_recordings
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh calls stuck in initiated/ringing/in_progress from Twilio and "
+        "requeue recordings whose download or processing was dropped. "
+        "Run once (e.g. from cron) or with --interval as a long-lived worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-minutes', type=int, default=settings.CALL_RECONCILE_STALE_MINUTES,
+            help="Only reconcile calls not updated for this many minutes")
+        parser.add_argument(
+            '--limit', type=int, default=settings.CALL_RECONCILE_BATCH_SIZE,
+            help="Maximum number of calls per run")
+        parser.add_argument(
+            '--workers', type=int, default=settings.CALL_RECONCILE_MAX_WORKERS,
+            help="Maximum concurrent Twilio requests")
+        parser.add_argument(
+            '--rate', type=float, default=settings.CALL_RECONCILE_RATE_PER_SECOND,
+            help="Maximum Twilio requests started per second")
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Repeat every N seconds; 0 runs a single pass")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                summary = reconcile_call_statuses(
+                    stale_after=timedelta(minutes=options['stale_minutes']),
+                    limit=options['limit'],
+                    max_workers=options['workers'],
+                    rate_per_second=options['rate'],
+                )
+                self.stdout.write(
+                    f"Checked {summary['checked']} calls, "
+                    f"updated {summary['updated']}, errors {summary['errors']}"
+                )
+                requeued = requeue_stalled_recordings(limit=options['limit'])
+                self.stdout.write(
+                    f"Requeued {requeued['fetch']} recording downloads, "
+                    f"{requeued['transcribe']} transcriptions, "
+                    f"{requeued['summarize']} summaries"
+                )
+            except Exception:
+                if not options['interval']:
+                    raise
+                logger.error("Call status reconciliation failed", exc_info=True)
+
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
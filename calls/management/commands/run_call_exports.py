@@ -0,0 +1,41 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from calls.export import fail_stale_exports, run_pending_exports
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Write pending call exports (POST /calls/exports/) and fail the ones "
+        "whose runner died. Run once (e.g. from cron) or with --interval as a "
+        "long-lived worker; several runners can share the queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help="Maximum number of exports per pass")
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Repeat every N seconds; 0 runs a single pass")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                failed = fail_stale_exports()
+                written = run_pending_exports(limit=options['limit'])
+                if written or failed or not options['interval']:
+                    self.stdout.write(
+                        f"Wrote {written} exports, marked {failed} interrupted exports failed")
+            except Exception:
+                if not options['interval']:
+                    raise
+                logger.error("Running call exports failed", exc_info=True)
+
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0003_call_summary_content_call_summary_status_and_more'),
+        ('leads', '0002_lead_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(fields=['lead', '-start_time'], name='call_lead_start_idx'),
+        ),
+    ]
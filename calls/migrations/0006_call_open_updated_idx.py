@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0005_call_phone_e164'),
+        ('leads', '0003_lead_phone_e164'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(condition=models.Q(('status__in', ['initiated', 'ringing', 'in_progress'])), fields=['updated_at'], name='call_open_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0006_call_open_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='call',
+            name='recording_original_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the recording as downloaded, in bytes', null=True),
+        ),
+        migrations.AddField(
+            model_name='call',
+            name='recording_size',
+            field=models.BigIntegerField(blank=True, help_text='Size of the stored recording, in bytes', null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0007_call_recording_sizes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_ms', models.IntegerField(help_text='Offset from the start of the recording')),
+                ('end_ms', models.IntegerField()),
+                ('speaker', models.CharField(blank=True, max_length=20)),
+                ('text', models.TextField()),
+                ('call', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='calls.call')),
+            ],
+            options={
+                'ordering': ['call', 'start_ms'],
+                'indexes': [models.Index(fields=['call', 'start_ms'], name='segment_call_start_idx')],
+            },
+        ),
+    ]
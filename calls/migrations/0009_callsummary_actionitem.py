@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0008_transcriptsegment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActionItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.TextField()),
+                ('owner', models.CharField(blank=True, max_length=100)),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('done', 'Done')], default='open', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('call', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='action_items', to='calls.call')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='action_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['due_date', 'id'],
+                'indexes': [models.Index(fields=['user', 'status', 'due_date'], name='action_item_user_due_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CallSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.TextField(blank=True)),
+                ('key_points', models.JSONField(blank=True, default=list)),
+                ('decisions', models.JSONField(blank=True, default=list)),
+                ('interest_level', models.CharField(choices=[('unknown', 'Unknown'), ('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], default='unknown', max_length=10)),
+                ('next_step', models.TextField(blank=True)),
+                ('next_step_date', models.DateField(blank=True, null=True)),
+                ('additional_notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('call', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='structured_summary', to='calls.call')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='call_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'interest_level'], name='summary_user_interest_idx'), models.Index(fields=['user', 'next_step_date'], name='summary_user_next_step_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0009_callsummary_actionitem'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('operation', models.CharField(choices=[('transcription', 'Transcription'), ('summary', 'Summary')], max_length=20)),
+                ('model', models.CharField(max_length=50)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveBigIntegerField(default=0)),
+                ('completion_tokens', models.PositiveBigIntegerField(default=0)),
+                ('audio_seconds', models.FloatField(default=0)),
+                ('latency_ms', models.PositiveBigIntegerField(default=0, help_text='Total request latency in milliseconds')),
+                ('cost', models.DecimalField(decimal_places=6, default=0, help_text='Estimated cost in USD', max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('call', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ai_usage', to='calls.call')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ai_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='ai_usage_user_date_idx'), models.Index(fields=['date'], name='ai_usage_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'user', 'call', 'operation', 'model'), name='ai_usage_unique_key')],
+            },
+        ),
+    ]
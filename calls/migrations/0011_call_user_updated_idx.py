@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0010_aiusage'),
+        ('leads', '0004_lead_owner_updated_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='call_user_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0011_call_user_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallArchive',
+            fields=[
+                ('call', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive', serialize=False, to='calls.call')),
+                ('payload', models.BinaryField()),
+                ('payload_size', models.PositiveIntegerField(help_text='Uncompressed size in bytes')),
+                ('compressed_size', models.PositiveIntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='call',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, help_text='When the transcript and summary were moved to CallArchive', null=True),
+        ),
+    ]
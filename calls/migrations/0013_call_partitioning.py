@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0012_call_archive'),
+        ('leads', '0004_lead_owner_updated_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='actionitem',
+            name='call',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='action_items', to='calls.call'),
+        ),
+        migrations.AlterField(
+            model_name='aiusage',
+            name='call',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ai_usage', to='calls.call'),
+        ),
+        migrations.AlterField(
+            model_name='callarchive',
+            name='call',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='archive', serialize=False, to='calls.call'),
+        ),
+        migrations.AlterField(
+            model_name='callsummary',
+            name='call',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='structured_summary', to='calls.call'),
+        ),
+        migrations.AlterField(
+            model_name='transcriptsegment',
+            name='call',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='calls.call'),
+        ),
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(fields=['user', '-start_time'], name='call_user_start_idx'),
+        ),
+    ]
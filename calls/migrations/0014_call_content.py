@@ -0,0 +1,66 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CONTENT_FIELDS = ['transcribe_content', 'summary_content', 'notes']
+BATCH_SIZE = 1000
+
+
+def copy_content(apps, schema_editor):
+    Call = apps.get_model('calls', 'Call')
+    CallContent = apps.get_model('calls', 'CallContent')
+    calls = Call.objects.exclude(
+        transcribe_content='', summary_content='', notes='').values('id', *CONTENT_FIELDS)
+    batch = []
+    for call in calls.iterator(chunk_size=BATCH_SIZE):
+        batch.append(CallContent(call_id=call.pop('id'), **call))
+        if len(batch) == BATCH_SIZE:
+            CallContent.objects.bulk_create(batch)
+            batch = []
+    CallContent.objects.bulk_create(batch)
+
+
+def copy_content_back(apps, schema_editor):
+    Call = apps.get_model('calls', 'Call')
+    CallContent = apps.get_model('calls', 'CallContent')
+    calls = []
+    for content in CallContent.objects.iterator(chunk_size=BATCH_SIZE):
+        calls.append(Call(id=content.call_id, **{
+            name: getattr(content, name) for name in CONTENT_FIELDS}))
+        if len(calls) == BATCH_SIZE:
+            Call.objects.bulk_update(calls, CONTENT_FIELDS)
+            calls = []
+    Call.objects.bulk_update(calls, CONTENT_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0013_call_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallContent',
+            fields=[
+                ('call', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='content', serialize=False, to='calls.call')),
+                ('transcribe_content', models.TextField(blank=True)),
+                ('summary_content', models.TextField(blank=True)),
+                ('notes', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(copy_content, copy_content_back),
+        migrations.RemoveField(
+            model_name='call',
+            name='notes',
+        ),
+        migrations.RemoveField(
+            model_name='call',
+            name='summary_content',
+        ),
+        migrations.RemoveField(
+            model_name='call',
+            name='transcribe_content',
+        ),
+    ]
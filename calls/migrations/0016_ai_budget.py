@@ -0,0 +1,56 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:00
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+SUMMED_FIELDS = [
+    'request_count', 'error_count', 'prompt_tokens', 'completion_tokens',
+    'audio_seconds', 'latency_ms', 'cost',
+]
+
+
+def merge_duplicate_usage(apps, schema_editor):
+    """Fold ledger rows that the NULL-blind constraint let through into one"""
+    AIUsage = apps.get_model('calls', 'AIUsage')
+    duplicates = (
+        AIUsage.objects.values('date', 'user', 'call', 'operation', 'model')
+        .annotate(rows=models.Count('id')).filter(rows__gt=1)
+    )
+    for key in duplicates:
+        key.pop('rows')
+        first, *rest = AIUsage.objects.filter(**key).order_by('id')
+        for row in rest:
+            for field in SUMMED_FIELDS:
+                setattr(first, field, getattr(first, field) + getattr(row, field))
+        first.save()
+        AIUsage.objects.filter(pk__in=[row.pk for row in rest]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0015_call_export'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIBudget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=30, unique=True)),
+                ('balance', models.DecimalField(decimal_places=6, max_digits=12)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='aiusage',
+            name='ai_usage_unique_key',
+        ),
+        migrations.RunPython(merge_duplicate_usage, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='aiusage',
+            constraint=models.UniqueConstraint(models.F('date'), django.db.models.functions.comparison.Coalesce('user', 0), django.db.models.functions.comparison.Coalesce('call', 0), models.F('operation'), models.F('model'), name='ai_usage_unique_key'),
+        ),
+    ]
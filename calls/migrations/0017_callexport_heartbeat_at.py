@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calls', '0016_ai_budget'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='callexport',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
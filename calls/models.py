@@ -1,6 +1,38 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from leads.models import Lead
+from utils.phone import normalize_phone_number
+
+# Statuses that can still change on Twilio's side
+OPEN_CALL_STATUSES = ['initiated', 'ringing', 'in_progress']
+
+# Large text fields of a call, stored in CallContent
+CONTENT_FIELDS = ['transcribe_content', 'summary_content', 'notes']
+
+
+def content_property(name):
+    """
+    Attribute of `Call` backed by its `CallContent` row.
+
+    The row is loaded on first access (or taken from `select_related('content')`)
+    and written by `Call.save()` only when one of its fields was set.
+    """
+    def getter(call):
+        values = call.__dict__.setdefault('_content_values', {})
+        if name not in values:
+            content = call.get_content()
+            values.update({
+                field: getattr(content, field) if content else ''
+                for field in CONTENT_FIELDS if field not in values
+            })
+        return values[name]
+
+    def setter(call, value):
+        call.__dict__.setdefault('_content_values', {})[name] = value
+        call.__dict__.setdefault('_content_dirty', set()).add(name)
+
+    return property(getter, setter)
 
 
 class Call(models.Model):
@@ -19,6 +51,8 @@ class Call(models.Model):
     lead = models.ForeignKey(
         Lead, on_delete=models.CASCADE, related_name='calls', null=True, blank=True)
     phone_number = models.CharField(max_length=20)
+    phone_e164 = models.CharField(
+        max_length=16, blank=True, help_text="Normalized E.164 form of phone_number")
     twilio_call_sid = models.CharField(max_length=100, null=True, blank=True)
     twilio_recording_sid = models.CharField(
         max_length=100, null=True, blank=True)
@@ -30,6 +64,10 @@ class Call(models.Model):
         null=True, blank=True, help_text="Duration in seconds")
     recording_file_path = models.CharField(
         max_length=500, null=True, blank=True)
+    recording_original_size = models.BigIntegerField(
+        null=True, blank=True, help_text="Size of the recording as downloaded, in bytes")
+    recording_size = models.BigIntegerField(
+        null=True, blank=True, help_text="Size of the stored recording, in bytes")
     transcribe_status = models.CharField(
         max_length=20, default='pending',
         choices=[
@@ -39,7 +77,7 @@ class Call(models.Model):
             ('failed', 'Failed')
         ]
     )
-    transcribe_content = models.TextField(blank=True)
+    transcribe_content = content_property('transcribe_content')
     summary_status = models.CharField(
         max_length=20, default='pending',
         choices=[
@@ -49,17 +87,90 @@ class Call(models.Model):
             ('failed', 'Failed')
         ]
     )
-    summary_content = models.TextField(blank=True)
-    notes = models.TextField(blank=True)
+    summary_content = content_property('summary_content')
+    notes = content_property('notes')
+    archived_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When the transcript and summary were moved to CallArchive")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-start_time']
+        indexes = [
+            # Backs the "last call" subqueries used by the leads list
+            models.Index(fields=['lead', '-start_time'],
+                         name='call_lead_start_idx'),
+            models.Index(fields=['user', 'phone_e164', '-start_time'],
+                         name='call_user_phone_idx'),
+            # Call history, per monthly partition (calls/partitioning.py)
+            models.Index(fields=['user', '-start_time'],
+                         name='call_user_start_idx'),
+            # Change feed cursor (sync/changes.py)
+            models.Index(fields=['user', 'updated_at', 'id'],
+                         name='call_user_updated_idx'),
+            # Partial index: only open calls, scanned by the status reconciler
+            models.Index(fields=['updated_at'], name='call_open_updated_idx',
+                         condition=models.Q(status__in=OPEN_CALL_STATUSES)),
+        ]
 
     def __str__(self):
         return f"Call to {self.phone_number} - {self.status}"
 
+    def save(self, *args, **kwargs):
+        self.phone_e164 = normalize_phone_number(self.phone_number) or ''
+        update_fields = kwargs.get('update_fields')
+        dirty = self.__dict__.get('_content_dirty', set())
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            dirty = dirty & update_fields
+            update_fields -= set(CONTENT_FIELDS)
+            if 'phone_number' in update_fields:
+                update_fields.add('phone_e164')
+            kwargs['update_fields'] = update_fields
+        if not dirty:
+            # Saving only content fields doesn't touch the call row
+            if update_fields is None or update_fields:
+                super().save(*args, **kwargs)
+            return
+
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get('using')):
+            if update_fields is None or update_fields:
+                super().save(*args, **kwargs)
+            self._save_content(dirty, created=adding)
+        self._content_dirty -= dirty
+
+    def _save_content(self, fields, created):
+        values = {name: self._content_values[name] for name in fields}
+        if created or not CallContent.objects.filter(call_id=self.pk).update(**values):
+            content = CallContent.objects.create(call_id=self.pk, **values)
+            # Other fields default to empty, like the unsaved values
+            self._content_values = {
+                name: getattr(content, name) for name in CONTENT_FIELDS
+            } | self._content_values
+
+    def get_content(self):
+        """The CallContent row of this call, or None"""
+        if self.pk is None:
+            return None
+        try:
+            return self.content
+        except CallContent.DoesNotExist:
+            return None
+
+    def refresh_from_db(self, *args, **kwargs):
+        fields = kwargs.get('fields')
+        if fields is None or set(fields) & set(CONTENT_FIELDS):
+            self.__dict__.pop('_content_values', None)
+            self.__dict__.pop('_content_dirty', None)
+            self._state.fields_cache.pop('content', None)
+            if fields is not None:
+                kwargs['fields'] = [name for name in fields if name not in CONTENT_FIELDS]
+                if not kwargs['fields']:
+                    return
+        super().refresh_from_db(*args, **kwargs)
+
     @property
     def duration_formatted(self):
         """Return duration in MM:SS format"""
@@ -73,3 +184,244 @@ class Call(models.Model):
             except (ValueError, TypeError):
                 return "00:00"
         return "00:00"
+
+
+class CallContent(models.Model):
+    """
+    The transcript, summary and notes of a call.
+
+    Kept out of `Call` so status updates rewrite a narrow row and call lists
+    don't read the text unless they ask for it. Read and written through the
+    attributes of the same names on `Call`.
+    """
+    call = models.OneToOneField(
+        Call, on_delete=models.CASCADE, primary_key=True, related_name='content',
+        db_constraint=False)
+    transcribe_content = models.TextField(blank=True)
+    summary_content = models.TextField(blank=True)
+    notes = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Content of call {self.call_id}"
+
+
+class TranscriptSegment(models.Model):
+    """
+    A timestamped piece of a call transcript, optionally attributed to a speaker.
+    """
+    call = models.ForeignKey(
+        Call, on_delete=models.CASCADE, related_name='segments', db_constraint=False)
+    start_ms = models.IntegerField(help_text="Offset from the start of the recording")
+    end_ms = models.IntegerField()
+    speaker = models.CharField(max_length=20, blank=True)
+    text = models.TextField()
+
+    class Meta:
+        ordering = ['call', 'start_ms']
+        indexes = [
+            models.Index(fields=['call', 'start_ms'],
+                         name='segment_call_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"Call {self.call_id} @ {self.start_ms}ms: {self.text[:40]}"
+
+
+class CallSummary(models.Model):
+    """
+    Structured fields extracted from a call transcript by the summarizer.
+    """
+    INTEREST_LEVEL_CHOICES = [
+        ('unknown', 'Unknown'),
+        ('low', 'Low'),
+        ('medium', 'Medium'),
+        ('high', 'High'),
+    ]
+
+    call = models.OneToOneField(
+        Call, on_delete=models.CASCADE, related_name='structured_summary',
+        db_constraint=False)
+    # Denormalized from call.user so per-user queries are single index scans
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='call_summaries')
+    purpose = models.TextField(blank=True)
+    key_points = models.JSONField(default=list, blank=True)
+    decisions = models.JSONField(default=list, blank=True)
+    interest_level = models.CharField(
+        max_length=10, choices=INTEREST_LEVEL_CHOICES, default='unknown')
+    next_step = models.TextField(blank=True)
+    next_step_date = models.DateField(null=True, blank=True)
+    additional_notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'interest_level'],
+                         name='summary_user_interest_idx'),
+            models.Index(fields=['user', 'next_step_date'],
+                         name='summary_user_next_step_idx'),
+        ]
+
+    def __str__(self):
+        return f"Summary of call {self.call_id} ({self.interest_level} interest)"
+
+
+class ActionItem(models.Model):
+    """
+    A follow-up task extracted from a call summary.
+    """
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('done', 'Done'),
+    ]
+
+    call = models.ForeignKey(
+        Call, on_delete=models.CASCADE, related_name='action_items', db_constraint=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='action_items')
+    description = models.TextField()
+    owner = models.CharField(max_length=100, blank=True)
+    due_date = models.DateField(null=True, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default='open')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['due_date', 'id']
+        indexes = [
+            models.Index(fields=['user', 'status', 'due_date'],
+                         name='action_item_user_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.description[:50]} ({self.status})"
+
+
+class AIUsage(models.Model):
+    """
+    Aggregated ledger of AI provider usage.
+
+    One row per day, user, call, operation and model; each request adds
+    its tokens, audio seconds, latency and cost to the matching row.
+    """
+    OPERATION_CHOICES = [
+        ('transcription', 'Transcription'),
+        ('summary', 'Summary'),
+    ]
+
+    date = models.DateField()
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, related_name='ai_usage', null=True, blank=True)
+    # Kept when the call is deleted so spend history stays complete
+    call = models.ForeignKey(
+        Call, on_delete=models.SET_NULL, related_name='ai_usage', null=True, blank=True,
+        db_constraint=False)
+    operation = models.CharField(max_length=20, choices=OPERATION_CHOICES)
+    model = models.CharField(max_length=50)
+    request_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    audio_seconds = models.FloatField(default=0)
+    latency_ms = models.PositiveBigIntegerField(
+        default=0, help_text="Total request latency in milliseconds")
+    cost = models.DecimalField(
+        max_digits=12, decimal_places=6, default=0, help_text="Estimated cost in USD")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # NULLs never collide in a unique index, so requests without a
+            # user or call are keyed on 0 instead
+            models.UniqueConstraint(
+                'date', Coalesce('user', 0), Coalesce('call', 0), 'operation', 'model',
+                name='ai_usage_unique_key'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date'], name='ai_usage_user_date_idx'),
+            models.Index(fields=['date'], name='ai_usage_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.operation} {self.model}: ${self.cost}"
+
+
+class AIBudget(models.Model):
+    """
+    Shared state of an AI spend budget (calls/ai_usage.py).
+
+    One row per scope ("global" or "user:<id>") holding the token bucket
+    balance in USD as of `updated_at`.
+    """
+    scope = models.CharField(max_length=30, unique=True)
+    balance = models.DecimalField(max_digits=12, decimal_places=6)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.scope}: ${self.balance}"
+
+
+class CallArchive(models.Model):
+    """
+    Cold storage for the large payloads of an old call.
+
+    `payload` is the zlib-compressed JSON of the transcript, summary and
+    transcript segments that `calls/archive.py` removed from the hot tables.
+    """
+    call = models.OneToOneField(
+        Call, on_delete=models.CASCADE, primary_key=True, related_name='archive',
+        db_constraint=False)
+    payload = models.BinaryField()
+    payload_size = models.PositiveIntegerField(help_text="Uncompressed size in bytes")
+    compressed_size = models.PositiveIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archive of call {self.call_id} ({self.compressed_size} bytes)"
+
+
+class CallExport(models.Model):
+    """
+    An export of a user's calls written to a file by
+    `manage.py run_call_exports` (calls/export.py), for ranges too large to
+    stream in one request.
+    """
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+        ('parquet', 'Parquet'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='call_exports')
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    filters = models.JSONField(
+        default=dict, blank=True, help_text="Query parameters of the export")
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default='pending')
+    file_path = models.CharField(max_length=500, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    row_count = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Refreshed by the runner while it writes the file
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'],
+                         name='call_export_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_file_format_display()} export {self.id} ({self.status})"
@@ -0,0 +1,255 @@
+"""
+Monthly range partitioning of `calls_call` on `start_time` (PostgreSQL).
+
+Calls are mostly read by recency: the history, the archival mover and the
+reports all filter on `start_time`. With one partition per month, those
+queries only touch the partitions in range (partition pruning), old months
+can be vacuumed, backed up or dropped on their own, and the indexes of the
+current month stay small enough to be cached.
+
+- `ensure_partitions()` creates the partitions from the current month to
+  `CALL_PARTITION_MONTHS_AHEAD` months ahead. Run it daily
+  (`manage.py partition_calls`); rows outside every partition land in
+  `calls_call_default`.
+- `convert_to_partitioned()` turns an existing `calls_call` into a
+  partitioned table (`manage.py partition_calls --convert`). Rows are
+  copied in batches while the application keeps running; only the final
+  catch-up and table swap hold a lock on `calls_call`.
+
+A partitioned table's primary key must include the partition key, so the
+key becomes `(id, start_time)`. Django still treats `id` as the primary
+key, but other tables can't have a foreign key constraint on it: the
+relations to `Call` use `db_constraint=False` and deletes cascade in the
+ORM. On other databases everything here is a no-op.
+"""
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Call
+
+logger = logging.getLogger(__name__)
+
+TABLE = Call._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+NEW_TABLE = f'{TABLE}_partitioned'
+OLD_TABLE = f'{TABLE}_unpartitioned'
+# Suffix of indexes and constraints built on the new table before the swap
+PENDING_SUFFIX = '_p'
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def partition_months(first, last):
+    """Month starts from the month of `first` to the month of `last`"""
+    month, last = month_start(first), month_start(last)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def create_partition_sql(parent, month):
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{parent}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def is_partitioned(table=TABLE):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+        return cursor.fetchone() is not None
+
+
+def existing_partitions(parent=TABLE):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)", [parent])
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _create_partitions(parent, months):
+    existing = existing_partitions(parent)
+    created = []
+    for month in months:
+        if partition_name(month) in existing:
+            continue
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(create_partition_sql(parent, month))
+        except Exception as e:
+            # Typically rows for that month already sit in the default
+            # partition; they have to be moved before it can be created
+            logger.error(f"Could not create partition {partition_name(month)}: {e}")
+            continue
+        created.append(partition_name(month))
+    return created
+
+
+def ensure_partitions(months_ahead=None):
+    """
+    Create the missing partitions up to `months_ahead` months from now.
+
+    Returns:
+        list: Names of the partitions created.
+    """
+    if not is_partitioned():
+        return []
+    months_ahead = settings.CALL_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    now = timezone.now()
+    created = _create_partitions(TABLE, partition_months(now, add_months(now, months_ahead)))
+    if created:
+        logger.info(f"Created call partitions: {', '.join(created)}")
+    return created
+
+
+def _copy_definitions(cursor):
+    """
+    Create the indexes and foreign keys of the old table on the new one,
+    under pending names.
+    """
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+        [TABLE, f'{TABLE}_pkey'])
+    for name, definition in cursor.fetchall():
+        definition = definition.replace(f' INDEX {name} ON ', f' INDEX {name}{PENDING_SUFFIX} ON ', 1)
+        definition = definition.replace(f'.{TABLE} USING', f'.{NEW_TABLE} USING', 1)
+        cursor.execute(definition)
+
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [TABLE])
+    for name, definition in cursor.fetchall():
+        cursor.execute(
+            f'ALTER TABLE "{NEW_TABLE}" ADD CONSTRAINT "{name}{PENDING_SUFFIX}" {definition}')
+
+
+def _swap_names(cursor):
+    cursor.execute(
+        "SELECT indexname FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+        [TABLE, f'{TABLE}_pkey'])
+    index_names = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'", [TABLE])
+    constraint_names = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD_TABLE}"')
+    cursor.execute(f'ALTER TABLE "{NEW_TABLE}" RENAME TO "{TABLE}"')
+    cursor.execute(f'ALTER INDEX "{TABLE}_pkey" RENAME TO "{TABLE}_pkey_old"')
+    cursor.execute(f'ALTER INDEX "{NEW_TABLE}_pkey" RENAME TO "{TABLE}_pkey"')
+    for name in index_names:
+        cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name}_old"')
+        cursor.execute(f'ALTER INDEX "{name}{PENDING_SUFFIX}" RENAME TO "{name}"')
+    for name in constraint_names:
+        cursor.execute(f'ALTER TABLE "{OLD_TABLE}" RENAME CONSTRAINT "{name}" TO "{name}_old"')
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" RENAME CONSTRAINT "{name}{PENDING_SUFFIX}" TO "{name}"')
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+        f'(SELECT COALESCE(MAX(id), 0) + 1 FROM "{TABLE}"), false)', [TABLE])
+
+
+def convert_to_partitioned(batch_size=None, log=logger.info):
+    """
+    Copy `calls_call` into a new table partitioned by month and swap them.
+
+    Rows are copied in id order, `batch_size` per transaction. Then, with
+    `calls_call` locked, rows changed since the copy started are copied
+    again (by `updated_at`), rows deleted since then are removed (by their
+    sync tombstones) and the tables are swapped. The old table is kept as
+    `calls_call_unpartitioned` until it is dropped by hand.
+
+    Changes that don't touch `updated_at` are not caught up, so don't run
+    `archive_calls` during a conversion.
+    """
+    from sync.models import Tombstone
+
+    if connection.vendor != 'postgresql':
+        raise RuntimeError("Call partitioning needs PostgreSQL")
+    if is_partitioned():
+        log(f"{TABLE} is already partitioned")
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE confrelid = to_regclass(%s)", [TABLE])
+        referencing = [row[0] for row in cursor.fetchall()]
+    if referencing:
+        # They would follow the old table through the rename
+        raise RuntimeError(
+            f"Foreign keys still reference {TABLE}: {', '.join(referencing)}. "
+            "Apply the calls migrations first.")
+    batch_size = batch_size or settings.CALL_PARTITION_COPY_BATCH_SIZE
+    started_at = timezone.now()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN(start_time) FROM "{TABLE}"')
+        first = cursor.fetchone()[0] or started_at
+        cursor.execute(f'DROP TABLE IF EXISTS "{NEW_TABLE}"')
+        cursor.execute(
+            f'CREATE TABLE "{NEW_TABLE}" (LIKE "{TABLE}" INCLUDING DEFAULTS '
+            'INCLUDING IDENTITY INCLUDING CONSTRAINTS INCLUDING STORAGE) '
+            'PARTITION BY RANGE (start_time)')
+        cursor.execute(f'ALTER TABLE "{NEW_TABLE}" ADD PRIMARY KEY (id, start_time)')
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{NEW_TABLE}" DEFAULT')
+    months = partition_months(
+        first, add_months(started_at, settings.CALL_PARTITION_MONTHS_AHEAD))
+    _create_partitions(NEW_TABLE, months)
+    log(f"Created {NEW_TABLE} with {len(months)} monthly partitions")
+
+    last_id = 0
+    copied = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO "{NEW_TABLE}" SELECT * FROM "{TABLE}" '
+                f'WHERE id > %s ORDER BY id LIMIT %s RETURNING id', [last_id, batch_size])
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            break
+        last_id = max(ids)
+        copied += len(ids)
+        log(f"Copied {copied} calls")
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        _copy_definitions(cursor)
+    log("Created indexes and foreign keys")
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+        columns = [field.column for field in Call._meta.concrete_fields]
+        updates = ', '.join(f'"{column}" = EXCLUDED."{column}"' for column in columns)
+        cursor.execute(
+            f'INSERT INTO "{NEW_TABLE}" SELECT * FROM "{TABLE}" '
+            f'WHERE id > %s OR updated_at >= %s '
+            f'ON CONFLICT (id, start_time) DO UPDATE SET {updates}', [last_id, started_at])
+        log(f"Caught up {cursor.rowcount} calls changed during the copy")
+        cursor.execute(
+            f'DELETE FROM "{NEW_TABLE}" WHERE id IN ('
+            f'SELECT object_id FROM "{Tombstone._meta.db_table}" '
+            "WHERE model = 'call' AND deleted_at >= %s)", [started_at])
+        _swap_names(cursor)
+    log(f"{TABLE} is now partitioned; drop {OLD_TABLE} once verified")
@@ -0,0 +1,141 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from monitoring.tracing import span
+from utils.rate_limit import TokenBucket
+from .models import Call, OPEN_CALL_STATUSES
+from .recording_pipeline import on_call_completed
+from .twilio_service import TwilioService, normalize_call_status
+
+logger = logging.getLogger(__name__)
+
+RECONCILED_FIELDS = ['status', 'duration', 'end_time', 'updated_at']
+# The reconciled fields a Twilio status result can change
+STATUS_FIELDS = ['status', 'duration', 'end_time']
+
+
+def status_snapshot(call):
+    """Values of `STATUS_FIELDS`, to tell whether a status result changed `call`"""
+    return tuple(getattr(call, field) for field in STATUS_FIELDS)
+
+
+def find_stale_calls(stale_after, limit):
+    """
+    Return open calls that haven't been updated for `stale_after`.
+
+    Served by the partial `call_open_updated_idx` index, so the scan only
+    touches calls that are still initiated/ringing/in progress.
+    """
+    cutoff = timezone.now() - stale_after
+    return list(
+        Call.objects.filter(
+            status__in=OPEN_CALL_STATUSES,
+            updated_at__lt=cutoff,
+            twilio_call_sid__isnull=False,
+        )
+        .exclude(twilio_call_sid='')
+        .order_by('updated_at')
+        .only('id', 'twilio_call_sid', 'status', 'duration', 'end_time',
+              'recording_file_path', 'updated_at')[:limit]
+    )
+
+
+def apply_twilio_status(call, result, now):
+    """
+    Copy a `TwilioService.get_call_status` result onto `call`.
+
+    Returns:
+        bool: True if the status changed.
+    """
+    new_status = normalize_call_status(result['status'])
+    changed = new_status != call.status
+    call.status = new_status
+
+    if result.get('duration'):
+        try:
+            call.duration = int(result['duration'])
+        except (ValueError, TypeError):
+            pass
+    if new_status not in OPEN_CALL_STATUSES and not call.end_time:
+        call.end_time = result.get('end_time') or now
+
+    # Touch every fetched row so long-running calls are re-checked only
+    # once per stale window instead of on every run
+    call.updated_at = now
+    return changed
+
+
+def reconcile_call_statuses(stale_after=None, limit=None, max_workers=None,
+                            rate_per_second=None, twilio_service=None):
+    """
+    Refresh the status of stale open calls from Twilio in one batch.
+
+    Statuses are fetched concurrently with at most `max_workers` requests
+    in flight and at most `rate_per_second` requests started per second,
+    then written back with a single `bulk_update` of the calls that changed.
+    Writes only apply to calls that are still open, so a call ended (by
+    `end_call`, a webhook or status polling) during the run is left alone.
+
+    Returns:
+        dict: Counts of `checked`, `updated` (status changed) and `errors`.
+    """
+    stale_after = stale_after or timedelta(
+        minutes=settings.CALL_RECONCILE_STALE_MINUTES)
+    limit = limit or settings.CALL_RECONCILE_BATCH_SIZE
+    max_workers = max_workers or settings.CALL_RECONCILE_MAX_WORKERS
+    rate_per_second = rate_per_second or settings.CALL_RECONCILE_RATE_PER_SECOND
+
+    calls = find_stale_calls(stale_after, limit)
+    summary = {'checked': len(calls), 'updated': 0, 'errors': 0}
+    if not calls:
+        return summary
+
+    twilio_service = twilio_service or TwilioService()
+    limiter = TokenBucket(rate_per_second)
+
+    def fetch(call):
+        limiter.acquire()
+        return twilio_service.get_call_status(call.twilio_call_sid)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(fetch, calls))
+
+    now = timezone.now()
+    changed = []
+    unchanged_ids = []
+    completed = []
+    for call, result in zip(calls, results):
+        if not result['success']:
+            summary['errors'] += 1
+            logger.warning(
+                f"Could not reconcile call {call.id}: {result['error']}")
+            continue
+        before = status_snapshot(call)
+        if apply_twilio_status(call, result, now):
+            summary['updated'] += 1
+            if call.status == 'completed':
+                completed.append(call)
+        if status_snapshot(call) != before:
+            changed.append(call)
+        else:
+            unchanged_ids.append(call.id)
+
+    open_calls = Call.objects.filter(status__in=OPEN_CALL_STATUSES)
+    with span('db.bulk_update_calls', rows=len(changed)):
+        open_calls.bulk_update(changed, RECONCILED_FIELDS, batch_size=500)
+        # Only touched, so they aren't fetched again until stale
+        open_calls.filter(pk__in=unchanged_ids).update(updated_at=now)
+
+    # Skip calls that another writer ended differently during the run
+    still_completed = set(Call.objects.filter(
+        pk__in=[call.id for call in completed], status='completed').values_list('id', flat=True))
+    for call in completed:
+        if call.id in still_completed:
+            on_call_completed(call)
+
+    logger.info("Call status reconciliation finished", extra=summary)
+    return summary
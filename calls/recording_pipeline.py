@@ -0,0 +1,398 @@
+"""
+Background pipeline that fetches call recordings and processes them.
+
+Completed calls enqueue a fetch task. The task asks Twilio for the call's
+recording and, while Twilio is still processing it, retries with
+exponential backoff. Once downloaded, transcription and summary generation
+are chained on a separate pool. Twilio's recording status callback (see
+`CallViewSet.recording_status_webhook`) can skip the polling entirely by
+enqueueing the download with a known recording SID.
+
+Tasks run on in-process thread pools with bounded concurrency. With
+`RECORDING_PIPELINE_EAGER` set (tests), everything runs inline instead.
+
+The end-call path, status polling, the reconciler and the webhook can all
+enqueue the same call, so every task first claims its call with a
+conditional UPDATE (`transcribe_status` or `summary_status` from "pending"
+to "processing") and returns if another task holds it. A task waiting to
+retry releases its claim. Queued and delayed tasks live in process memory
+and are lost when a worker is recycled; `requeue_stalled_recordings` (run
+by `manage.py reconcile_call_statuses`) enqueues them again.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from monitoring.tracing import span
+from .ai_service import AIService
+from .audio_processing import process_downloaded_recording
+from .models import Call
+from .summaries import generate_structured_summary
+from .transcripts import store_segments, transcribe_segments
+from .twilio_service import TwilioService
+
+logger = logging.getLogger(__name__)
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(name, max_workers):
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f'recording-{name}')
+        return _executors[name]
+
+
+def _run_task(fn, *args):
+    """
+    Run a pipeline task with a fresh DB connection, closed when the task
+    finishes so idle pool threads don't hold one
+    """
+    close_old_connections()
+    try:
+        fn(*args)
+    except Exception:
+        logger.error(f"Recording pipeline task {fn.__name__} failed", exc_info=True)
+    finally:
+        connection.close()
+
+
+def _submit(pool, fn, *args, delay=0):
+    if settings.RECORDING_PIPELINE_EAGER:
+        fn(*args)
+        return
+
+    if pool == 'fetch':
+        executor = _get_executor(pool, settings.RECORDING_FETCH_MAX_WORKERS)
+    else:
+        executor = _get_executor(pool, settings.RECORDING_PROCESS_MAX_WORKERS)
+
+    if delay:
+        # Wait on a timer instead of a pool thread, so backoff doesn't
+        # consume download slots
+        timer = threading.Timer(delay, executor.submit, args=(_run_task, fn, *args))
+        timer.daemon = True
+        timer.start()
+    else:
+        executor.submit(_run_task, fn, *args)
+
+
+def shutdown(wait=True):
+    """Stop the pipeline pools, optionally waiting for in-flight tasks"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+def backoff_delay(attempt):
+    """Delay in seconds before retry number `attempt` (1-based), with jitter"""
+    delay = settings.RECORDING_FETCH_INITIAL_DELAY * (2 ** (attempt - 1))
+    delay = min(delay, settings.RECORDING_FETCH_MAX_DELAY)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _unfetched(call_id):
+    """The call `call_id` if it has a Twilio call but no downloaded recording yet"""
+    return Call.objects.filter(
+        Q(recording_file_path__isnull=True) | Q(recording_file_path=''),
+        pk=call_id, twilio_call_sid__isnull=False,
+    ).exclude(twilio_call_sid='')
+
+
+def enqueue_recording_fetch(call_id, recording_sid=None, retry_failed=False):
+    """
+    Schedule the recording of a completed call to be downloaded.
+
+    The task is submitted once the current transaction commits, so it
+    never sees a call that was rolled back. With `retry_failed` (Twilio's
+    recording callback), a call whose earlier fetch gave up is fetched again.
+
+    Returns:
+        bool: True if a fetch was queued, False if the recording is already
+        downloaded or being downloaded, or the pipeline is disabled.
+    """
+    if not settings.RECORDING_PIPELINE_ENABLED:
+        return False
+
+    unfetched = _unfetched(call_id)
+    if retry_failed:
+        unfetched.filter(transcribe_status='failed').update(
+            transcribe_status='pending', updated_at=timezone.now())
+    if not unfetched.filter(transcribe_status='pending').exists():
+        logger.info(f"Recording of call {call_id} is already fetched or being fetched")
+        return False
+
+    if settings.RECORDING_PIPELINE_EAGER:
+        fetch_recording(call_id, 1, recording_sid)
+        return True
+
+    transaction.on_commit(
+        lambda: _submit('fetch', fetch_recording, call_id, 1, recording_sid))
+    return True
+
+
+def enqueue_recording_processing(call_id, summary_only=False):
+    """
+    Schedule transcription and summary generation for a downloaded recording.
+
+    With `summary_only`, only the summary of the stored transcript is
+    generated again.
+    """
+    if settings.RECORDING_PIPELINE_EAGER:
+        process_recording(call_id, summary_only)
+        return
+
+    transaction.on_commit(
+        lambda: _submit('process', process_recording, call_id, summary_only))
+
+
+def claim_call(call_id, status_field):
+    """
+    Atomically move `status_field` of a call from "pending" to "processing".
+
+    Returns:
+        bool: True if this task now holds the call.
+    """
+    return bool(Call.objects.filter(pk=call_id, **{status_field: 'pending'}).update(
+        **{status_field: 'processing', 'updated_at': timezone.now()}))
+
+
+def release_call(call_id, status_field, status='pending'):
+    Call.objects.filter(pk=call_id, **{status_field: 'processing'}).update(
+        **{status_field: status, 'updated_at': timezone.now()})
+
+
+def on_call_completed(call):
+    """
+    Hook for every place that moves a call to `completed`.
+    """
+    if call.status == 'completed' and call.twilio_call_sid and not call.recording_file_path:
+        enqueue_recording_fetch(call.id)
+
+
+def download_call_recording(call, twilio_service=None, recording_sid=None):
+    """
+    Download the Twilio recording of `call` into the recordings directory.
+
+    Returns:
+        dict: `{'success': True}` once the file is stored, otherwise
+        `{'success': False, 'error': ..., 'not_ready': bool}` where
+        `not_ready` means Twilio hasn't finished processing the recording.
+    """
+    with span('recording.download', **{'call.id': call.id}) as current:
+        twilio_service = twilio_service or TwilioService()
+
+        if not recording_sid:
+            recordings_result = twilio_service.get_call_recordings(call.twilio_call_sid)
+            if not recordings_result['success']:
+                return {
+                    'success': False,
+                    'not_ready': False,
+                    'error': f"Failed to fetch recordings: {recordings_result['error']}"
+                }
+
+            # Use the first finished recording (there should typically be only one)
+            recordings = [
+                recording for recording in recordings_result['recordings']
+                if recording.get('status') in (None, 'completed')
+            ]
+            if not recordings:
+                current.set_attribute('not_ready', True)
+                return {
+                    'success': False,
+                    'not_ready': True,
+                    'error': "No recordings found for this call. Recording may still be processing."
+                }
+            recording_sid = recordings[0]['sid']
+
+        # Generate filename: phonenumber_timestamp.mp3
+        timestamp = int(time.time())
+        filename = f"{call.phone_number.replace('+', '')}_{timestamp}.mp3"
+        file_path = os.path.join('recordings', filename)
+        full_path = os.path.join(os.getcwd(), file_path)
+
+        download_result = twilio_service.download_recording(recording_sid, full_path)
+        if not download_result['success']:
+            return {
+                'success': False,
+                'not_ready': False,
+                'error': f"Failed to download recording: {download_result['error']}"
+            }
+
+        call.twilio_recording_sid = recording_sid
+        call.recording_file_path = file_path
+        if not call.duration and download_result.get('duration'):
+            call.duration = int(download_result['duration'])
+
+        # Compress before the file is stored for good and sent to Whisper
+        process_downloaded_recording(call, full_path)
+        call.save(update_fields=[
+            'twilio_recording_sid', 'recording_file_path', 'duration',
+            'recording_original_size', 'recording_size', 'updated_at'])
+        current.set_attribute('twilio.recording_sid', recording_sid)
+        current.set_attribute('bytes', call.recording_size)
+        return {'success': True}
+
+
+def fetch_recording(call_id, attempt=1, recording_sid=None):
+    """
+    Pipeline task: download a call's recording, retrying while Twilio is
+    still processing it, then chain transcription.
+    """
+    with span('pipeline.fetch_recording', **{'call.id': call_id, 'attempt': attempt}):
+        # Not yet fetched (e.g. by the webhook or a manual download), and
+        # not being fetched by another task
+        if not _unfetched(call_id).exists() or not claim_call(call_id, 'transcribe_status'):
+            logger.info(f"Skipping fetch of call {call_id}: already fetched or being fetched")
+            return
+        call = Call.objects.get(pk=call_id)
+
+        try:
+            result = download_call_recording(call, recording_sid=recording_sid)
+        except Exception:
+            release_call(call_id, 'transcribe_status')
+            raise
+        if result['success']:
+            logger.info(f"Recording fetched for call {call_id} on attempt {attempt}")
+            release_call(call_id, 'transcribe_status')
+            enqueue_recording_processing(call_id)
+            return
+
+        if attempt >= settings.RECORDING_FETCH_MAX_ATTEMPTS:
+            logger.warning(
+                f"Giving up fetching recording for call {call_id} after "
+                f"{attempt} attempts: {result['error']}")
+            release_call(call_id, 'transcribe_status', status='failed')
+            return
+
+        # Another task may take over while this one waits
+        release_call(call_id, 'transcribe_status')
+
+        delay = backoff_delay(attempt)
+        logger.info(
+            f"Recording for call {call_id} not available yet, retrying in {delay:.1f}s")
+        _submit('fetch', fetch_recording, call_id, attempt + 1, recording_sid, delay=delay)
+
+
+def _defer_processing(call, result, summary_only, attempt):
+    """
+    Retry a recording whose AI request was throttled by the usage budget,
+    once the budget has refilled.
+    """
+    if attempt >= settings.AI_BUDGET_MAX_DEFERRALS:
+        logger.warning(
+            f"Giving up processing recording for call {call.id} after "
+            f"{attempt} throttled attempts")
+        if summary_only:
+            call.summary_status = 'failed'
+        else:
+            call.transcribe_status = 'failed'
+        call.save(update_fields=['summary_status', 'transcribe_status', 'updated_at'])
+        return
+
+    delay = max(result.get('retry_after') or 0, backoff_delay(attempt))
+    logger.info(f"AI budget exhausted, processing call {call.id} again in {delay:.1f}s")
+    _submit('process', process_recording, call.id, summary_only, attempt + 1, delay=delay)
+
+
+def process_recording(call_id, summary_only=False, attempt=1):
+    """
+    Pipeline task: transcribe a downloaded recording and summarize it.
+
+    With `summary_only`, the stored transcript is summarized again (used
+    when only the summary request was throttled).
+    """
+    with span('pipeline.process_recording', **{'call.id': call_id, 'attempt': attempt}):
+        if not claim_call(call_id, 'summary_status' if summary_only else 'transcribe_status'):
+            logger.info(f"Call {call_id} is already being processed")
+            return
+        call = Call.objects.get(pk=call_id)
+        ai_service = AIService(user=call.user_id, call=call)
+
+        if not summary_only:
+            # Transcribe audio into timestamped segments
+            full_path = os.path.join(os.getcwd(), call.recording_file_path)
+            transcription_result = transcribe_segments(ai_service, full_path)
+
+            if transcription_result.get('throttled'):
+                call.transcribe_status = 'pending'
+                call.save(update_fields=['transcribe_status', 'updated_at'])
+                _defer_processing(call, transcription_result, False, attempt)
+                return
+            if not transcription_result['success']:
+                call.transcribe_status = 'failed'
+                call.save(update_fields=['transcribe_status', 'updated_at'])
+                return
+
+            store_segments(call, transcription_result['segments'])
+
+        # Generate structured summary and action items
+        summary_result = generate_structured_summary(call, ai_service)
+        if summary_result.get('throttled'):
+            _defer_processing(call, summary_result, True, attempt)
+
+
+def requeue_stalled_recordings(stale_after=None, limit=None):
+    """
+    Enqueue again the pipeline work of completed calls that was dropped:
+    tasks lost with a recycled worker, or claims left "processing" by a
+    task that was killed. Claims older than `stale_after` are released.
+
+    Returns:
+        dict: Counts of `fetch`, `transcribe` and `summarize` tasks queued.
+    """
+    summary = {'fetch': 0, 'transcribe': 0, 'summarize': 0}
+    if not settings.RECORDING_PIPELINE_ENABLED:
+        return summary
+    stale_after = stale_after or timedelta(minutes=settings.RECORDING_PIPELINE_STALE_MINUTES)
+    limit = limit or settings.CALL_RECONCILE_BATCH_SIZE
+    cutoff = timezone.now() - stale_after
+    stalled = Call.objects.filter(
+        status='completed', updated_at__lt=cutoff, archived_at__isnull=True)
+
+    transcripts = list(
+        stalled.filter(transcribe_status__in=['pending', 'processing'])
+        .filter(Q(twilio_call_sid__gt='') | Q(recording_file_path__gt=''))
+        .order_by('updated_at')
+        .values_list('id', 'recording_file_path')[:limit]
+    )
+    summaries = list(
+        stalled.filter(transcribe_status='completed',
+                       summary_status__in=['pending', 'processing'])
+        .order_by('updated_at')
+        .values_list('id', flat=True)[:limit]
+    )
+    # Only claims that are still stale: a task may have finished meanwhile
+    stalled.filter(pk__in=[call_id for call_id, _ in transcripts],
+                   transcribe_status='processing').update(
+        transcribe_status='pending', updated_at=timezone.now())
+    stalled.filter(pk__in=summaries, summary_status='processing').update(
+        summary_status='pending', updated_at=timezone.now())
+
+    for call_id, recording_file_path in transcripts:
+        if recording_file_path:
+            enqueue_recording_processing(call_id)
+            summary['transcribe'] += 1
+        else:
+            enqueue_recording_fetch(call_id)
+            summary['fetch'] += 1
+    for call_id in summaries:
+        enqueue_recording_processing(call_id, summary_only=True)
+        summary['summarize'] += 1
+
+    if any(summary.values()):
+        logger.info("Requeued stalled recording pipeline work", extra=summary)
+    return summary
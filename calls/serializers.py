@@ -1,26 +1,157 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Call
+from utils.pagination import MAX_PAGE_SIZE
+from utils.phone import normalize_phone_number
+from .archive import load_archived
+from .export import parquet_available
+from .models import CONTENT_FIELDS, ActionItem, Call, CallExport, CallSummary, TranscriptSegment
 
 
 class CallSerializer(serializers.ModelSerializer):
     duration_formatted = serializers.ReadOnlyField()
     lead_name = serializers.SerializerMethodField()
+    # Stored in CallContent, see Call.transcribe_content
+    transcribe_content = serializers.CharField(required=False, allow_blank=True)
+    summary_content = serializers.CharField(required=False, allow_blank=True)
+    notes = serializers.CharField(required=False, allow_blank=True)
 
     class Meta:
         model = Call
         fields = [
-            'id', 'phone_number', 'twilio_call_sid', 'twilio_recording_sid', 'status',
-            'start_time', 'end_time', 'duration', 'duration_formatted',
-            'recording_file_path', 'transcribe_status', 'transcribe_content',
-            'summary_status', 'summary_content', 'notes', 'created_at', 'updated_at',
-            'lead_name'
+            'id', 'phone_number', 'phone_e164', 'twilio_call_sid', 'twilio_recording_sid',
+            'status', 'start_time', 'end_time', 'duration', 'duration_formatted',
+            'recording_file_path', 'recording_original_size', 'recording_size',
+            'transcribe_status', 'transcribe_content',
+            'summary_status', 'summary_content', 'notes', 'archived_at',
+            'created_at', 'updated_at', 'lead_name'
         ]
-        read_only_fields = ['id', 'created_at',
-                            'updated_at', 'twilio_call_sid', 'twilio_recording_sid']
+        read_only_fields = ['id', 'phone_e164', 'created_at',
+                            'updated_at', 'twilio_call_sid', 'twilio_recording_sid',
+                            'recording_original_size', 'recording_size', 'archived_at']
 
     def get_lead_name(self, obj):
         return obj.lead.name if obj.lead else None
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Single calls fetch their archived text through; lists leave it out
+        # rather than decompress one archive per row
+        if instance.archived_at and self.parent is None:
+            payload = load_archived(instance)
+            if payload:
+                data['transcribe_content'] = payload['transcribe_content']
+                data['summary_content'] = payload['summary_content']
+        return data
+
+
+class CallListSerializer(CallSerializer):
+    # Lists leave out the transcript, summary and notes (CallContent), which
+    # can be large; single calls still include them
+    class Meta(CallSerializer.Meta):
+        fields = [field for field in CallSerializer.Meta.fields if field not in CONTENT_FIELDS]
+
+
+class TranscriptSegmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TranscriptSegment
+        fields = ['id', 'start_ms', 'end_ms', 'speaker', 'text']
+
+
+class SegmentRangeQuerySerializer(serializers.Serializer):
+    start_ms = serializers.IntegerField(required=False, min_value=0)
+    end_ms = serializers.IntegerField(required=False, min_value=0)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=1000, default=500)
+
+    def validate(self, attrs):
+        start_ms, end_ms = attrs.get('start_ms'), attrs.get('end_ms')
+        if start_ms is not None and end_ms is not None and end_ms <= start_ms:
+            raise serializers.ValidationError("end_ms must be greater than start_ms.")
+        return attrs
+
+
+class ActionItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ActionItem
+        fields = ['id', 'call', 'description', 'owner', 'due_date', 'status',
+                  'created_at', 'updated_at']
+        read_only_fields = ['id', 'call', 'description', 'owner', 'due_date',
+                            'created_at', 'updated_at']
+
+
+class CallSummarySerializer(serializers.ModelSerializer):
+    action_items = serializers.SerializerMethodField()
+    lead_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CallSummary
+        fields = ['id', 'call', 'lead_name', 'purpose', 'key_points', 'decisions',
+                  'interest_level', 'next_step', 'next_step_date',
+                  'additional_notes', 'action_items', 'created_at', 'updated_at']
+
+    def get_action_items(self, obj):
+        return ActionItemSerializer(obj.call.action_items.all(), many=True).data
+
+    def get_lead_name(self, obj):
+        return obj.call.lead.name if obj.call.lead else None
+
+
+class CallHistoryQuerySerializer(serializers.Serializer):
+    # Bounds on start_time let PostgreSQL skip the monthly partitions
+    # outside the range (calls/partitioning.py)
+    started_after = serializers.DateTimeField(required=False)
+    started_before = serializers.DateTimeField(required=False)
+    page = serializers.IntegerField(required=False, min_value=1)
+    page_size = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_PAGE_SIZE)
+
+
+class CallExportQuerySerializer(serializers.Serializer):
+    file_format = serializers.ChoiceField(choices=CallExport.FORMAT_CHOICES, default='csv')
+    started_after = serializers.DateTimeField(required=False)
+    started_before = serializers.DateTimeField(required=False)
+    status = serializers.ChoiceField(choices=Call.CALL_STATUS_CHOICES, required=False)
+    lead = serializers.IntegerField(required=False, min_value=1)
+    include_transcripts = serializers.BooleanField(default=False)
+    include_summaries = serializers.BooleanField(default=False)
+
+    def validate_file_format(self, value):
+        if value == 'parquet' and not parquet_available():
+            raise serializers.ValidationError("Parquet export needs pyarrow to be installed")
+        return value
+
+
+class CallExportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CallExport
+        fields = ['id', 'file_format', 'filters', 'status', 'row_count', 'file_size',
+                  'error', 'created_at', 'completed_at']
+        read_only_fields = fields
+
+
+class SummaryListQuerySerializer(serializers.Serializer):
+    interest_level = serializers.ChoiceField(
+        choices=CallSummary.INTEREST_LEVEL_CHOICES, required=False)
+    next_step_after = serializers.DateField(required=False)
+    next_step_before = serializers.DateField(required=False)
+    page = serializers.IntegerField(required=False, min_value=1)
+    page_size = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_PAGE_SIZE)
+
+
+class ActionItemListQuerySerializer(serializers.Serializer):
+    status = serializers.ChoiceField(
+        choices=ActionItem.STATUS_CHOICES, required=False)
+    due_after = serializers.DateField(required=False)
+    due_before = serializers.DateField(required=False)
+    page = serializers.IntegerField(required=False, min_value=1)
+    page_size = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_PAGE_SIZE)
+
+
+class UpdateActionItemSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=ActionItem.STATUS_CHOICES)
+
 
 class InitiateCallSerializer(serializers.Serializer):
     phone_number = serializers.CharField(max_length=20)
@@ -29,7 +160,11 @@ class InitiateCallSerializer(serializers.Serializer):
     def validate_phone_number(self, value):
         if not value.strip():
             raise serializers.ValidationError("Phone number is required.")
-        return value
+        # Twilio dials E.164 numbers, so hand it the normalized form
+        phone_e164 = normalize_phone_number(value)
+        if not phone_e164:
+            raise serializers.ValidationError("Enter a valid phone number.")
+        return phone_e164
 
 
 class EndCallSerializer(serializers.Serializer):
@@ -38,6 +173,53 @@ class EndCallSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True)
 
 
+def validate_bulk_size(items):
+    if len(items) > settings.BULK_CALL_MAX_ITEMS:
+        raise serializers.ValidationError(
+            f"At most {settings.BULK_CALL_MAX_ITEMS} calls per request.")
+
+
+class BulkCallIdsSerializer(serializers.Serializer):
+    call_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_call_ids(self, value):
+        validate_bulk_size(value)
+        # Keep the request order, drop repeats
+        return list(dict.fromkeys(value))
+
+
+class BulkEndCallItemSerializer(serializers.Serializer):
+    call_id = serializers.IntegerField(min_value=1)
+    # Defaults to the time since the call started
+    duration = serializers.IntegerField(min_value=0, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class BulkNotesItemSerializer(serializers.Serializer):
+    call_id = serializers.IntegerField(min_value=1)
+    notes = serializers.CharField(allow_blank=True)
+
+
+class BulkCallItemsSerializer(serializers.Serializer):
+    """Base for bulk requests with per-call values: `{"calls": [...]}`"""
+
+    def validate_calls(self, value):
+        validate_bulk_size(value)
+        call_ids = [item['call_id'] for item in value]
+        if len(set(call_ids)) != len(call_ids):
+            raise serializers.ValidationError("Each call may appear only once.")
+        return value
+
+
+class BulkEndCallSerializer(BulkCallItemsSerializer):
+    calls = BulkEndCallItemSerializer(many=True, allow_empty=False)
+
+
+class BulkNotesSerializer(BulkCallItemsSerializer):
+    calls = BulkNotesItemSerializer(many=True, allow_empty=False)
+
+
 class UploadRecordingSerializer(serializers.Serializer):
     call_id = serializers.IntegerField()
     recording = serializers.FileField()
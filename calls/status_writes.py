@@ -0,0 +1,128 @@
+"""
+Coalesced writes of polled call statuses.
+
+Clients poll `GET /calls/{id}/status/` every few seconds while a call is
+live, and most polls return what is already stored. `store_twilio_status`
+compares the Twilio result with the call and:
+
+- skips the write when the status, duration and end time are unchanged
+- writes a call that left the open statuses at once, since the recording
+  pipeline and sync clients act on it
+- hands other changes (ringing, in progress) to `status_writes`, which
+  keeps the latest values per call and writes them with one `bulk_update`
+  every `CALL_STATUS_COALESCE_SECONDS`, or once `CALL_STATUS_MAX_PENDING`
+  calls are waiting
+
+During peak dialing that turns one UPDATE per poll into one per call and
+window. The buffer is per process and flushed on exit; if a flush fails,
+the reconciler (`manage.py reconcile_call_statuses`) refreshes the calls
+later.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from monitoring.tracing import span
+from .models import Call, OPEN_CALL_STATUSES
+from .reconciliation import RECONCILED_FIELDS, apply_twilio_status, status_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class StatusWriteBuffer:
+    """
+    Pending status changes of open calls, flushed from a background thread.
+    """
+
+    def __init__(self, interval=None, max_pending=None):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def add(self, call):
+        """Queue the reconciled fields of `call`, replacing its pending values"""
+        max_pending = self.max_pending or settings.CALL_STATUS_MAX_PENDING
+        with self._lock:
+            self._pending[call.id] = Call(
+                id=call.id, **{field: getattr(call, field) for field in RECONCILED_FIELDS})
+            full = len(self._pending) >= max_pending
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='call-status-writer', daemon=True)
+                self._thread.start()
+        if full:
+            self.flush()
+
+    def discard(self, call_id):
+        """Drop the pending values of a call that is being written directly"""
+        with self._lock:
+            self._pending.pop(call_id, None)
+
+    def flush(self):
+        """
+        Write the pending changes.
+
+        Returns:
+            int: The number of calls written.
+        """
+        with self._lock:
+            calls = list(self._pending.values())
+            self._pending = {}
+        if not calls:
+            return 0
+        try:
+            with span('db.flush_call_statuses', rows=len(calls)):
+                # bulk_update filters the queryset it's called on: a call that
+                # ended since it was queued keeps its final status
+                Call.objects.filter(status__in=OPEN_CALL_STATUSES).bulk_update(
+                    calls, RECONCILED_FIELDS, batch_size=500)
+        except Exception:
+            logger.error(f"Failed to write {len(calls)} call statuses", exc_info=True)
+            return 0
+        return len(calls)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval or settings.CALL_STATUS_COALESCE_SECONDS):
+            self.flush()
+            close_old_connections()
+
+    def shutdown(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+
+status_writes = StatusWriteBuffer()
+atexit.register(status_writes.shutdown)
+
+
+def store_twilio_status(call, result):
+    """
+    Copy a successful `TwilioService.get_call_status` result onto `call`
+    and store it, unless nothing changed.
+
+    Returns:
+        bool: True if the status changed.
+    """
+    now = timezone.now()
+    previous = status_snapshot(call)
+    updated_at = call.updated_at
+    changed = apply_twilio_status(call, result, now)
+    if status_snapshot(call) == previous:
+        call.updated_at = updated_at
+        return False
+
+    if call.status in OPEN_CALL_STATUSES and settings.CALL_STATUS_COALESCE_SECONDS > 0:
+        status_writes.add(call)
+    else:
+        status_writes.discard(call.id)
+        call.save(update_fields=RECONCILED_FIELDS)
+    return changed
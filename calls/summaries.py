@@ -0,0 +1,159 @@
+"""
+Structured call summaries.
+
+The summarizer returns JSON that matches `CALL_SUMMARY_SCHEMA`. It is stored
+as a `CallSummary` row plus one `ActionItem` row per follow-up task. That
+way, questions like "high-interest leads" or "action items due this week"
+become indexed queries instead of text searches. `Call.summary_content`
+keeps a Markdown rendering of the same data for existing clients.
+"""
+import logging
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+from monitoring.tracing import span
+from .models import ActionItem, CallSummary
+
+logger = logging.getLogger(__name__)
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD string from the model output, None if invalid"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def render_summary_markdown(data):
+    """
+    Render structured summary data in the Markdown format of
+    `AIService.summarize_transcription`.
+    """
+    def bullets(items):
+        return '\n'.join(f"• {item}" for item in items) or '• None'
+
+    action_items = []
+    for item in data.get('action_items') or []:
+        line = item['description']
+        if item.get('owner'):
+            line += f" - {item['owner']}"
+        if item.get('due_date'):
+            line += f" (due {item['due_date']})"
+        action_items.append(line)
+
+    next_steps = data.get('next_step') or ''
+    if data.get('next_step_date'):
+        next_steps = f"{next_steps} ({data['next_step_date']})".strip()
+
+    sections = [
+        f"**Call Purpose:** {data.get('purpose') or ''}",
+        f"**Key Discussion Points:**\n{bullets(data.get('key_points') or [])}",
+        f"**Decisions Made:**\n{bullets(data.get('decisions') or [])}",
+        f"**Action Items:**\n{bullets(action_items)}",
+        f"**Lead Interest Level:** {(data.get('interest_level') or 'unknown').title()}",
+        f"**Next Steps:**\n{next_steps}",
+    ]
+    if data.get('additional_notes'):
+        sections.append(f"**Additional Notes:**\n{data['additional_notes']}")
+    return '\n\n'.join(sections)
+
+
+def _item_key(description):
+    return ' '.join(description.split()).casefold()
+
+
+def store_structured_summary(call, data):
+    """
+    Store structured summary `data` for `call`, replacing earlier results.
+
+    Everything is written in one transaction, so readers never see the
+    summary and action items of different runs. Action items are matched
+    to the earlier ones by description, so a re-summarized call keeps the
+    status users set; earlier items that are gone are removed unless done.
+    """
+    interest_level = data.get('interest_level')
+    if interest_level not in dict(CallSummary.INTEREST_LEVEL_CHOICES):
+        interest_level = 'unknown'
+
+    with span('db.store_summary', **{'call.id': call.id}), transaction.atomic():
+        summary, _ = CallSummary.objects.update_or_create(
+            call=call,
+            defaults={
+                'user_id': call.user_id,
+                'purpose': data.get('purpose') or '',
+                'key_points': list(data.get('key_points') or []),
+                'decisions': list(data.get('decisions') or []),
+                'interest_level': interest_level,
+                'next_step': data.get('next_step') or '',
+                'next_step_date': parse_date(data.get('next_step_date')),
+                'additional_notes': data.get('additional_notes') or '',
+            }
+        )
+
+        existing = {}
+        for item in ActionItem.objects.filter(call=call).order_by('id'):
+            existing.setdefault(_item_key(item.description), []).append(item)
+
+        kept, created = [], []
+        for item in data.get('action_items') or []:
+            if not item.get('description'):
+                continue
+            owner = (item.get('owner') or '')[:100]
+            due_date = parse_date(item.get('due_date'))
+            matches = existing.get(_item_key(item['description']))
+            if matches:
+                action_item = matches.pop(0)
+                action_item.owner = owner
+                action_item.due_date = due_date
+                action_item.updated_at = timezone.now()
+                kept.append(action_item)
+            else:
+                created.append(ActionItem(
+                    call=call,
+                    user_id=call.user_id,
+                    description=item['description'],
+                    owner=owner,
+                    due_date=due_date,
+                ))
+
+        ActionItem.objects.filter(
+            pk__in=[item.pk for items in existing.values() for item in items
+                    if item.status == 'open']
+        ).delete()
+        ActionItem.objects.bulk_update(kept, ['owner', 'due_date', 'updated_at'])
+        ActionItem.objects.bulk_create(created)
+
+        call.summary_content = render_summary_markdown(data)
+        call.summary_status = 'completed'
+        call.save(update_fields=['summary_content', 'summary_status', 'updated_at'])
+
+    return summary
+
+
+def generate_structured_summary(call, ai_service):
+    """
+    Generate and store the structured summary of a transcribed call.
+
+    Returns:
+        dict: `{'success': True, 'summary': CallSummary}` or
+        `{'success': False, 'error': ...}`.
+    """
+    call.summary_status = 'processing'
+    call.save(update_fields=['summary_status', 'updated_at'])
+
+    reference_date = timezone.localdate(call.start_time) if call.start_time else None
+    result = ai_service.summarize_structured(call.transcribe_content, reference_date)
+    if not result['success']:
+        # Throttled requests are retried later, so they haven't failed yet
+        call.summary_status = 'pending' if result.get('throttled') else 'failed'
+        call.save(update_fields=['summary_status', 'updated_at'])
+        return result
+
+    summary = store_structured_summary(call, result['summary'])
+    logger.info(f"Structured summary stored for call {call.id}")
+    return {'success': True, 'summary': summary}
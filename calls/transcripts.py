@@ -0,0 +1,134 @@
+"""
+Timestamped, speaker-attributed call transcripts.
+
+Whisper's segment output is stored as `TranscriptSegment` rows. For
+dual-channel recordings (one call leg per channel) each channel is
+transcribed separately and labelled with `TRANSCRIPT_CHANNEL_SPEAKERS`,
+which gives speaker diarization without a separate model. That is one
+Whisper request per channel, so it is opt-in: the channels are sent
+concurrently, after checking the budgets cover all of them.
+`Call.transcribe_content` keeps the flat text as a cache derived from the
+segments, for summaries and existing clients.
+"""
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from monitoring.tracing import span
+from .audio_processing import ffmpeg_available, probe_channels, probe_duration, split_channels
+from .models import TranscriptSegment
+
+logger = logging.getLogger(__name__)
+
+
+def render_transcript(segments):
+    """
+    Build the flat transcript text from ordered segments.
+    """
+    lines = []
+    for segment in segments:
+        speaker = segment.get('speaker')
+        lines.append(f"{speaker.title()}: {segment['text']}" if speaker else segment['text'])
+    return '\n'.join(lines)
+
+
+def _transcribe_channel(ai_service, channel_path):
+    """Transcribe one channel on a short-lived thread"""
+    try:
+        return ai_service.transcribe_audio_segments(channel_path)
+    finally:
+        # Usage accounting opened a connection for this thread
+        connection.close()
+
+
+def _transcribe_channels(ai_service, full_path):
+    """
+    Transcribe each leg of a dual-channel recording; None if not applicable.
+    """
+    if not settings.TRANSCRIPT_DIARIZE_BY_CHANNEL or not ffmpeg_available():
+        return None
+    if probe_channels(full_path) != 2:
+        return None
+
+    speakers = settings.TRANSCRIPT_CHANNEL_SPEAKERS
+    with tempfile.TemporaryDirectory() as workdir:
+        channel_paths = split_channels(full_path, workdir, channels=2)
+        if not channel_paths:
+            return None
+
+        # Every channel costs as much as the whole recording
+        budget = ai_service.check_transcription_budget(
+            probe_duration(full_path), requests=len(channel_paths))
+        if not budget['success']:
+            return budget
+
+        with ThreadPoolExecutor(max_workers=len(channel_paths)) as executor:
+            results = list(executor.map(
+                lambda channel_path: _transcribe_channel(ai_service, channel_path),
+                channel_paths))
+
+        segments = []
+        for index, result in enumerate(results):
+            if not result['success']:
+                return result
+            speaker = speakers[index] if index < len(speakers) else f"speaker_{index}"
+            segments += [{**segment, 'speaker': speaker} for segment in result['segments']]
+
+    segments.sort(key=lambda segment: (segment['start_ms'], segment['end_ms']))
+    return {'success': True, 'segments': segments}
+
+
+def transcribe_segments(ai_service, full_path):
+    """
+    Transcribe a recording into ordered segments.
+
+    Returns:
+        dict: `{'success': True, 'segments': [...], 'transcription': str}` or
+        `{'success': False, 'error': ...}`.
+    """
+    with span('transcript.transcribe') as current:
+        result = _transcribe_channels(ai_service, full_path)
+        current.set_attribute('transcript.by_channel', result is not None)
+        if result is None:
+            result = ai_service.transcribe_audio_segments(full_path)
+        if not result['success']:
+            current.set_error(result['error'])
+            return result
+
+    segments = [{'speaker': '', **segment} for segment in result['segments']]
+    return {
+        'success': True,
+        'segments': segments,
+        'transcription': render_transcript(segments),
+    }
+
+
+def store_segments(call, segments):
+    """
+    Replace the stored segments of `call` and refresh its flat transcript.
+
+    Rows are written with one `bulk_create` per batch inside a transaction,
+    so readers never see a half-written transcript.
+    """
+    with span('db.store_segments', **{'call.id': call.id, 'segments': len(segments)}), \
+            transaction.atomic():
+        TranscriptSegment.objects.filter(call=call).delete()
+        TranscriptSegment.objects.bulk_create(
+            [
+                TranscriptSegment(
+                    call=call,
+                    start_ms=segment['start_ms'],
+                    end_ms=segment['end_ms'],
+                    speaker=segment.get('speaker', ''),
+                    text=segment['text'],
+                )
+                for segment in segments
+            ],
+            batch_size=500,
+        )
+        call.transcribe_content = render_transcript(segments)
+        call.transcribe_status = 'completed'
+        call.save(update_fields=['transcribe_content', 'transcribe_status', 'updated_at'])
@@ -1,19 +1,78 @@
 import os
-import requests
-from twilio.rest import Client
+from functools import cache, cached_property
 from django.conf import settings
 from decouple import config
 import logging
 
+from monitoring.metrics import track_external
+from monitoring.tracing import span
+
 logger = logging.getLogger(__name__)
 
+TWILIO_DEFAULT_BASE_URL = 'https://api.twilio.com'
+
+# Twilio call statuses mapped to Call.CALL_STATUS_CHOICES
+TWILIO_STATUS_MAP = {
+    'queued': 'initiated',
+    'initiated': 'initiated',
+    'ringing': 'ringing',
+    'in-progress': 'in_progress',
+    'completed': 'completed',
+    'busy': 'busy',
+    'failed': 'failed',
+    'no-answer': 'no_answer',
+    'canceled': 'failed',
+}
+
+
+def normalize_call_status(twilio_status):
+    """
+    Map a Twilio call status (e.g. "no-answer") to our Call status choice
+    """
+    return TWILIO_STATUS_MAP.get(twilio_status, twilio_status)
+
+
+@cache
+def timed_http_client_class():
+    """
+    Twilio HTTP client that records request time in the metrics.
+
+    Built on first use so that importing this module does not import the
+    Twilio SDK.
+    """
+    from twilio.http.http_client import TwilioHttpClient
+
+    class TimedTwilioHttpClient(TwilioHttpClient):
+        def request(self, *args, **kwargs):
+            with track_external('twilio'):
+                return super().request(*args, **kwargs)
+
+    return TimedTwilioHttpClient
+
 
 class TwilioService:
-    def __init__(self):
+    def __init__(self, base_url=None):
         self.account_sid = config('TWILIO_ACCOUNT_SID')
         self.auth_token = config('TWILIO_AUTH_TOKEN')
         self.phone_number = config('TWILIO_PHONE_NUMBER')
-        self.client = Client(self.account_sid, self.auth_token)
+
+        # Allows pointing the service at a local fake Twilio API
+        self.base_url = (
+            base_url or settings.TWILIO_API_BASE_URL or TWILIO_DEFAULT_BASE_URL
+        ).rstrip('/')
+
+    @cached_property
+    def client(self):
+        # Imported on first use: the SDK is slow to import, and most
+        # processes never talk to Twilio
+        from twilio.rest import Client
+
+        client = Client(
+            self.account_sid, self.auth_token,
+            http_client=timed_http_client_class()(timeout=settings.TWILIO_REQUEST_TIMEOUT))
+        if self.base_url != TWILIO_DEFAULT_BASE_URL:
+            client.api.base_url = self.base_url
+        return client
 
     def initiate_call(self, to_number, from_number=None):
         """
@@ -23,13 +82,28 @@ class TwilioService:
             if not from_number:
                 from_number = self.phone_number
 
+            # Ask Twilio to notify us as soon as the recording is ready
+            recording_options = {}
+            if settings.TWILIO_RECORDING_STATUS_CALLBACK_URL:
+                recording_options = {
+                    'recording_status_callback': settings.TWILIO_RECORDING_STATUS_CALLBACK_URL,
+                    'recording_status_callback_event': ['completed'],
+                }
+
+            # One call leg per channel lets transcripts tell speakers apart
+            if settings.TRANSCRIPT_DIARIZE_BY_CHANNEL:
+                recording_options['recording_channels'] = 'dual'
+
             # Create the call with recording enabled
-            call = self.client.calls.create(
-                to=to_number,
-                from_=from_number,
-                url=settings.TWILIO_VOICE_URL,
-                record=True  # Enable call recording
-            )
+            with span('twilio.calls.create', kind='client') as current:
+                call = self.client.calls.create(
+                    to=to_number,
+                    from_=from_number,
+                    url=settings.TWILIO_VOICE_URL,
+                    record=True,  # Enable call recording
+                    **recording_options
+                )
+                current.set_attribute('twilio.call_sid', call.sid)
 
             logger.info(f"Call initiated with recording: {call.sid}")
             return {
@@ -50,11 +124,13 @@ class TwilioService:
         Get the current status of a call
         """
         try:
-            call = self.client.calls(call_sid).fetch()
+            with span('twilio.calls.fetch', kind='client', **{'twilio.call_sid': call_sid}):
+                call = self.client.calls(call_sid).fetch()
             return {
                 'success': True,
                 'status': call.status,
-                'duration': call.duration
+                'duration': call.duration,
+                'end_time': call.end_time
             }
         except Exception as e:
             logger.error(f"Failed to get call status: {str(e)}")
@@ -68,7 +144,8 @@ class TwilioService:
         End an active call
         """
         try:
-            call = self.client.calls(call_sid).update(status='completed')
+            with span('twilio.calls.update', kind='client', **{'twilio.call_sid': call_sid}):
+                call = self.client.calls(call_sid).update(status='completed')
             return {
                 'success': True,
                 'status': call.status
@@ -85,7 +162,10 @@ class TwilioService:
         Get recordings for a specific call
         """
         try:
-            recordings = self.client.recordings.list(call_sid=call_sid)
+            with span('twilio.recordings.list', kind='client',
+                      **{'twilio.call_sid': call_sid}) as current:
+                recordings = self.client.recordings.list(call_sid=call_sid)
+                current.set_attribute('twilio.recording_count', len(recordings))
             recording_data = []
 
             for recording in recordings:
@@ -112,15 +192,25 @@ class TwilioService:
         """
         Download recording file from Twilio
         """
+        import requests
+
         try:
             # Get recording details
-            recording = self.client.recordings(recording_sid).fetch()
+            with span('twilio.recordings.fetch', kind='client',
+                      **{'twilio.recording_sid': recording_sid}):
+                recording = self.client.recordings(recording_sid).fetch()
 
             # Download the recording
-            recording_url = f"https://api.twilio.com{recording.uri.replace('.json', '.mp3')}"
+            recording_url = f"{self.base_url}{recording.uri.replace('.json', '.mp3')}"
 
-            response = requests.get(recording_url, auth=(
-                self.account_sid, self.auth_token))
+            with span('twilio.recording.download', kind='client',
+                      **{'twilio.recording_sid': recording_sid}) as current, \
+                    track_external('twilio'):
+                response = requests.get(recording_url, auth=(
+                    self.account_sid, self.auth_token),
+                    timeout=settings.TWILIO_REQUEST_TIMEOUT)
+                current.set_attribute('http.status_code', response.status_code)
+                current.set_attribute('bytes', len(response.content))
 
             if response.status_code == 200:
                 # Ensure directory exists
@@ -146,3 +236,12 @@ class TwilioService:
                 'success': False,
                 'error': str(e)
             }
+
+    def validate_webhook(self, url, params, signature):
+        """
+        Check the X-Twilio-Signature of an incoming webhook request
+        """
+        from twilio.request_validator import RequestValidator
+
+        validator = RequestValidator(self.auth_token)
+        return validator.validate(url, params, signature or '')
@@ -2,37 +2,106 @@ from django.shortcuts import render
 import logging
 import os
 import time
-from datetime import datetime
-from django.http import HttpResponse, FileResponse
+from datetime import datetime, timedelta
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.db.models import F
 from django.utils import timezone
 from django.conf import settings
 
-from .models import Call
+from .models import ActionItem, Call, CallExport, CallSummary, TranscriptSegment
 from .serializers import (
-    CallSerializer, InitiateCallSerializer,
-    EndCallSerializer, UploadRecordingSerializer
+    CallSerializer, CallListSerializer, InitiateCallSerializer,
+    EndCallSerializer, UploadRecordingSerializer,
+    BulkCallIdsSerializer, BulkEndCallSerializer, BulkNotesSerializer,
+    CallHistoryQuerySerializer, CallExportQuerySerializer, CallExportSerializer,
+    TranscriptSegmentSerializer, SegmentRangeQuerySerializer,
+    CallSummarySerializer, SummaryListQuerySerializer,
+    ActionItemSerializer, ActionItemListQuerySerializer, UpdateActionItemSerializer
 )
 from .twilio_service import TwilioService
 from .ai_service import AIService
+from . import bulk, export
+from .archive import archived_segments, restore_call
+from .audio_processing import content_type_for
+from .summaries import generate_structured_summary
+from .transcripts import store_segments, transcribe_segments
+from .status_writes import store_twilio_status
+from .recording_pipeline import (
+    download_call_recording, enqueue_recording_fetch,
+    enqueue_recording_processing, on_call_completed
+)
 from leads.models import Lead
+from utils.db_routing import read_from_replica
+from utils.pagination import paginate_queryset
 from utils.response_template import custom_success_response, custom_error_response
 
 logger = logging.getLogger(__name__)
 
 
+def bulk_response(results):
+    """Per-call results of a bulk action, with the calls serialized"""
+    for result in results:
+        if 'call' in result:
+            result['call'] = CallSerializer(result['call']).data
+    succeeded = sum(1 for result in results if result['success'])
+    return custom_success_response({
+        'results': results,
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+    })
+
+
 class CallViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @action(detail=False, methods=['GET'], url_path='history')
+    @read_from_replica()
     def get_call_history(self, request):
+        """
+        List the user's calls, most recent first, without their transcript,
+        summary and notes (see the single-call endpoints for those).
+
+        Query params: `started_after`, `started_before` (bounds on
+        `start_time`; on a partitioned table only the months in range are
+        read), `page`, `page_size`. Without `page`/`page_size` the response
+        is a plain list of all matching calls; with either of them it is
+        paginated like the leads list, and without `started_after` only
+        the `CALL_HISTORY_DEFAULT_DAYS` before `started_before` (or now)
+        are listed.
+        """
         try:
             logger.info("Fetching call history", extra={"user": request.user})
-            calls = Call.objects.filter(user=request.user)
-            serializer = CallSerializer(calls, many=True)
-            return custom_success_response(serializer.data)
+            query_serializer = CallHistoryQuerySerializer(data=request.query_params)
+            if not query_serializer.is_valid():
+                return custom_error_response(
+                    message=query_serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = query_serializer.validated_data
+
+            calls = Call.objects.filter(user=request.user).select_related('lead')
+            paginated = 'page' in params or 'page_size' in params
+            started_after = params.get('started_after')
+            # Plain-list clients have always received every call
+            if paginated and not started_after and settings.CALL_HISTORY_DEFAULT_DAYS:
+                started_after = (params.get('started_before') or timezone.now()) - timedelta(
+                    days=settings.CALL_HISTORY_DEFAULT_DAYS)
+            if started_after:
+                calls = calls.filter(start_time__gte=started_after)
+            if params.get('started_before'):
+                calls = calls.filter(start_time__lt=params['started_before'])
+
+            if not paginated:
+                serializer = CallListSerializer(calls, many=True)
+                return custom_success_response(serializer.data)
+
+            page_items, meta = paginate_queryset(
+                calls, params.get('page'), params.get('page_size'))
+            meta['results'] = CallListSerializer(page_items, many=True).data
+            return custom_success_response(meta)
         except Exception as e:
             logger.error("Error fetching call history", exc_info=True)
             return custom_error_response(
@@ -40,6 +109,146 @@ class CallViewSet(viewsets.ViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=False, methods=['GET'], url_path='export')
+    def export_calls(self, request):
+        """
+        Stream the user's calls as a CSV, JSON Lines or Parquet file.
+
+        Query params: `file_format` (csv, jsonl or parquet), `started_after`,
+        `started_before`, `status`, `lead`, `include_transcripts`,
+        `include_summaries`. Rows are read from the replica in chunks while
+        the response is sent. `POST /calls/exports/` writes the same file in
+        the background instead.
+        """
+        try:
+            logger.info("Exporting calls", extra={"user": request.user})
+            query_serializer = CallExportQuerySerializer(data=request.query_params)
+            if not query_serializer.is_valid():
+                return custom_error_response(
+                    message=query_serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = query_serializer.validated_data
+            file_format = params['file_format']
+
+            with read_from_replica():
+                calls = export.export_queryset(request.user, params)
+                # The rows are read after the view returns, outside this block
+                calls = calls.using(calls.db)
+            columns = export.export_columns(
+                params['include_transcripts'], params['include_summaries'])
+
+            response = StreamingHttpResponse(
+                export.export_chunks(calls, file_format, columns),
+                content_type=export.CONTENT_TYPES[file_format]
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="{export.export_filename(file_format)}"')
+            return response
+        except Exception as e:
+            logger.error("Error exporting calls", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=False, methods=['POST'], url_path='exports')
+    def create_export(self, request):
+        """
+        Queue an export of the user's calls to a file, written in the
+        background by `manage.py run_call_exports`.
+
+        Takes the query params of `GET /calls/export/` in the body. Poll
+        `GET /calls/exports/{id}/` until the status is "completed", then
+        download the file from `GET /calls/exports/{id}/download/`.
+        """
+        try:
+            logger.info("Creating call export", extra={"user": request.user})
+            serializer = CallExportQuerySerializer(data=request.data)
+            if not serializer.is_valid():
+                return custom_error_response(
+                    message=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = serializer.validated_data
+
+            call_export = CallExport.objects.create(
+                user=request.user,
+                file_format=params['file_format'],
+                filters={
+                    name: value.isoformat() if isinstance(value, datetime) else value
+                    for name, value in params.items()
+                },
+            )
+            export.enqueue_export(call_export)
+            call_export.refresh_from_db()
+            return custom_success_response(
+                CallExportSerializer(call_export).data,
+                status_code=status.HTTP_202_ACCEPTED
+            )
+        except Exception as e:
+            logger.error("Error creating call export", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=False, methods=['GET'], url_path=r'exports/(?P<export_id>\d+)')
+    def get_export(self, request, export_id=None):
+        try:
+            logger.info(f"Getting call export {export_id}", extra={"user": request.user})
+            call_export = CallExport.objects.get(pk=export_id, user=request.user)
+            return custom_success_response(CallExportSerializer(call_export).data)
+
+        except CallExport.DoesNotExist:
+            return custom_error_response(
+                message="Export not found",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(f"Error getting call export {export_id}", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=False, methods=['GET'], url_path=r'exports/(?P<export_id>\d+)/download')
+    def download_export(self, request, export_id=None):
+        try:
+            logger.info(f"Downloading call export {export_id}", extra={"user": request.user})
+            call_export = CallExport.objects.get(pk=export_id, user=request.user)
+
+            if call_export.status != 'completed':
+                return custom_error_response(
+                    message=f"Export is {call_export.status}",
+                    status_code=status.HTTP_409_CONFLICT
+                )
+            full_path = os.path.join(os.getcwd(), call_export.file_path)
+            if not os.path.exists(full_path):
+                return custom_error_response(
+                    message="Export file not found on server",
+                    status_code=status.HTTP_404_NOT_FOUND
+                )
+
+            return FileResponse(
+                open(full_path, 'rb'),
+                content_type=export.CONTENT_TYPES[call_export.file_format],
+                as_attachment=True,
+                filename=export.export_filename(call_export.file_format, call_export.created_at)
+            )
+
+        except CallExport.DoesNotExist:
+            return custom_error_response(
+                message="Export not found",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(f"Error downloading call export {export_id}", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
     @action(detail=False, methods=['POST'], url_path='initiate')
     def initiate_call(self, request):
         try:
@@ -61,6 +270,10 @@ class CallViewSet(viewsets.ViewSet):
                             message="Lead not found",
                             status_code=status.HTTP_404_NOT_FOUND
                         )
+                else:
+                    # Link the call to an existing lead with the same number
+                    lead = Lead.objects.filter(
+                        created_by=request.user, phone_e164=phone_number).first()
 
                 # Create call record
                 call = Call.objects.create(
@@ -124,7 +337,9 @@ class CallViewSet(viewsets.ViewSet):
                 call.duration = duration
                 call.notes = notes
                 call.status = 'completed'
-                call.save()
+                call.save(update_fields=[
+                    'end_time', 'duration', 'notes', 'status', 'updated_at'])
+                on_call_completed(call)
 
                 response_data = CallSerializer(call).data
                 return custom_success_response(response_data)
@@ -156,7 +371,7 @@ class CallViewSet(viewsets.ViewSet):
 
             # Update call notes
             call.notes = notes
-            call.save()
+            call.save(update_fields=['notes', 'updated_at'])
 
             response_data = CallSerializer(call).data
             return custom_success_response(response_data)
@@ -173,70 +388,124 @@ class CallViewSet(viewsets.ViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
-    @action(detail=True, methods=['POST'], url_path='download-recording')
-    def download_recording(self, request, pk=None):
+    @action(detail=False, methods=['POST'], url_path='bulk/status')
+    def bulk_refresh_status(self, request):
         try:
-            logger.info(f"Downloading recording for call {pk}", extra={
-                        "user": request.user})
-            call = Call.objects.get(pk=pk, user=request.user)
+            logger.info("Refreshing call statuses in bulk", extra={"user": request.user})
+            serializer = BulkCallIdsSerializer(data=request.data)
+            if not serializer.is_valid():
+                return custom_error_response(
+                    message=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
 
-            if not call.twilio_call_sid:
+            results = bulk.refresh_statuses(
+                request.user, serializer.validated_data['call_ids'], TwilioService())
+            return bulk_response(results)
+
+        except Exception as e:
+            logger.error("Error refreshing call statuses in bulk", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=False, methods=['POST'], url_path='bulk/end')
+    def bulk_end_calls(self, request):
+        try:
+            logger.info("Ending calls in bulk", extra={"user": request.user})
+            serializer = BulkEndCallSerializer(data=request.data)
+            if not serializer.is_valid():
                 return custom_error_response(
-                    message="No Twilio call ID found for this call",
+                    message=serializer.errors,
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
 
-            twilio_service = TwilioService()
+            results = bulk.end_calls(
+                request.user, serializer.validated_data['calls'], TwilioService())
+            return bulk_response(results)
 
-            # Get recordings for this call
-            recordings_result = twilio_service.get_call_recordings(
-                call.twilio_call_sid)
+        except Exception as e:
+            logger.error("Error ending calls in bulk", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-            if not recordings_result['success']:
+    @action(detail=False, methods=['PATCH'], url_path='bulk/notes')
+    def bulk_update_notes(self, request):
+        try:
+            logger.info("Updating call notes in bulk", extra={"user": request.user})
+            serializer = BulkNotesSerializer(data=request.data)
+            if not serializer.is_valid():
                 return custom_error_response(
-                    message=f"Failed to fetch recordings: {recordings_result['error']}",
+                    message=serializer.errors,
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
 
-            recordings = recordings_result['recordings']
-            if not recordings:
+            results = bulk.update_notes(request.user, serializer.validated_data['calls'])
+            return bulk_response(results)
+
+        except Exception as e:
+            logger.error("Error updating call notes in bulk", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=False, methods=['POST'], url_path='bulk/summarize')
+    def bulk_summarize(self, request):
+        try:
+            logger.info("Summarizing calls in bulk", extra={"user": request.user})
+            serializer = BulkCallIdsSerializer(data=request.data)
+            if not serializer.is_valid():
                 return custom_error_response(
-                    message="No recordings found for this call. Recording may still be processing.",
-                    status_code=status.HTTP_404_NOT_FOUND
+                    message=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Use the first recording (there should typically be only one)
-            recording = recordings[0]
-            recording_sid = recording['sid']
+            results = bulk.resummarize(request.user, serializer.validated_data['call_ids'])
+            return bulk_response(results)
+
+        except Exception as e:
+            logger.error("Error summarizing calls in bulk", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-            # Generate filename: phonenumber_timestamp.mp3
-            timestamp = int(time.time())
-            filename = f"{call.phone_number.replace('+', '')}_{timestamp}.mp3"
-            file_path = os.path.join('recordings', filename)
-            full_path = os.path.join(os.getcwd(), file_path)
+    @action(detail=True, methods=['POST'], url_path='download-recording')
+    def download_recording(self, request, pk=None):
+        try:
+            logger.info(f"Downloading recording for call {pk}", extra={
+                        "user": request.user})
+            call = Call.objects.get(pk=pk, user=request.user)
 
-            # Download recording from Twilio
-            download_result = twilio_service.download_recording(
-                recording_sid, full_path)
+            if not call.twilio_call_sid:
+                return custom_error_response(
+                    message="No Twilio call ID found for this call",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
 
-            if download_result['success']:
-                # Update call record with recording info
-                call.twilio_recording_sid = recording_sid
-                call.recording_file_path = file_path
-                if not call.duration and download_result.get('duration'):
-                    call.duration = int(download_result['duration'])
-                call.save()
+            result = download_call_recording(call)
 
-                # Automatically start transcription and summary generation
-                self._process_recording_async(call.id)
+            if result['success']:
+                # Transcription and summary generation run in the background;
+                # a new recording is transcribed again unless that is running
+                Call.objects.filter(pk=call.id).exclude(
+                    transcribe_status='processing').update(
+                    transcribe_status='pending', updated_at=timezone.now())
+                enqueue_recording_processing(call.id)
 
                 response_data = CallSerializer(call).data
                 return custom_success_response(response_data)
-            else:
-                return custom_error_response(
-                    message=f"Failed to download recording: {download_result['error']}",
-                    status_code=status.HTTP_400_BAD_REQUEST
+            return custom_error_response(
+                message=result['error'],
+                status_code=(
+                    status.HTTP_404_NOT_FOUND if result['not_ready']
+                    else status.HTTP_400_BAD_REQUEST
                 )
+            )
 
         except Call.DoesNotExist:
             return custom_error_response(
@@ -264,15 +533,10 @@ class CallViewSet(viewsets.ViewSet):
                 twilio_result = twilio_service.get_call_status(
                     call.twilio_call_sid)
 
-                if twilio_result['success']:
-                    call.status = twilio_result['status']
-                    if twilio_result.get('duration'):
-                        # Convert Twilio's string duration to integer
-                        try:
-                            call.duration = int(twilio_result['duration'])
-                        except (ValueError, TypeError):
-                            call.duration = None
-                    call.save()
+                # Unchanged polls aren't written; open-call changes are
+                # written in batches (calls/status_writes.py)
+                if twilio_result['success'] and store_twilio_status(call, twilio_result):
+                    on_call_completed(call)
 
             response_data = CallSerializer(call).data
             return custom_success_response(response_data)
@@ -288,48 +552,54 @@ class CallViewSet(viewsets.ViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
-    def _process_recording_async(self, call_id):
+    @action(detail=False, methods=['POST'], url_path='recording-status',
+            permission_classes=[AllowAny], authentication_classes=[])
+    def recording_status_webhook(self, request):
         """
-        Process recording asynchronously for transcription and summary
-        Note: In production, this should be moved to a background task (Celery)
+        Twilio recording status callback.
+
+        Twilio posts here (form-encoded, signed with X-Twilio-Signature) when
+        a call recording finishes processing, so the recording pipeline can
+        download it right away instead of polling.
         """
         try:
-            call = Call.objects.get(pk=call_id)
-            ai_service = AIService()
-
-            # Update transcription status
-            call.transcribe_status = 'processing'
-            call.save()
-
-            # Transcribe audio
-            full_path = os.path.join(os.getcwd(), call.recording_file_path)
-            transcription_result = ai_service.transcribe_audio(full_path)
-
-            if transcription_result['success']:
-                call.transcribe_content = transcription_result['transcription']
-                call.transcribe_status = 'completed'
-                call.save()
-
-                # Generate summary
-                call.summary_status = 'processing'
-                call.save()
-
-                summary_result = ai_service.summarize_transcription(
-                    call.transcribe_content)
+            call_sid = request.data.get('CallSid')
+            logger.info(f"Recording status callback for {call_sid}", extra={
+                        "recording_status": request.data.get('RecordingStatus')})
+
+            if settings.TWILIO_VALIDATE_WEBHOOKS:
+                # Twilio signs the URL it was given, which differs from the
+                # one this app sees behind the TLS-terminating proxy
+                callback_url = (settings.TWILIO_RECORDING_STATUS_CALLBACK_URL
+                                or request.build_absolute_uri())
+                twilio_service = TwilioService()
+                if not twilio_service.validate_webhook(
+                        callback_url, request.data,
+                        request.META.get('HTTP_X_TWILIO_SIGNATURE')):
+                    return custom_error_response(
+                        message="Invalid Twilio signature",
+                        status_code=status.HTTP_403_FORBIDDEN
+                    )
 
-                if summary_result['success']:
-                    call.summary_content = summary_result['summary']
-                    call.summary_status = 'completed'
-                else:
-                    call.summary_status = 'failed'
-                call.save()
+            if request.data.get('RecordingStatus') != 'completed':
+                return custom_success_response({"queued": False})
 
-            else:
-                call.transcribe_status = 'failed'
-                call.save()
+            call = Call.objects.get(twilio_call_sid=call_sid)
+            queued = enqueue_recording_fetch(
+                call.id, recording_sid=request.data.get('RecordingSid'), retry_failed=True)
+            return custom_success_response({"queued": queued})
 
+        except Call.DoesNotExist:
+            return custom_error_response(
+                message="Call not found",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
-            logger.error(f"Error processing recording async: {str(e)}")
+            logger.error("Error handling recording status callback", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
     @action(detail=True, methods=['POST'], url_path='transcribe')
     def transcribe_recording(self, request, pk=None):
@@ -343,26 +613,33 @@ class CallViewSet(viewsets.ViewSet):
                     message="No recording file found for this call",
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
+            if call.archived_at:
+                restore_call(call)
 
             # Update status to processing
             call.transcribe_status = 'processing'
-            call.save()
+            call.save(update_fields=['transcribe_status', 'updated_at'])
 
-            ai_service = AIService()
+            ai_service = AIService(user=request.user, call=call)
             full_path = os.path.join(os.getcwd(), call.recording_file_path)
 
-            transcription_result = ai_service.transcribe_audio(full_path)
+            transcription_result = transcribe_segments(ai_service, full_path)
 
             if transcription_result['success']:
-                call.transcribe_content = transcription_result['transcription']
-                call.transcribe_status = 'completed'
-                call.save()
+                store_segments(call, transcription_result['segments'])
 
                 response_data = CallSerializer(call).data
                 return custom_success_response(response_data)
+            elif transcription_result.get('throttled'):
+                call.transcribe_status = 'pending'
+                call.save(update_fields=['transcribe_status', 'updated_at'])
+                return custom_error_response(
+                    message=transcription_result['error'],
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS
+                )
             else:
                 call.transcribe_status = 'failed'
-                call.save()
+                call.save(update_fields=['transcribe_status', 'updated_at'])
                 return custom_error_response(
                     message=f"Transcription failed: {transcription_result['error']}",
                     status_code=status.HTTP_400_BAD_REQUEST
@@ -381,11 +658,63 @@ class CallViewSet(viewsets.ViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=True, methods=['GET'], url_path='segments')
+    def get_transcript_segments(self, request, pk=None):
+        """
+        Return transcript segments overlapping a time window of the recording.
+
+        Query params: `start_ms` and `end_ms` (window bounds, both optional)
+        and `limit`. Lets the player fetch only the visible part of the
+        transcript; served by the (call, start_ms) index.
+        """
+        try:
+            logger.info(f"Fetching transcript segments for call {pk}", extra={
+                        "user": request.user})
+            call = Call.objects.only('id', 'archived_at').get(pk=pk, user=request.user)
+
+            query_serializer = SegmentRangeQuerySerializer(data=request.query_params)
+            if not query_serializer.is_valid():
+                return custom_error_response(
+                    message=query_serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = query_serializer.validated_data
+
+            if call.archived_at:
+                segments = archived_segments(
+                    call, params.get('start_ms'), params.get('end_ms'), params['limit'])
+                return custom_success_response(segments)
+
+            segments = TranscriptSegment.objects.filter(call_id=pk)
+            if params.get('end_ms') is not None:
+                segments = segments.filter(start_ms__lt=params['end_ms'])
+            if params.get('start_ms') is not None:
+                segments = segments.filter(end_ms__gt=params['start_ms'])
+            segments = segments.order_by('start_ms')[:params['limit']]
+
+            serializer = TranscriptSegmentSerializer(segments, many=True)
+            return custom_success_response(serializer.data)
+
+        except Call.DoesNotExist:
+            return custom_error_response(
+                message="Call not found",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(
+                f"Error fetching transcript segments for call {pk}", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
     @action(detail=True, methods=['POST'], url_path='summarize')
     def summarize_call(self, request, pk=None):
         try:
             logger.info(f"Summarizing call {pk}", extra={"user": request.user})
             call = Call.objects.get(pk=pk, user=request.user)
+            if call.archived_at:
+                restore_call(call)
 
             if not call.transcribe_content:
                 return custom_error_response(
@@ -393,24 +722,20 @@ class CallViewSet(viewsets.ViewSet):
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Update status to processing
-            call.summary_status = 'processing'
-            call.save()
-
-            ai_service = AIService()
-            summary_result = ai_service.summarize_transcription(
-                call.transcribe_content)
+            ai_service = AIService(user=request.user, call=call)
+            summary_result = generate_structured_summary(call, ai_service)
 
             if summary_result['success']:
-                call.summary_content = summary_result['summary']
-                call.summary_status = 'completed'
-                call.save()
-
                 response_data = CallSerializer(call).data
+                response_data['structured_summary'] = CallSummarySerializer(
+                    summary_result['summary']).data
                 return custom_success_response(response_data)
+            elif summary_result.get('throttled'):
+                return custom_error_response(
+                    message=summary_result['error'],
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS
+                )
             else:
-                call.summary_status = 'failed'
-                call.save()
                 return custom_error_response(
                     message=f"Summary generation failed: {summary_result['error']}",
                     status_code=status.HTTP_400_BAD_REQUEST
@@ -428,6 +753,123 @@ class CallViewSet(viewsets.ViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=False, methods=['GET'], url_path='summaries')
+    @read_from_replica()
+    def list_summaries(self, request):
+        """
+        List the user's structured call summaries, newest first.
+
+        Query params: `interest_level`, `next_step_after`, `next_step_before`
+        (dates), `page`, `page_size`.
+        """
+        try:
+            logger.info("Fetching call summaries", extra={"user": request.user})
+            query_serializer = SummaryListQuerySerializer(data=request.query_params)
+            if not query_serializer.is_valid():
+                return custom_error_response(
+                    message=query_serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = query_serializer.validated_data
+
+            summaries = CallSummary.objects.filter(user=request.user)
+            if params.get('interest_level'):
+                summaries = summaries.filter(interest_level=params['interest_level'])
+            if params.get('next_step_after'):
+                summaries = summaries.filter(next_step_date__gte=params['next_step_after'])
+            if params.get('next_step_before'):
+                summaries = summaries.filter(next_step_date__lte=params['next_step_before'])
+            summaries = (
+                summaries.select_related('call__lead')
+                .prefetch_related('call__action_items')
+                .order_by('-created_at', '-id')
+            )
+
+            page_items, meta = paginate_queryset(
+                summaries, params.get('page'), params.get('page_size'))
+            meta['results'] = CallSummarySerializer(page_items, many=True).data
+            return custom_success_response(meta)
+        except Exception as e:
+            logger.error("Error fetching call summaries", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=False, methods=['GET'], url_path='action-items')
+    @read_from_replica()
+    def list_action_items(self, request):
+        """
+        List the user's action items by due date.
+
+        Query params: `status` (open/done), `due_after`, `due_before`
+        (dates), `page`, `page_size`. Served by the (user, status, due_date)
+        index.
+        """
+        try:
+            logger.info("Fetching action items", extra={"user": request.user})
+            query_serializer = ActionItemListQuerySerializer(data=request.query_params)
+            if not query_serializer.is_valid():
+                return custom_error_response(
+                    message=query_serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = query_serializer.validated_data
+
+            items = ActionItem.objects.filter(user=request.user)
+            if params.get('status'):
+                items = items.filter(status=params['status'])
+            if params.get('due_after'):
+                items = items.filter(due_date__gte=params['due_after'])
+            if params.get('due_before'):
+                items = items.filter(due_date__lte=params['due_before'])
+            items = items.order_by(F('due_date').asc(nulls_last=True), 'id')
+
+            page_items, meta = paginate_queryset(
+                items, params.get('page'), params.get('page_size'))
+            meta['results'] = ActionItemSerializer(page_items, many=True).data
+            return custom_success_response(meta)
+        except Exception as e:
+            logger.error("Error fetching action items", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+    @action(detail=False, methods=['PATCH'], url_path=r'action-items/(?P<item_id>\d+)')
+    def update_action_item(self, request, item_id=None):
+        """
+        Set the status of one of the user's action items ("open" or "done").
+
+        The status is kept when the call is summarized again.
+        """
+        try:
+            logger.info(f"Updating action item {item_id}", extra={"user": request.user})
+            item = ActionItem.objects.get(pk=item_id, user=request.user)
+
+            serializer = UpdateActionItemSerializer(data=request.data)
+            if not serializer.is_valid():
+                return custom_error_response(
+                    message=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+
+            item.status = serializer.validated_data['status']
+            item.save(update_fields=['status', 'updated_at'])
+            return custom_success_response(ActionItemSerializer(item).data)
+
+        except ActionItem.DoesNotExist:
+            return custom_error_response(
+                message="Action item not found",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(f"Error updating action item {item_id}", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
     @action(detail=True, methods=['GET'], url_path='audio')
     def serve_audio(self, request, pk=None):
         try:
@@ -460,7 +902,7 @@ class CallViewSet(viewsets.ViewSet):
             # Serve the audio file with proper headers
             response = FileResponse(
                 open(full_path, 'rb'),
-                content_type='audio/mpeg',
+                content_type=content_type_for(full_path),
                 as_attachment=False
             )
             response['Content-Disposition'] = f'inline; filename="{os.path.basename(full_path)}"'
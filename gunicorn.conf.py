@@ -0,0 +1,89 @@
+"""
+Gunicorn configuration for production serving.
+
+Most request time is spent waiting on Twilio, OpenAI and the database, so
+the default worker class is `gthread`. Each process serves
+`GUNICORN_THREADS` requests at once, and a slow provider call ties up one
+thread instead of a whole worker. `timeout` only restarts a worker whose
+main loop stops responding. With threaded workers it does not cut off a
+long transcription request. Provider calls are bounded by
+`OPENAI_REQUEST_TIMEOUT` and `TWILIO_REQUEST_TIMEOUT` instead.
+
+With `GUNICORN_PRELOAD=true` the application is loaded and warmed up
+(monitoring/warmup.py) once in the master, and workers are forked from the
+warm process: they share its memory and serve their first request at full
+speed. Without it every worker loads and warms up the application at boot.
+
+Every value can be overridden with the environment variable named in the
+`env()` call, e.g. `GUNICORN_THREADS=16`.
+"""
+import multiprocessing
+
+# Imported under another name: gunicorn reads `config` as a setting
+from decouple import config as env
+
+bind = env('GUNICORN_BIND', default='0.0.0.0:8000')
+worker_class = env('GUNICORN_WORKER_CLASS', default='gthread')
+workers = env('GUNICORN_WORKERS', default=min(multiprocessing.cpu_count() * 2 + 1, 9),
+              cast=int)
+threads = env('GUNICORN_THREADS', default=8, cast=int)
+
+preload_app = env('GUNICORN_PRELOAD', default=False, cast=bool)
+
+# Worker liveness, not a per-request limit for gthread workers
+timeout = env('GUNICORN_TIMEOUT', default=120, cast=int)
+# Time in-flight requests get to finish on reload or shutdown
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=330, cast=int)
+keepalive = env('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Recycle workers now and then to cap slow memory growth
+max_requests = env('GUNICORN_MAX_REQUESTS', default=2000, cast=int)
+max_requests_jitter = env('GUNICORN_MAX_REQUESTS_JITTER', default=200, cast=int)
+
+# Heartbeat files on tmpfs, so a slow disk can't make workers look dead
+worker_tmp_dir = env('GUNICORN_WORKER_TMP_DIR', default='/dev/shm')
+
+accesslog = env('GUNICORN_ACCESS_LOG', default='-')
+errorlog = '-'
+loglevel = env('GUNICORN_LOG_LEVEL', default='info')
+
+
+def on_starting(server):
+    # Snapshots of the previous server's workers would be counted again
+    metrics_dir = env('METRICS_MULTIPROC_DIR', default='')
+    if metrics_dir:
+        from monitoring.metrics import clear_multiprocess_dir
+        clear_multiprocess_dir(metrics_dir)
+
+
+def worker_exit(server, worker):
+    # Keep the final counts and buffered call statuses of a recycled worker
+    from monitoring.metrics import REGISTRY
+    REGISTRY.flush(force=True)
+    from calls.status_writes import status_writes
+    status_writes.shutdown()
+
+
+def child_exit(server, worker):
+    # Fold the exited worker's snapshot into the merged one, in the master
+    metrics_dir = env('METRICS_MULTIPROC_DIR', default='')
+    if metrics_dir:
+        from monitoring.metrics import merge_exited_process
+        merge_exited_process(worker.pid, metrics_dir)
+
+
+def pre_fork(server, worker):
+    # With preload the master has connected during warmup; workers must not
+    # inherit those connections
+    if server.cfg.preload_app:
+        from monitoring.warmup import close_database_connections
+        close_database_connections()
+
+
+def post_worker_init(worker):
+    # Check the database from this worker (and open its pool, with DB_POOL)
+    # before it accepts requests
+    from django.conf import settings
+    if settings.WARMUP_ENABLED:
+        from monitoring.warmup import warmup
+        warmup(steps=['database'])
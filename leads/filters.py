@@ -0,0 +1,68 @@
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+
+from calls.models import Call
+from utils.phone import normalize_phone_number
+
+# Public sort keys mapped to the ORM ordering they translate to. The trailing
+# `id` breaks ties in the sort key (e.g. two leads with the same name), so
+# pages stay stable.
+LEAD_ORDERING = {
+    'created_at': [F('created_at').asc(), F('id').asc()],
+    '-created_at': [F('created_at').desc(), F('id').desc()],
+    'name': [F('name').asc(), F('id').asc()],
+    '-name': [F('name').desc(), F('id').desc()],
+    'last_call_at': [F('last_call_at').asc(nulls_last=True), F('id').asc()],
+    '-last_call_at': [F('last_call_at').desc(nulls_last=True), F('id').desc()],
+}
+
+
+def with_last_call(queryset):
+    """
+    Annotate each lead with the start time and status of its most recent call.
+
+    Both values come from one correlated subquery each (served by the
+    `call_lead_start_idx` index) instead of a lookup per lead.
+    """
+    latest_call = Call.objects.filter(
+        lead=OuterRef('pk')).order_by('-start_time')
+    return queryset.annotate(
+        last_call_at=Subquery(latest_call.values('start_time')[:1]),
+        last_call_status=Subquery(latest_call.values('status')[:1]),
+    )
+
+
+def filter_leads(queryset, params):
+    """
+    Apply validated `LeadListQuerySerializer` params to a lead queryset.
+    """
+    search = (params.get('search') or '').strip()
+    if search:
+        # Prefix matches are served by the trigram indexes on name/phone/email
+        condition = (
+            Q(name__istartswith=search) |
+            Q(phone__startswith=search) |
+            Q(email__istartswith=search)
+        )
+        # A complete number also matches however it was originally typed
+        phone_e164 = normalize_phone_number(search)
+        if phone_e164:
+            condition |= Q(phone_e164=phone_e164)
+        queryset = queryset.filter(condition)
+
+    if params.get('created_after'):
+        queryset = queryset.filter(created_at__gte=params['created_after'])
+    if params.get('created_before'):
+        queryset = queryset.filter(created_at__lt=params['created_before'])
+
+    has_called = params.get('has_called')
+    if has_called is not None:
+        called = Exists(Call.objects.filter(lead=OuterRef('pk')))
+        queryset = queryset.filter(called if has_called else ~called)
+
+    queryset = with_last_call(queryset)
+
+    if params.get('last_call_status'):
+        queryset = queryset.filter(last_call_status=params['last_call_status'])
+
+    ordering = params.get('ordering') or '-created_at'
+    return queryset.order_by(*LEAD_ORDERING[ordering])
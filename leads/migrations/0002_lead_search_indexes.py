@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+TRIGRAM_INDEXES = {
+    'lead_name_trgm_idx': 'UPPER("name"::text)',
+    'lead_email_trgm_idx': 'UPPER("email"::text)',
+    'lead_phone_trgm_idx': '"phone"',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Trigram GIN indexes serve the case-insensitive prefix search on the
+    # leads list (`UPPER(col) LIKE UPPER('abc%')`). PostgreSQL only.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON leads_lead '
+            f'USING gin ({expression} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['created_by', '-created_at'], name='lead_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['created_by', 'name'], name='lead_owner_name_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:30
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of utils.phone as of this migration, so later changes to the
+# normalizer don't change what this backfill does
+EXTENSION_RE = re.compile(r'\s*(?:x|ext\.?|extension|#)\s*\d+\s*$', re.IGNORECASE)
+ALLOWED_CHARS_RE = re.compile(r'^\+?[\d\s().\-/]+$')
+
+
+def normalize_phone_number(value, country_code):
+    if not value:
+        return None
+    value = EXTENSION_RE.sub('', str(value).strip())
+    if not value or not ALLOWED_CHARS_RE.match(value):
+        return None
+
+    digits = re.sub(r'\D', '', value)
+    if value.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif country_code == '1' and digits.startswith('011'):
+        digits = digits[3:]
+    elif country_code == '1':
+        if len(digits) == 10:
+            digits = country_code + digits
+        elif not (len(digits) == 11 and digits.startswith('1')):
+            return None
+    else:
+        digits = country_code + digits.lstrip('0')
+
+    if digits.startswith('0') or not 8 <= len(digits) <= 15:
+        return None
+    return f'+{digits}'
+
+
+def backfill_phone_e164(model, source_field, batch_size=1000):
+    country_code = str(getattr(settings, 'DEFAULT_PHONE_COUNTRY_CODE', '1'))
+    last_pk = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', source_field, 'phone_e164')[:batch_size]
+        )
+        if not batch:
+            return
+        changed = []
+        for obj in batch:
+            e164 = normalize_phone_number(getattr(obj, source_field), country_code) or ''
+            if obj.phone_e164 != e164:
+                obj.phone_e164 = e164
+                changed.append(obj)
+        if changed:
+            model.objects.bulk_update(changed, ['phone_e164'])
+        last_pk = batch[-1].pk
+
+
+def backfill(apps, schema_editor):
+    Lead = apps.get_model('leads', 'Lead')
+    backfill_phone_e164(Lead, 'phone')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0002_lead_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='phone_e164',
+            field=models.CharField(blank=True, help_text='Normalized E.164 form of phone', max_length=16),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['created_by', 'phone_e164'], name='lead_owner_phone_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-19 12:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0003_lead_phone_e164'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['created_by', 'updated_at', 'id'], name='lead_owner_updated_idx'),
+        ),
+    ]
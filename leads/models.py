@@ -1,10 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
+from utils.phone import normalize_phone_number
 
 
 class Lead(models.Model):
     name = models.CharField(max_length=100)
     phone = models.CharField(max_length=20)
+    phone_e164 = models.CharField(
+        max_length=16, blank=True, help_text="Normalized E.164 form of phone")
     email = models.EmailField()
     created_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='leads')
@@ -13,6 +16,24 @@ class Lead(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_by', '-created_at'],
+                         name='lead_owner_created_idx'),
+            models.Index(fields=['created_by', 'name'],
+                         name='lead_owner_name_idx'),
+            models.Index(fields=['created_by', 'phone_e164'],
+                         name='lead_owner_phone_idx'),
+            # Change feed cursor (sync/changes.py)
+            models.Index(fields=['created_by', 'updated_at', 'id'],
+                         name='lead_owner_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.phone}"
+
+    def save(self, *args, **kwargs):
+        self.phone_e164 = normalize_phone_number(self.phone) or ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_e164'}
+        super().save(*args, **kwargs)
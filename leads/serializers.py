@@ -1,16 +1,22 @@
 from rest_framework import serializers
+from calls.models import Call
+from utils.pagination import MAX_PAGE_SIZE
+from utils.phone import normalize_phone_number
+from .filters import LEAD_ORDERING
 from .models import Lead
 
 
 class LeadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lead
-        fields = ['id', 'name', 'phone', 'email', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'phone', 'phone_e164', 'email', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'phone_e164', 'created_at', 'updated_at']
 
     def validate_phone(self, value):
         if not value.strip():
             raise serializers.ValidationError("Phone number is required.")
+        if not normalize_phone_number(value):
+            raise serializers.ValidationError("Enter a valid phone number.")
         return value
 
     def validate_email(self, value):
@@ -24,6 +30,46 @@ class LeadSerializer(serializers.ModelSerializer):
         return value
 
 
+class LeadListSerializer(LeadSerializer):
+    last_call_at = serializers.DateTimeField(read_only=True, allow_null=True)
+    last_call_status = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta(LeadSerializer.Meta):
+        fields = LeadSerializer.Meta.fields + ['last_call_at', 'last_call_status']
+
+
+class LeadListQuerySerializer(serializers.Serializer):
+    """
+    Query parameters accepted by the leads list endpoint.
+    """
+    search = serializers.CharField(
+        required=False, allow_blank=True, max_length=100)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    # `default=None`: a missing query param would otherwise read as False
+    has_called = serializers.BooleanField(
+        required=False, allow_null=True, default=None)
+    last_call_status = serializers.ChoiceField(
+        choices=Call.CALL_STATUS_CHOICES, required=False)
+    ordering = serializers.ChoiceField(
+        choices=list(LEAD_ORDERING), required=False, default='-created_at')
+    page = serializers.IntegerField(required=False, min_value=1)
+    page_size = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_PAGE_SIZE)
+    # `paginate=false` returns the whole list as a plain array (legacy clients)
+    paginate = serializers.BooleanField(required=False, default=True)
+
+
+class PhoneLookupQuerySerializer(serializers.Serializer):
+    phone = serializers.CharField(max_length=32)
+
+    def validate_phone(self, value):
+        phone_e164 = normalize_phone_number(value)
+        if not phone_e164:
+            raise serializers.ValidationError("Enter a valid phone number.")
+        return phone_e164
+
+
 class CreateLeadSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lead
@@ -32,6 +78,8 @@ class CreateLeadSerializer(serializers.ModelSerializer):
     def validate_phone(self, value):
         if not value.strip():
             raise serializers.ValidationError("Phone number is required.")
+        if not normalize_phone_number(value):
+            raise serializers.ValidationError("Enter a valid phone number.")
         return value
 
     def validate_email(self, value):
@@ -5,23 +5,65 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django.core.exceptions import ValidationError
 
+from calls.models import Call
+from calls.serializers import CallSerializer
+from .filters import filter_leads
 from .models import Lead
-from .serializers import LeadSerializer, CreateLeadSerializer
+from .serializers import (
+    LeadSerializer, CreateLeadSerializer,
+    LeadListSerializer, LeadListQuerySerializer, PhoneLookupQuerySerializer
+)
+from utils.db_routing import read_from_replica
+from utils.pagination import paginate_queryset
 from utils.response_template import custom_success_response, custom_error_response
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of calls returned by the phone lookup
+LOOKUP_CALL_LIMIT = 50
+
 
 class LeadViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @action(detail=False, methods=['GET'], url_path='list')
+    @read_from_replica()
     def list_leads(self, request):
+        """
+        List the user's leads with optional filtering, sorting and paging.
+
+        Query params: `search` (name/phone/email prefix), `created_after`,
+        `created_before`, `has_called`, `last_call_status`, `ordering`
+        (`[-]created_at`, `[-]name`, `[-]last_call_at`), `page`, `page_size`,
+        `paginate`.
+
+        The response is `{"count", "page", "page_size", "has_next",
+        "results"}`, `DEFAULT_PAGE_SIZE` leads per page unless `page_size` is
+        given. With `paginate=false` it is a plain list of every lead, as
+        before.
+        """
         try:
             logger.info("Fetching leads list", extra={"user": request.user})
-            leads = Lead.objects.filter(created_by=request.user)
-            serializer = LeadSerializer(leads, many=True)
-            return custom_success_response(serializer.data)
+            query_serializer = LeadListQuerySerializer(
+                data=request.query_params)
+            if not query_serializer.is_valid():
+                return custom_error_response(
+                    message=query_serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = query_serializer.validated_data
+
+            leads = filter_leads(
+                Lead.objects.filter(created_by=request.user), params)
+
+            if not params['paginate']:
+                serializer = LeadListSerializer(leads, many=True)
+                return custom_success_response(serializer.data)
+
+            page_items, meta = paginate_queryset(
+                leads, params.get('page'), params.get('page_size'))
+            meta['results'] = LeadListSerializer(page_items, many=True).data
+            return custom_success_response(meta)
         except Exception as e:
             logger.error("Error fetching leads list", exc_info=True)
             return custom_error_response(
@@ -29,6 +71,45 @@ class LeadViewSet(viewsets.ViewSet):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=False, methods=['GET'], url_path='lookup')
+    @read_from_replica()
+    def lookup_by_phone(self, request):
+        """
+        Resolve a phone number to the user's lead and recent call history.
+
+        The number is normalized to E.164 first, so "(555) 123-4567" and
+        "+1 555 123 4567" match the same records. Both lookups are index
+        scans on the `phone_e164` columns.
+        """
+        try:
+            logger.info("Looking up phone number", extra={"user": request.user})
+            query_serializer = PhoneLookupQuerySerializer(
+                data=request.query_params)
+            if not query_serializer.is_valid():
+                return custom_error_response(
+                    message=query_serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            phone_e164 = query_serializer.validated_data['phone']
+
+            lead = Lead.objects.filter(
+                created_by=request.user, phone_e164=phone_e164).first()
+            calls = Call.objects.filter(
+                user=request.user, phone_e164=phone_e164
+            ).select_related('lead', 'content')[:LOOKUP_CALL_LIMIT]
+
+            return custom_success_response({
+                "phone_e164": phone_e164,
+                "lead": LeadSerializer(lead).data if lead else None,
+                "calls": CallSerializer(calls, many=True).data,
+            })
+        except Exception as e:
+            logger.error("Error looking up phone number", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
     @action(detail=False, methods=['POST'], url_path='create')
     def create_lead(self, request):
         try:
@@ -0,0 +1,80 @@
+import zlib
+
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import ProfileCapture, ProfilingRule
+from .profiling import capture_download, clear_rules_cache, profile_stats_text
+
+
+@admin.register(ProfilingRule)
+class ProfilingRuleAdmin(admin.ModelAdmin):
+    list_display = ['endpoint', 'mode', 'sample_rate', 'enabled', 'expires_at',
+                    'created_by', 'created_at']
+    list_editable = ['enabled', 'sample_rate']
+    list_filter = ['enabled', 'mode']
+    search_fields = ['endpoint']
+    readonly_fields = ['created_by', 'created_at']
+
+    def save_model(self, request, obj, form, change):
+        if not obj.created_by_id:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+        clear_rules_cache()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        clear_rules_cache()
+
+
+@admin.register(ProfileCapture)
+class ProfileCaptureAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'endpoint', 'kind', 'method', 'status_code',
+                    'duration_ms', 'sample_count', 'size', 'download_link']
+    list_filter = ['kind', 'endpoint']
+    search_fields = ['endpoint', 'path']
+    exclude = ['data']
+    readonly_fields = ['rule', 'kind', 'endpoint', 'method', 'path', 'status_code', 'user',
+                       'duration_ms', 'sample_count', 'size', 'created_at',
+                       'download_link', 'preview']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:capture_id>/download/',
+                 self.admin_site.admin_view(self.download_view),
+                 name='monitoring_profilecapture_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, capture_id):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        capture = get_object_or_404(ProfileCapture, pk=capture_id)
+        content, filename, content_type = capture_download(capture)
+        response = HttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @admin.display(description='Download')
+    def download_link(self, obj):
+        url = reverse('admin:monitoring_profilecapture_download', args=[obj.id])
+        return format_html('<a href="{}">{}</a>', url,
+                           'pstats' if obj.kind == 'cprofile' else 'collapsed stacks')
+
+    @admin.display(description='Preview')
+    def preview(self, obj):
+        if obj.kind == 'cprofile':
+            text = profile_stats_text(obj)
+        else:
+            lines = zlib.decompress(bytes(obj.data)).decode().splitlines()
+            text = '\n'.join(lines[:20])
+        return format_html('<pre style="white-space: pre-wrap">{}</pre>', text)
@@ -0,0 +1,368 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Metrics are kept in a process-local registry. Under gunicorn, every
+worker is a separate process, so with `METRICS_MULTIPROC_DIR` set each
+process periodically writes a snapshot of its registry to its own file in
+that directory. `/metrics` merges all files: counters and histogram buckets
+are summed, which stays correct after workers exit or are recycled: the
+gunicorn master folds the snapshot of every exited worker into one
+`metrics_exited.json` (`merge_exited_process`), so the directory holds
+one file per live worker plus that one. Without the directory (runserver,
+tests) only the serving process is reported.
+"""
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.samples = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def dump(self):
+        return {
+            'type': self.type,
+            'help': self.documentation,
+            'labelnames': list(self.labelnames),
+            'samples': [[list(key), value] for key, value in self.samples.items()],
+        }
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.samples[key] = self.samples.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(float(bound) for bound in buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            # [per-bucket counts..., +Inf count, sum]
+            sample = self.samples.get(key)
+            if sample is None:
+                sample = self.samples[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    sample[index] += 1
+                    break
+            else:
+                sample[len(self.buckets)] += 1
+            sample[-1] += value
+
+    def dump(self):
+        data = super().dump()
+        data['buckets'] = list(self.buckets)
+        return data
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.metrics = {}
+        self._file = None
+        self._flushed_at = 0.0
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def reset(self):
+        """Drop all recorded samples (tests)"""
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.samples.clear()
+
+    def dump(self):
+        with self.lock:
+            return {name: metric.dump() for name, metric in self.metrics.items()}
+
+    # Multi-process support
+
+    def _snapshot_path(self, directory):
+        if self._file is None or os.path.dirname(self._file) != directory:
+            # Unique per process instance, so a recycled PID never
+            # overwrites the counts of an exited worker
+            self._file = os.path.join(
+                directory, f"metrics_{os.getpid()}_{uuid.uuid4().hex[:8]}.json")
+        return self._file
+
+    def flush(self, force=False):
+        """
+        Write this process's snapshot to `METRICS_MULTIPROC_DIR`.
+
+        Throttled to once per `METRICS_FLUSH_INTERVAL` unless `force`.
+        """
+        directory = settings.METRICS_MULTIPROC_DIR
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self._flushed_at = now
+
+        path = self._snapshot_path(directory)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w') as snapshot:
+                json.dump(self.dump(), snapshot)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.error(f"Failed to write metrics snapshot {path}", exc_info=True)
+
+    def collect(self):
+        """
+        Return the merged metrics of all processes (or just this one).
+        """
+        directory = settings.METRICS_MULTIPROC_DIR
+        if not directory:
+            return self.dump()
+
+        self.flush(force=True)
+        merged = {}
+        # Shared lock: an exited worker's counts are never read both from
+        # its own snapshot and from the merged one
+        with _directory_lock(directory, fcntl.LOCK_SH):
+            for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+                data = _read_snapshot(path)
+                if data is not None:
+                    merge_snapshot(merged, data)
+        return merged
+
+
+EXITED_SNAPSHOT = 'metrics_exited.json'
+
+
+@contextmanager
+def _directory_lock(directory, operation):
+    with open(os.path.join(directory, '.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as snapshot:
+            return json.load(snapshot)
+    except (OSError, ValueError):
+        # Being replaced right now, or truncated by a crash
+        return None
+
+
+def merge_exited_process(pid, directory=None):
+    """
+    Fold the snapshot of the exited process `pid` into `metrics_exited.json`
+    and delete it, so recycled workers don't leave a file each behind.
+
+    Called by the gunicorn master when a worker exits (`child_exit`).
+    """
+    directory = directory or settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    exited_path = os.path.join(directory, EXITED_SNAPSHOT)
+    with _directory_lock(directory, fcntl.LOCK_EX):
+        paths = glob.glob(os.path.join(directory, f'metrics_{pid}_*.json'))
+        if paths:
+            merged = _read_snapshot(exited_path) or {}
+            for path in paths:
+                data = _read_snapshot(path)
+                if data is not None:
+                    merge_snapshot(merged, data)
+            tmp_path = f"{exited_path}.tmp"
+            with open(tmp_path, 'w') as snapshot:
+                json.dump(merged, snapshot)
+            os.replace(tmp_path, exited_path)
+        for path in paths + glob.glob(os.path.join(directory, f'metrics_{pid}_*.json.tmp')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def merge_snapshot(merged, data):
+    """Add the samples of one process snapshot into `merged`"""
+    for name, metric in data.items():
+        target = merged.setdefault(name, {**metric, 'samples': []})
+        samples = {tuple(key): value for key, value in target['samples']}
+        for key, value in metric['samples']:
+            key = tuple(key)
+            if key not in samples:
+                samples[key] = value
+            elif isinstance(value, list):
+                samples[key] = [a + b for a, b in zip(samples[key], value)]
+            else:
+                samples[key] += value
+        target['samples'] = [[list(key), value] for key, value in samples.items()]
+    return merged
+
+
+def clear_multiprocess_dir(directory=None):
+    """
+    Remove process snapshots, e.g. when the server (re)starts.
+    """
+    directory = directory or settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json*')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + '}'
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def render_prometheus(metrics):
+    """
+    Render collected metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for name in sorted(metrics):
+        metric = metrics[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric['labelnames']
+        for key, value in sorted(metric['samples']):
+            if metric['type'] == 'counter':
+                lines.append(f"{name}_total{_format_labels(labelnames, key)} {value}")
+                continue
+
+            bounds = list(metric['buckets']) + [float('inf')]
+            cumulative = 0
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                labels = _format_labels(labelnames, key, [('le', _format_bound(bound))])
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, key)} {value[-1]}")
+            lines.append(f"{name}_count{_format_labels(labelnames, key)} {cumulative}")
+    return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'smartcallr_http_request_duration_seconds',
+    'Time spent handling HTTP requests.',
+    ['endpoint', 'method', 'status'])
+REQUEST_DB_QUERIES = REGISTRY.histogram(
+    'smartcallr_http_request_db_queries',
+    'Database queries executed per HTTP request.',
+    ['endpoint'], buckets=QUERY_COUNT_BUCKETS)
+REQUEST_DB_DURATION = REGISTRY.histogram(
+    'smartcallr_http_request_db_duration_seconds',
+    'Time spent in database queries per HTTP request.',
+    ['endpoint'])
+REQUEST_EXTERNAL_DURATION = REGISTRY.histogram(
+    'smartcallr_http_request_external_duration_seconds',
+    'Time spent waiting on external services (Twilio, OpenAI) per HTTP request.',
+    ['endpoint'])
+RESPONSE_SIZE = REGISTRY.histogram(
+    'smartcallr_http_response_size_bytes',
+    'HTTP response body size.',
+    ['endpoint'], buckets=SIZE_BUCKETS)
+EXTERNAL_DURATION = REGISTRY.histogram(
+    'smartcallr_external_request_duration_seconds',
+    'Duration of outbound requests to external services.',
+    ['service', 'outcome'])
+
+# Time spent in external calls during the current request, if any
+_external_time = ContextVar('external_time', default=None)
+
+
+@contextmanager
+def track_external(service):
+    """
+    Time an outbound request to `service` (e.g. "twilio", "openai").
+
+    The duration is recorded in the external request histogram and added
+    to the external time of the HTTP request being handled, if any.
+    """
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'success'
+    finally:
+        elapsed = time.perf_counter() - started
+        if settings.METRICS_ENABLED:
+            EXTERNAL_DURATION.observe(elapsed, service=service, outcome=outcome)
+        accumulator = _external_time.get()
+        if accumulator is not None:
+            accumulator[0] += elapsed
+
+
+@contextmanager
+def collect_external_time():
+    """
+    Collect the time of `track_external` blocks run inside this context.
+
+    Yields a one-element list holding the total seconds.
+    """
+    accumulator = [0.0]
+    token = _external_time.set(accumulator)
+    try:
+        yield accumulator
+    finally:
+        _external_time.reset(token)
@@ -0,0 +1,178 @@
+import cProfile
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import (
+    REGISTRY, REQUEST_DB_DURATION, REQUEST_DB_QUERIES, REQUEST_DURATION,
+    REQUEST_EXTERNAL_DURATION, RESPONSE_SIZE, collect_external_time
+)
+from .profiling import StackSampler, prune_captures, pstats_dump, rule_for_request, save_capture
+from .tracing import current_span, span
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ENDPOINT = '<unmatched>'
+
+
+class QueryStats:
+    """Database execute wrapper counting queries and their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def endpoint_name(request):
+    """
+    Metrics label for the view handling `request`, e.g. "calls-transcribe-recording".
+
+    Uses the URL pattern name rather than the path, so labels stay bounded.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ENDPOINT
+    return match.view_name or match._func_path
+
+
+def response_size(response):
+    if response.streaming:
+        length = response.get('Content-Length')
+        return int(length) if length and length.isdigit() else None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, DB queries and time, external service time and response
+    size of every request, labelled by endpoint.
+
+    Should be the first middleware, so the latency covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        queries = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            external = stack.enter_context(collect_external_time())
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        endpoint = endpoint_name(request)
+        REQUEST_DURATION.observe(
+            elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+        REQUEST_DB_QUERIES.observe(queries.count, endpoint=endpoint)
+        REQUEST_DB_DURATION.observe(queries.duration, endpoint=endpoint)
+        REQUEST_EXTERNAL_DURATION.observe(external[0], endpoint=endpoint)
+        size = response_size(response)
+        if size is not None:
+            RESPONSE_SIZE.observe(size, endpoint=endpoint)
+
+        REGISTRY.flush()
+        return response
+
+
+def trace_query(execute, sql, params, many, context):
+    """Database execute wrapper opening a span per query"""
+    if current_span().span_id is None:
+        return execute(sql, params, many, context)
+    with span('db.query', kind='client', **{
+            'db.system': context['connection'].vendor,
+            'db.statement': sql[:500]}):
+        return execute(sql, params, many, context)
+
+
+class TracingMiddleware:
+    """
+    Open a root span per request; spans of provider calls and processing
+    phases made while handling it nest under it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with span(f"HTTP {request.method}", kind='server', **{
+                'http.method': request.method, 'http.target': request.path}) as root:
+            with ExitStack() as stack:
+                if settings.TRACING_DB_QUERIES and root.span_id is not None:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(trace_query))
+                response = self.get_response(request)
+
+            if root.span_id is not None:
+                endpoint = endpoint_name(request)
+                root.name = f"{request.method} {endpoint}"
+                root.set_attribute('http.route', endpoint)
+                root.set_attribute('http.status_code', response.status_code)
+                user = getattr(request, 'user', None)
+                if user is not None and user.is_authenticated:
+                    root.set_attribute('user.id', user.id)
+                if response.status_code >= 500:
+                    root.set_error(f"HTTP {response.status_code}")
+            return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests selected by an active `ProfilingRule`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+        try:
+            rule = rule_for_request(request)
+        except Exception:
+            logger.error("Error checking profiling rules", exc_info=True)
+            rule = None
+        if rule is None:
+            return self.get_response(request)
+
+        sampler = StackSampler().start() if rule.mode in ('stacks', 'both') else None
+        profiler = cProfile.Profile() if rule.mode in ('cprofile', 'both') else None
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            if sampler is not None:
+                sampler.stop()
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        try:
+            if sampler is not None:
+                save_capture(rule, 'stacks', request, response, duration_ms,
+                             sampler.collapsed().encode(), sampler.sample_count)
+            if profiler is not None:
+                save_capture(rule, 'cprofile', request, response, duration_ms,
+                             pstats_dump(profiler))
+            prune_captures()
+        except Exception:
+            logger.error(f"Failed to store profile of {rule.endpoint}", exc_info=True)
+        return response
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfilingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(help_text='URL pattern name, e.g. calls-get-call-history', max_length=100)),
+                ('mode', models.CharField(choices=[('stacks', 'Stack sampling'), ('cprofile', 'cProfile'), ('both', 'Stack sampling and cProfile')], default='stacks', max_length=10)),
+                ('sample_rate', models.FloatField(default=0.01, help_text='Fraction of matching requests to profile (0-1)')),
+                ('enabled', models.BooleanField(default=True)),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Stop profiling after this time', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiling_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProfileCapture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('stacks', 'Collapsed stack samples'), ('cprofile', 'cProfile stats')], max_length=10)),
+                ('endpoint', models.CharField(max_length=100)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('duration_ms', models.FloatField()),
+                ('sample_count', models.PositiveIntegerField(default=0, help_text='Stack samples taken (stack sampling only)')),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField(help_text='Uncompressed size in bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profile_captures', to=settings.AUTH_USER_MODEL)),
+                ('rule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='captures', to='monitoring.profilingrule')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['endpoint', '-created_at'], name='capture_endpoint_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class ProfilingRule(models.Model):
+    """
+    Turns on profiling for a fraction of requests to one endpoint.
+
+    Managed by staff in the admin; the middleware picks up changes within
+    `PROFILING_RULES_CACHE_SECONDS` without a redeploy.
+    """
+    MODE_CHOICES = [
+        ('stacks', 'Stack sampling'),
+        ('cprofile', 'cProfile'),
+        ('both', 'Stack sampling and cProfile'),
+    ]
+
+    endpoint = models.CharField(
+        max_length=100, help_text="URL pattern name, e.g. calls-get-call-history")
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='stacks')
+    sample_rate = models.FloatField(
+        default=0.01, help_text="Fraction of matching requests to profile (0-1)")
+    enabled = models.BooleanField(default=True)
+    expires_at = models.DateTimeField(
+        null=True, blank=True, help_text="Stop profiling after this time")
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='profiling_rules')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.endpoint} ({self.mode}, {self.sample_rate:.1%})"
+
+
+class ProfileCapture(models.Model):
+    """
+    A profile of one request, kept for `PROFILING_RETENTION_DAYS`.
+    """
+    KIND_CHOICES = [
+        ('stacks', 'Collapsed stack samples'),
+        ('cprofile', 'cProfile stats'),
+    ]
+
+    rule = models.ForeignKey(
+        ProfilingRule, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='captures')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    endpoint = models.CharField(max_length=100)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='profile_captures')
+    duration_ms = models.FloatField()
+    sample_count = models.PositiveIntegerField(
+        default=0, help_text="Stack samples taken (stack sampling only)")
+    # zlib-compressed profile: collapsed stacks text or marshalled pstats
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(help_text="Uncompressed size in bytes")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['endpoint', '-created_at'], name='capture_endpoint_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} profile of {self.method} {self.endpoint} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,184 @@
+"""
+On-demand request profiling.
+
+Staff create a `ProfilingRule` for an endpoint in the admin. The
+`ProfilingMiddleware` then profiles that fraction of requests to it. Each
+profiled request is captured in one or both of these ways:
+
+- Stack sampling: a background thread snapshots the request thread's stack
+  every `PROFILING_SAMPLE_INTERVAL` seconds. This has low overhead. The
+  result uses the collapsed "frame;frame;frame count" format read by
+  flamegraph.pl, speedscope and inferno.
+- cProfile: deterministic profiling of every call. This is exact but slows
+  the request down. The result is a marshalled pstats dump, readable with
+  `pstats` or snakeviz.
+
+Captures are stored compressed in `ProfileCapture`. They are pruned to
+`PROFILING_RETENTION_DAYS` and `PROFILING_MAX_CAPTURES`.
+"""
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+
+from .models import ProfileCapture, ProfilingRule
+
+logger = logging.getLogger(__name__)
+
+_rules = None
+_rules_loaded_at = 0.0
+_rules_lock = threading.Lock()
+
+
+def active_rules():
+    """
+    Return enabled, unexpired rules by endpoint, cached briefly in-process.
+    """
+    global _rules, _rules_loaded_at
+    now = time.monotonic()
+    if _rules is not None and now - _rules_loaded_at < settings.PROFILING_RULES_CACHE_SECONDS:
+        return _rules
+
+    with _rules_lock:
+        if _rules is None or now - _rules_loaded_at >= settings.PROFILING_RULES_CACHE_SECONDS:
+            rules = {}
+            queryset = ProfilingRule.objects.filter(enabled=True).exclude(
+                expires_at__lte=timezone.now())
+            for rule in queryset:
+                rules.setdefault(rule.endpoint, rule)
+            _rules = rules
+            _rules_loaded_at = now
+    return _rules
+
+
+def clear_rules_cache():
+    global _rules
+    with _rules_lock:
+        _rules = None
+
+
+def rule_for_request(request):
+    """Return the rule selecting this request for profiling, if any"""
+    rules = active_rules()
+    if not rules:
+        return None
+    try:
+        match = resolve(request.path_info, getattr(request, 'urlconf', None))
+    except Resolver404:
+        return None
+    rule = rules.get(match.view_name)
+    if rule is None or random.random() >= rule.sample_rate:
+        return None
+    return rule
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Sample the stack of one thread at a fixed interval from a helper thread.
+    """
+
+    def __init__(self, thread_id=None, interval=None):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval or settings.PROFILING_SAMPLE_INTERVAL
+        self.stacks = Counter()
+        self.sample_count = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+                self.sample_count += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """Samples in collapsed-stack format, one "stack count" line per stack"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def pstats_dump(profiler):
+    """Marshalled stats of a cProfile run, as written by `Profile.dump_stats`"""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def save_capture(rule, kind, request, response, duration_ms, payload, sample_count=0):
+    user = getattr(request, 'user', None)
+    return ProfileCapture.objects.create(
+        rule=rule,
+        kind=kind,
+        endpoint=rule.endpoint,
+        method=request.method,
+        path=request.path[:500],
+        status_code=getattr(response, 'status_code', None),
+        user=user if user is not None and user.is_authenticated else None,
+        duration_ms=duration_ms,
+        sample_count=sample_count,
+        data=zlib.compress(payload),
+        size=len(payload),
+    )
+
+
+def prune_captures():
+    """Apply the retention limits to stored captures"""
+    cutoff = timezone.now() - timedelta(days=settings.PROFILING_RETENTION_DAYS)
+    ProfileCapture.objects.filter(created_at__lt=cutoff).delete()
+
+    excess_ids = list(
+        ProfileCapture.objects.order_by('-created_at', '-id')
+        .values_list('id', flat=True)[settings.PROFILING_MAX_CAPTURES:]
+    )
+    if excess_ids:
+        ProfileCapture.objects.filter(id__in=excess_ids).delete()
+
+
+def capture_download(capture):
+    """
+    Return `(content, filename, content_type)` for downloading a capture.
+    """
+    content = zlib.decompress(bytes(capture.data))
+    stem = f"{capture.endpoint}-{capture.id}"
+    if capture.kind == 'cprofile':
+        return content, f"{stem}.prof", 'application/octet-stream'
+    return content, f"{stem}.collapsed.txt", 'text/plain; charset=utf-8'
+
+
+def profile_stats_text(capture, limit=40):
+    """Human-readable top functions of a cProfile capture by cumulative time"""
+    with tempfile.NamedTemporaryFile(suffix='.prof') as dump:
+        dump.write(zlib.decompress(bytes(capture.data)))
+        dump.flush()
+        output = io.StringIO()
+        pstats.Stats(dump.name, stream=output).sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,312 @@
+"""
+Lightweight tracing for provider calls and processing phases.
+
+`span()` opens a timed span nested under the current one:
+
+    with span('twilio.recordings.list', call_sid=sid) as current:
+        ...
+        current.set_attribute('count', len(recordings))
+
+The HTTP middleware opens a root span per request. Background pipeline
+tasks start their own traces. Finished spans go to the exporter selected by
+`TRACING_EXPORTER`:
+
+- `json`: appends one JSON object per span to `TRACING_JSON_PATH`.
+- `otlp`: batches spans to an OpenTelemetry collector using OTLP/HTTP JSON.
+- A dotted path to a class with `export(spans)` and `shutdown()` methods.
+
+With the exporter set to `none` (the default), spans are no-ops.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_current_span = ContextVar('current_span', default=None)
+
+
+class Span:
+    def __init__(self, name, trace_id, parent_id=None, attributes=None, kind='internal'):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = 'ok'
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, error):
+        self.status = 'error'
+        self.error = str(error)
+
+    @property
+    def duration_ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'kind': self.kind,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round(self.duration_ms, 3),
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+
+class NoopSpan:
+    """Stand-in used while tracing is disabled or the trace is not sampled"""
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, error):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class JSONFileExporter:
+    """Append finished spans to a file as JSON lines"""
+
+    def __init__(self, path=None):
+        self.path = path or settings.TRACING_JSON_PATH
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans):
+        lines = ''.join(json.dumps(finished.to_dict()) + '\n' for finished in spans)
+        with self._lock, open(self.path, 'a') as output:
+            output.write(lines)
+
+    def shutdown(self):
+        pass
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+OTLP_SPAN_KINDS = {'internal': 1, 'server': 2, 'client': 3}
+
+
+def otlp_payload(spans, service_name):
+    """Encode spans as an OTLP/HTTP JSON `ExportTraceServiceRequest`"""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': service_name}}]},
+            'scopeSpans': [{
+                'scope': {'name': 'smartcallr'},
+                'spans': [
+                    {
+                        'traceId': finished.trace_id,
+                        'spanId': finished.span_id,
+                        'parentSpanId': finished.parent_id or '',
+                        'name': finished.name,
+                        'kind': OTLP_SPAN_KINDS.get(finished.kind, 1),
+                        'startTimeUnixNano': str(finished.start_ns),
+                        'endTimeUnixNano': str(finished.end_ns),
+                        'attributes': [
+                            {'key': key, 'value': _otlp_value(value)}
+                            for key, value in finished.attributes.items()
+                        ],
+                        'status': (
+                            {'code': 2, 'message': finished.error or ''}
+                            if finished.status == 'error' else {'code': 1}
+                        ),
+                    }
+                    for finished in spans
+                ],
+            }],
+        }]
+    }
+
+
+class OTLPExporter:
+    """
+    Send spans to an OTLP/HTTP collector (e.g. the OpenTelemetry Collector,
+    Jaeger or Tempo at `/v1/traces`) in batches from a background thread,
+    so requests never wait on the collector.
+    """
+
+    def __init__(self, endpoint=None, max_batch=512, interval=2.0, max_queue=10000):
+        self.endpoint = endpoint or settings.TRACING_OTLP_ENDPOINT
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='otlp-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, spans):
+        for finished in spans:
+            try:
+                self._queue.put_nowait(finished)
+            except queue.Full:
+                # Drop rather than block the request when the collector is down
+                logger.warning("Trace export queue full, dropping span")
+                return
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, batch):
+        try:
+            response = requests.post(
+                self.endpoint,
+                json=otlp_payload(batch, settings.TRACING_SERVICE_NAME),
+                timeout=5,
+            )
+            if response.status_code >= 400:
+                logger.warning(f"OTLP collector returned HTTP {response.status_code}")
+        except requests.RequestException as e:
+            logger.warning(f"Failed to export spans: {e}")
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            while batch := self._drain():
+                self._send(batch)
+
+    def shutdown(self):
+        self._stopped.set()
+        self._thread.join(timeout=5)
+        while batch := self._drain():
+            self._send(batch)
+
+
+EXPORTERS = {
+    'json': JSONFileExporter,
+    'otlp': OTLPExporter,
+}
+
+_exporter = None
+_exporter_name = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """Return the exporter configured by `TRACING_EXPORTER`, or None"""
+    global _exporter, _exporter_name
+    name = settings.TRACING_EXPORTER
+    if not name or name == 'none':
+        return None
+    if _exporter is not None and _exporter_name == name:
+        return _exporter
+
+    with _exporter_lock:
+        if _exporter is None or _exporter_name != name:
+            if _exporter is not None:
+                _exporter.shutdown()
+            exporter_class = EXPORTERS.get(name) or import_string(name)
+            _exporter = exporter_class()
+            _exporter_name = name
+        return _exporter
+
+
+def shutdown():
+    """Flush and stop the exporter"""
+    global _exporter, _exporter_name
+    with _exporter_lock:
+        if _exporter is not None:
+            _exporter.shutdown()
+        _exporter = None
+        _exporter_name = None
+
+
+atexit.register(shutdown)
+
+
+def current_span():
+    """Return the innermost open span (a no-op span outside any trace)"""
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name, kind='internal', **attributes):
+    """
+    Time a block as a span nested under the current span.
+
+    Exceptions are recorded on the span and re-raised.
+    """
+    parent = _current_span.get()
+    if parent is NOOP_SPAN:
+        # Inside a trace that was not sampled
+        yield NOOP_SPAN
+        return
+
+    if parent is None:
+        exporter = get_exporter()
+        if exporter is None or random.random() >= settings.TRACING_SAMPLE_RATE:
+            token = _current_span.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+        current = Span(name, f"{random.getrandbits(128):032x}", attributes=attributes, kind=kind)
+    else:
+        current = Span(name, parent.trace_id, parent.span_id, attributes, kind)
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        _finish(current)
+
+
+def _finish(finished):
+    exporter = get_exporter()
+    if exporter is None:
+        return
+    try:
+        exporter.export([finished])
+    except Exception:
+        logger.error("Failed to export span", exc_info=True)
@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+from .views import MetricsViewSet, ReadinessViewSet
+
+router = DefaultRouter()
+router.register('metrics', MetricsViewSet, basename='metrics')
+router.register('ready', ReadinessViewSet, basename='ready')
+urlpatterns = router.urls
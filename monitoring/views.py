@@ -0,0 +1,83 @@
+import hmac
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import viewsets, status
+from rest_framework.permissions import AllowAny
+
+from utils.response_template import custom_error_response, custom_success_response
+from . import warmup
+from .metrics import REGISTRY, render_prometheus
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    # Scraped by Prometheus, protected by METRICS_AUTH_TOKEN
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def list(self, request):
+        """
+        Serve the metrics of all server processes in Prometheus text format.
+
+        Scrapers must send `METRICS_AUTH_TOKEN` as a bearer token. Without a
+        token configured, metrics are only served with `METRICS_PUBLIC`.
+        """
+        try:
+            token = settings.METRICS_AUTH_TOKEN
+            if not token and not settings.METRICS_PUBLIC:
+                return custom_error_response(
+                    message="Metrics are disabled: METRICS_AUTH_TOKEN is not set",
+                    status_code=status.HTTP_403_FORBIDDEN
+                )
+            if token and not hmac.compare_digest(
+                    request.headers.get('Authorization', ''), f"Bearer {token}"):
+                return custom_error_response(
+                    message="Invalid metrics token",
+                    status_code=status.HTTP_401_UNAUTHORIZED
+                )
+
+            body = render_prometheus(REGISTRY.collect())
+            return HttpResponse(body, content_type=PROMETHEUS_CONTENT_TYPE)
+        except Exception as e:
+            logger.error("Error rendering metrics", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+
+class ReadinessViewSet(viewsets.ViewSet):
+    # Polled by load balancers and orchestrators before routing traffic
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def list(self, request):
+        """
+        Report whether this process finished its warmup (monitoring/warmup.py).
+
+        Returns 200 with the step timings once every step succeeded and 503
+        otherwise. A warmup that is pending (e.g. WARMUP_ENABLED off) or
+        failed is run by the check.
+        """
+        try:
+            state = warmup.state()
+            if state['status'] != 'ready':
+                state = warmup.warmup()
+            if state['status'] != 'ready':
+                # The message carries the state, including failed steps
+                return custom_error_response(
+                    message=state,
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            return custom_success_response(state)
+        except Exception as e:
+            logger.error("Error checking readiness", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
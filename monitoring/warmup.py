@@ -0,0 +1,170 @@
+"""
+Application warmup: do the one-off work of a process's first request
+before it serves traffic.
+
+`backend/wsgi.py` and `backend/asgi.py` call `warmup()` once the application
+is loaded. Under
+`gunicorn --preload` that happens once in the master before the workers
+are forked, and the workers inherit the warm state. Without preload it
+happens in each worker at boot. The steps:
+
+- urls: compile every URL pattern and build the reverse lookup tables
+- models: fill the model metadata caches and compile a query per model
+- serializers: build the fields and validators of the API serializers
+- authentication: load the JWT token backend (imports PyJWT)
+- providers: import the Twilio and OpenAI SDKs (see `calls/ai_service.py`)
+- database: connect to every database alias and close the connection
+  again (with DB_POOL it goes back to the pool, which stays open)
+
+Database connections must not be shared across fork: the gunicorn
+`pre_fork` hook closes them in the master with `close_database_connections()`
+and `post_worker_init` checks the database again from each worker with
+`warmup(steps=['database'])`.
+
+`/ready/` reports the result: 200 once every step succeeded, 503 when a
+step failed. Pending or failed steps are run by the check itself.
+"""
+import logging
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+WARMUP_SERIALIZERS = [
+    'calls.serializers.CallSerializer',
+    'calls.serializers.CallSummarySerializer',
+    'calls.serializers.InitiateCallSerializer',
+    'leads.serializers.LeadSerializer',
+    'leads.serializers.LeadListSerializer',
+    'leads.serializers.LeadListQuerySerializer',
+    'leads.serializers.CreateLeadSerializer',
+]
+
+_lock = threading.Lock()
+_state = {
+    'status': 'pending',
+    'started_at': None,
+    'finished_at': None,
+    'steps': {},
+    'errors': {},
+}
+
+
+def _compile_patterns(patterns):
+    for pattern in patterns:
+        # The regex is compiled on first access
+        pattern.pattern.regex
+        if isinstance(pattern, URLResolver):
+            _compile_patterns(pattern.url_patterns)
+
+
+def warm_urls():
+    resolver = get_resolver()
+    resolver.reverse_dict
+    _compile_patterns(resolver.url_patterns)
+
+
+def warm_models():
+    for model in apps.get_models():
+        model._meta.get_fields()
+        model._meta.concrete_fields
+        # Compiles the SQL without running it
+        str(model._default_manager.all().query)
+
+
+def warm_serializers():
+    for path in WARMUP_SERIALIZERS:
+        serializer_class = import_string(path)
+        serializer_class().fields
+        serializer_class(data={}).is_valid()
+
+
+def warm_authentication():
+    from rest_framework.settings import api_settings
+
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        authenticator = authentication_class()
+        if hasattr(authenticator, 'get_validated_token'):
+            # Rejected, but loads and runs the token backend once
+            try:
+                authenticator.get_validated_token(b'warmup')
+            except Exception:
+                pass
+
+
+def warm_providers():
+    from calls.twilio_service import timed_http_client_class
+    import openai  # noqa: F401
+    import twilio.rest  # noqa: F401
+
+    timed_http_client_class()
+
+
+def warm_database():
+    # Warmup runs on a thread that serves no requests, so its connection
+    # would stay open unused
+    for alias in settings.DATABASES:
+        connection = connections[alias]
+        connection.ensure_connection()
+        connection.close()
+
+
+def close_database_connections():
+    """Close every connection and pool, e.g. in the master before forking"""
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if connection.settings_dict.get('OPTIONS', {}).get('pool'):
+            connection.close_pool()
+
+
+STEPS = {
+    'urls': warm_urls,
+    'models': warm_models,
+    'serializers': warm_serializers,
+    'authentication': warm_authentication,
+    'providers': warm_providers,
+    'database': warm_database,
+}
+
+
+def warmup(steps=None):
+    """
+    Run the warmup steps that have not succeeded yet, or the named `steps`
+    again; return the state.
+
+    A failing step is logged and recorded but never raised, so a worker
+    still starts when e.g. the database is briefly unreachable.
+    """
+    with _lock:
+        _state['started_at'] = _state['started_at'] or time.time()
+        for name, step in STEPS.items():
+            if steps is not None:
+                if name not in steps:
+                    continue
+            elif name in _state['steps'] or (
+                    name == 'providers' and not settings.WARMUP_PROVIDER_SDKS):
+                continue
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.error(f"Warmup step {name} failed: {str(e)}")
+                _state['errors'][name] = str(e)
+                continue
+            _state['steps'][name] = round((time.perf_counter() - started) * 1000, 1)
+            _state['errors'].pop(name, None)
+
+        _state['status'] = 'failed' if _state['errors'] else 'ready'
+        _state['finished_at'] = time.time()
+        logger.info(f"Warmup {_state['status']}: {_state['steps']}")
+        return state()
+
+
+def state():
+    return {**_state, 'steps': dict(_state['steps']), 'errors': dict(_state['errors'])}
@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ['deleted_at', 'model', 'object_id', 'user_id']
+    list_filter = ['model']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
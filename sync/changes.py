@@ -0,0 +1,139 @@
+"""
+Change feed for offline clients: the leads and calls of a user created,
+updated or deleted since a sync token.
+
+Each of the three streams (leads and calls by `updated_at`, tombstones by
+`deleted_at`) is read in `(timestamp, id)` order from a cursor, using the
+`*_updated_idx` / `tombstone_user_deleted_idx` indexes, and at most `limit`
+rows per stream are returned. The next token holds the three cursors; while
+`has_more` is true the client asks again with it right away.
+
+A first sync (no token) returns every lead and call but no deletions. Rows
+can commit slightly after their `updated_at` was set, so once a stream is
+caught up its cursor is set to `SYNC_OVERLAP_SECONDS` before the request,
+even if paging had moved it past that: the next sync sends the most recent changes again rather than
+miss a late commit. Clients apply the feed as upserts, so repeats are
+harmless.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+
+from calls.models import Call
+from leads.models import Lead
+from .models import Tombstone
+
+TOKEN_SALT = 'sync.changes'
+TOKEN_VERSION = 1
+
+
+class InvalidSyncToken(Exception):
+    pass
+
+
+class ExpiredSyncToken(Exception):
+    """The token is older than the tombstones; the client must sync again in full"""
+
+
+def encode_token(cursors):
+    payload = {'v': TOKEN_VERSION}
+    for stream, cursor in cursors.items():
+        payload[stream] = cursor and [cursor[0].isoformat(), cursor[1]]
+    return signing.dumps(payload, salt=TOKEN_SALT, compress=True)
+
+
+def decode_token(token):
+    """Return the `{stream: (timestamp, id) or None}` cursors of a token"""
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT)
+        if payload.get('v') != TOKEN_VERSION:
+            raise ValueError("unknown version")
+        return {
+            stream: payload[stream] and (datetime.fromisoformat(payload[stream][0]),
+                                         int(payload[stream][1]))
+            for stream in ('leads', 'calls', 'deleted')
+        }
+    except (signing.BadSignature, KeyError, TypeError, ValueError) as e:
+        raise InvalidSyncToken(str(e))
+
+
+def _after(queryset, field, cursor, limit):
+    """Rows after `cursor` in `(field, id)` order, one more than `limit`"""
+    if cursor is not None:
+        timestamp, last_id = cursor
+        queryset = queryset.filter(
+            Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': last_id}))
+    return list(queryset.order_by(field, 'id')[:limit + 1])
+
+
+def _read(queryset, field, cursor, limit, horizon):
+    """
+    Return a page of a stream, the cursor to continue from and whether more
+    rows are waiting.
+    """
+    rows = _after(queryset, field, cursor, limit)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, (getattr(last, field), last.id), True
+    # Caught up: continue from the overlap horizon, even when the last page
+    # ended past it, so rows committed late behind that page are still sent
+    return rows, horizon, False
+
+
+def get_changes(user, token=None, limit=None):
+    """
+    Return the user's changes since `token`.
+
+    Returns:
+        dict: `leads` and `calls` (model instances, calls with their lead),
+        `deleted` (`{'leads': [ids], 'calls': [ids]}`), the next
+        `sync_token` and `has_more`.
+
+    Raises:
+        InvalidSyncToken: The token was not issued by this server.
+        ExpiredSyncToken: Deletions since the token may already be pruned.
+    """
+    limit = limit or settings.SYNC_PAGE_SIZE
+    now = timezone.now()
+    horizon = (now - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS), 0)
+
+    if token:
+        cursors = decode_token(token)
+        retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        if cursors['deleted'] is None or cursors['deleted'][0] < now - retention:
+            raise ExpiredSyncToken()
+    else:
+        # A new client has nothing to delete
+        cursors = {'leads': None, 'calls': None, 'deleted': horizon}
+
+    leads, cursors['leads'], more_leads = _read(
+        Lead.objects.filter(created_by=user), 'updated_at', cursors['leads'], limit, horizon)
+    calls, cursors['calls'], more_calls = _read(
+        Call.objects.filter(user=user).select_related('lead'),
+        'updated_at', cursors['calls'], limit, horizon)
+    tombstones, cursors['deleted'], more_deleted = _read(
+        Tombstone.objects.filter(user=user), 'deleted_at', cursors['deleted'], limit, horizon)
+
+    deleted = {'leads': [], 'calls': []}
+    for tombstone in tombstones:
+        deleted[f'{tombstone.model}s'].append(tombstone.object_id)
+
+    return {
+        'leads': leads,
+        'calls': calls,
+        'deleted': deleted,
+        'sync_token': encode_token(cursors),
+        'has_more': more_leads or more_calls or more_deleted,
+    }
+
+
+def prune_tombstones(retention_days=None):
+    """Delete tombstones past the retention period; return how many"""
+    retention_days = retention_days or settings.SYNC_TOMBSTONE_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sync.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sync tombstones older than the retention period. Clients "
+        "with an older sync token are told to sync again in full."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help="Keep tombstones for this many days")
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(options['days'])
+        self.stdout.write(f"Deleted {deleted} tombstones")
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Marks a deleted lead or call so sync clients can drop their copy.
+
+    Written by the post_delete handlers in `sync/signals.py` and kept for
+    `SYNC_TOMBSTONE_RETENTION_DAYS`; older sync tokens must start over.
+    """
+    MODEL_CHOICES = [
+        ('lead', 'Lead'),
+        ('call', 'Call'),
+    ]
+
+    # No database constraint: deleting a user deletes their leads and calls,
+    # which writes tombstones for a user that is about to disappear
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id'],
+                         name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.model} {self.object_id}"
@@ -0,0 +1,26 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from calls.serializers import CallListSerializer
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    """
+    Query parameters accepted by the change feed endpoint.
+    """
+    token = serializers.CharField(required=False, allow_blank=True)
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_limit(self, value):
+        return min(value, settings.SYNC_MAX_PAGE_SIZE)
+
+
+class SyncCallSerializer(CallListSerializer):
+    """
+    Calls as sent to sync clients, which link them to their lead by id.
+    Like call lists, they leave out the transcript, summary and notes.
+    """
+
+    class Meta(CallListSerializer.Meta):
+        fields = CallListSerializer.Meta.fields + ['lead']
+        read_only_fields = CallListSerializer.Meta.read_only_fields + ['lead']
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from calls.models import Call
+from leads.models import Lead
+from .models import Tombstone
+
+
+@receiver(post_delete, sender=Lead, dispatch_uid='sync_lead_tombstone')
+def record_deleted_lead(sender, instance, **kwargs):
+    Tombstone.objects.create(user_id=instance.created_by_id, model='lead', object_id=instance.id)
+
+
+@receiver(post_delete, sender=Call, dispatch_uid='sync_call_tombstone')
+def record_deleted_call(sender, instance, **kwargs):
+    Tombstone.objects.create(user_id=instance.user_id, model='call', object_id=instance.id)
@@ -0,0 +1,6 @@
+from rest_framework.routers import DefaultRouter
+from .views import SyncViewSet
+
+router = DefaultRouter()
+router.register('sync', SyncViewSet, basename='sync')
+urlpatterns = router.urls
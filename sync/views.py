@@ -0,0 +1,60 @@
+import logging
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+
+from leads.serializers import LeadSerializer
+from .changes import ExpiredSyncToken, InvalidSyncToken, get_changes
+from .serializers import SyncCallSerializer, SyncQuerySerializer
+from utils.response_template import custom_success_response, custom_error_response
+
+logger = logging.getLogger(__name__)
+
+
+class SyncViewSet(viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+
+    # Not routed to a replica: replication lag could move the token past
+    # rows the replica hasn't received yet
+    @action(detail=False, methods=['GET'], url_path='changes')
+    def changes(self, request):
+        """
+        Leads and calls changed since `token` (see sync/changes.py).
+
+        Query params: `token` (from the previous response; omit for a full
+        sync), `limit` (rows per stream). Returns `{"leads", "calls",
+        "deleted": {"leads", "calls"}, "sync_token", "has_more"}`. An
+        expired token gets a 410: the client must discard its data and sync
+        again without a token.
+        """
+        try:
+            logger.info("Fetching sync changes", extra={"user": request.user})
+            query_serializer = SyncQuerySerializer(data=request.query_params)
+            if not query_serializer.is_valid():
+                return custom_error_response(
+                    message=query_serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            params = query_serializer.validated_data
+
+            changes = get_changes(request.user, params.get('token'), params.get('limit'))
+            changes['leads'] = LeadSerializer(changes['leads'], many=True).data
+            changes['calls'] = SyncCallSerializer(changes['calls'], many=True).data
+            return custom_success_response(changes)
+
+        except InvalidSyncToken:
+            return custom_error_response(
+                message="Invalid sync token",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except ExpiredSyncToken:
+            return custom_error_response(
+                message="Sync token expired, sync again without a token",
+                status_code=status.HTTP_410_GONE
+            )
+        except Exception as e:
+            logger.error("Error fetching sync changes", exc_info=True)
+            return custom_error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
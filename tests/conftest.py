@@ -0,0 +1,91 @@
+"""
+Fixtures shared by the whole test suite.
+
+- `class_db`: a transaction held open for a test class. Data created by a
+  class-scoped fixture that depends on it is built once and rolled back
+  after the last test. Each test runs in its own savepoint inside it, so
+  the tests still can't see each other's writes.
+- `mock_twilio` / `mock_ai`: in-process mocks of TwilioService and
+  AIService for tests that don't care about HTTP.
+- `fake_twilio` / `fake_openai`: the HTTP fakes from `fake_providers`. One
+  server per session (per worker under xdist), reset before every test.
+
+Tests are safe to run in parallel with `pytest -n auto --dist loadscope`.
+Every xdist worker gets its own in-memory database, and `loadscope` keeps
+the tests of a class on one worker, so class datasets are built once.
+"""
+from unittest import mock
+
+import pytest
+from django.db import transaction
+
+from tests.fake_providers import FakeOpenAIAPI, FakeTwilioAPI
+
+
+@pytest.fixture(scope='class')
+def class_db(django_db_setup, django_db_blocker):
+    """Open a transaction for the class that is rolled back afterwards"""
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+
+
+@pytest.fixture
+def mock_twilio():
+    """TwilioService mock shared by the views and the recording pipeline"""
+    service = mock.Mock()
+    service.end_call.return_value = {'success': True, 'status': 'completed'}
+    service.get_call_recordings.return_value = {
+        'success': True,
+        'recordings': [{'sid': 'RE1', 'status': 'completed'}]
+    }
+    service.download_recording.return_value = {
+        'success': True, 'file_path': 'x.mp3', 'duration': '12'}
+    with mock.patch('calls.views.TwilioService', return_value=service), \
+            mock.patch('calls.recording_pipeline.TwilioService', return_value=service):
+        yield service
+
+
+@pytest.fixture
+def mock_ai():
+    """AIService mock used by the recording pipeline"""
+    service = mock.Mock()
+    service.transcribe_audio_segments.return_value = {
+        'success': True, 'transcription': 'Hello there',
+        'segments': [{'start_ms': 0, 'end_ms': 900, 'text': 'Hello there'}]}
+    service.summarize_structured.return_value = {
+        'success': True, 'summary': {'purpose': 'Greeting', 'action_items': []}}
+    with mock.patch('calls.recording_pipeline.AIService', return_value=service):
+        yield service
+
+
+@pytest.fixture(scope='session')
+def fake_twilio_server():
+    fake = FakeTwilioAPI(seed=1).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture(scope='session')
+def fake_openai_server():
+    fake = FakeOpenAIAPI(seed=1).start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def fake_twilio(fake_twilio_server, settings):
+    """Fake Twilio API that TwilioService talks to for the test"""
+    fake_twilio_server.reset()
+    settings.TWILIO_API_BASE_URL = fake_twilio_server.base_url
+    return fake_twilio_server
+
+
+@pytest.fixture
+def fake_openai(fake_openai_server, settings, monkeypatch):
+    """Fake OpenAI API that AIService talks to for the test"""
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    fake_openai_server.reset()
+    settings.OPENAI_API_BASE_URL = fake_openai_server.base_url
+    return fake_openai_server
@@ -1,6 +1,6 @@
 import factory
 from django.contrib.auth.models import User
-from datetime import datetime
+from datetime import timezone
 from faker import Faker
 from leads.models import Lead
 from calls.models import Call
@@ -8,6 +8,14 @@ from calls.models import Call
 fake = Faker()
 
 
+def phone_number():
+    """Faker phone number that fits Lead.phone/Call.phone_number (20 chars)"""
+    while True:
+        value = fake.phone_number()
+        if len(value) <= 20:
+            return value
+
+
 class UserFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = User
@@ -30,7 +38,7 @@ class LeadFactory(factory.django.DjangoModelFactory):
         model = Lead
 
     name = factory.Faker('name')
-    phone = factory.Faker('phone_number')
+    phone = factory.LazyFunction(phone_number)
     email = factory.Faker('email')
     created_by = factory.SubFactory(UserFactory)
 
@@ -40,15 +48,13 @@ class CallFactory(factory.django.DjangoModelFactory):
         model = Call
 
     lead = factory.SubFactory(LeadFactory)
-    phone_number = factory.Faker('phone_number')
-    start_time = factory.Faker('date_time_this_year')
-    end_time = factory.LazyAttribute(lambda obj: fake.date_time_between_dates(
-        datetime_start=obj.start_time,
-        datetime_end=obj.start_time.replace(hour=23, minute=59, second=59)
-    ))
-    status = factory.Iterator(['completed', 'failed', 'busy', 'no-answer'])
-    transcription = factory.Faker('text', max_nb_chars=500)
-    summary = factory.Faker('text', max_nb_chars=200)
+    user = factory.LazyAttribute(lambda obj: obj.lead.created_by)
+    phone_number = factory.LazyAttribute(lambda obj: obj.lead.phone)
+    end_time = factory.Faker('date_time_this_year', tzinfo=timezone.utc)
+    status = factory.Iterator(['completed', 'failed', 'busy', 'no_answer'])
+    duration = factory.Faker('random_int', min=0, max=1800)
+    transcribe_content = factory.Faker('text', max_nb_chars=500)
+    summary_content = factory.Faker('text', max_nb_chars=200)
     notes = factory.Faker('text', max_nb_chars=300)
-    recording_url = factory.Faker('url')
-    twilio_call_sid = factory.Faker('uuid4')
+    twilio_call_sid = factory.LazyFunction(
+        lambda: f"CA{fake.hexify('^' * 32)}")
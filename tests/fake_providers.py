@@ -0,0 +1,348 @@
+"""
+Local HTTP servers emulating the Twilio and OpenAI APIs.
+
+Used by tests and by `benchmarks/load_test.py` to exercise `TwilioService`
+and `AIService` without real providers: point the services at a fake with
+the `TWILIO_API_BASE_URL` and `OPENAI_API_BASE_URL` settings. Each fake can
+delay responses (`latency`, seconds or a callable returning seconds) and
+answer a fraction of requests with errors (`errors`, status code to
+probability), and records request counts and the highest concurrency seen.
+"""
+import copy
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+TWILIO_ROUTE_RE = re.compile(
+    r'^/2010-04-01/Accounts/(?P<account>[^/]+)/(?P<resource>Calls|Recordings)'
+    r'(?:/(?P<sid>[^/.]+))?\.(?P<format>json|mp3)$'
+)
+FINAL_CALL_STATUSES = ('completed', 'busy', 'failed', 'no-answer', 'canceled')
+
+
+def lognormal_latency(median, sigma=0.5, rng=None):
+    """
+    Latency distribution with a long tail, like real provider APIs: half of
+    the responses take less than `median` seconds.
+    """
+    rng = rng or random.Random()
+    mu = math.log(median)
+    return lambda: rng.lognormvariate(mu, sigma)
+
+
+class FakeProviderServer:
+    """
+    Base class: a threaded HTTP server dispatching requests to `handle()`.
+    """
+
+    def __init__(self, latency=0.0, errors=None, seed=None, port=0):
+        self.latency = self._initial_latency = latency
+        self.port = port
+        self.errors = errors or {}
+        self._initial_errors = dict(self.errors)
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self.error_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.paths = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        with self._lock:
+            self.request_count = 0
+            self.error_count = 0
+            self.max_in_flight = self.in_flight
+            self.paths.clear()
+
+    def reset(self):
+        """
+        Restore the state the fake started with, so one running server can be
+        shared by many tests.
+        """
+        self.latency = self._initial_latency
+        self.errors = dict(self._initial_errors)
+        self.random = random.Random(self.seed)
+        self.reset_stats()
+
+    def _delay(self):
+        return self.latency() if callable(self.latency) else self.latency
+
+    def _injected_error(self):
+        roll = self.random.random()
+        for status_code, probability in self.errors.items():
+            if roll < probability:
+                return status_code
+            roll -= probability
+        return None
+
+    def handle(self, method, path, query, body):
+        """
+        Return `(status_code, payload, content_type)`; dict payloads are
+        sent as JSON.
+        """
+        raise NotImplementedError
+
+    def error_payload(self, status_code):
+        raise NotImplementedError
+
+    def _dispatch(self, handler, method):
+        with self._lock:
+            self.request_count += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            length = int(handler.headers.get('Content-Length') or 0)
+            body = handler.rfile.read(length) if length else b''
+            delay = self._delay()
+            if delay:
+                time.sleep(delay)
+
+            url = urlsplit(handler.path)
+            with self._lock:
+                self.paths[f"{method} {url.path}"] += 1
+            status_code = self._injected_error()
+            if status_code:
+                with self._lock:
+                    self.error_count += 1
+                response = (status_code, self.error_payload(status_code), 'application/json')
+            else:
+                response = self.handle(method, url.path, parse_qs(url.query), body)
+            self._send(handler, *response)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _send(self, handler, status_code, payload, content_type='application/json'):
+        body = json.dumps(payload).encode() if isinstance(payload, (dict, list)) else payload
+        handler.send_response(status_code)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                fake._dispatch(self, 'GET')
+
+            def do_POST(self):
+                fake._dispatch(self, 'POST')
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeTwilioAPI(FakeProviderServer):
+    """
+    Emulates the Twilio REST endpoints used by TwilioService: creating,
+    fetching and updating calls, listing and fetching recordings and
+    downloading recording audio.
+
+    Point the service at it with `TwilioService(base_url=fake.base_url)` or the
+    `TWILIO_API_BASE_URL` setting. Calls created with `record=True` complete
+    immediately with a finished recording, so status and download requests
+    that follow find them.
+    """
+
+    def __init__(self, latency=0.0, errors=None, seed=None, port=0,
+                 recording_bytes=b'\xff\xfb\x90\x64' * 4096, call_duration=95):
+        super().__init__(latency=latency, errors=errors, seed=seed, port=port)
+        self.recording_bytes = recording_bytes
+        self.call_duration = call_duration
+        self.calls = {}
+        self.recordings = {}
+
+    def reset(self):
+        super().reset()
+        self.calls.clear()
+        self.recordings.clear()
+
+    def _sid(self, prefix):
+        return f"{prefix}{self.random.getrandbits(128):032x}"
+
+    def add_call(self, sid, status, duration=None):
+        """Register a call resource that the fake API will serve"""
+        self.calls[sid] = {
+            'sid': sid,
+            'status': status,
+            'duration': None if duration is None else str(duration),
+            'end_time': (
+                format_datetime(datetime.now(timezone.utc))
+                if status in FINAL_CALL_STATUSES
+                else None
+            ),
+        }
+        return self.calls[sid]
+
+    def add_recording(self, call_sid, status='completed', duration=None):
+        """Register a recording of `call_sid`; returns its sid"""
+        sid = self._sid('RE')
+        self.recordings[sid] = {
+            'sid': sid,
+            'call_sid': call_sid,
+            'status': status,
+            'duration': str(duration or self.call_duration),
+            'date_created': format_datetime(datetime.now(timezone.utc)),
+        }
+        return sid
+
+    def error_payload(self, status_code):
+        return {'code': 20000 + status_code, 'message': 'Injected error',
+                'status': status_code}
+
+    def _not_found(self):
+        return 404, {'code': 20404, 'message': 'Not found', 'status': 404}, 'application/json'
+
+    def _recording_resource(self, account, recording):
+        return {**recording,
+                'uri': f"/2010-04-01/Accounts/{account}/Recordings/{recording['sid']}.json"}
+
+    def handle(self, method, path, query, body):
+        match = TWILIO_ROUTE_RE.match(path)
+        if not match:
+            return self._not_found()
+        account, resource, sid = match.group('account', 'resource', 'sid')
+
+        if resource == 'Calls':
+            form = {key: values[-1] for key, values in parse_qs(body.decode()).items()}
+            if method == 'POST' and sid is None:
+                call = self.add_call(self._sid('CA'), 'completed', self.call_duration)
+                if form.get('Record') == 'true':
+                    self.add_recording(call['sid'])
+                return 201, {**call, 'status': 'queued', 'duration': None,
+                             'end_time': None, 'to': form.get('To')}, 'application/json'
+            call = self.calls.get(sid)
+            if call is None:
+                return self._not_found()
+            if method == 'POST' and form.get('Status'):
+                call.update(status=form['Status'],
+                            end_time=format_datetime(datetime.now(timezone.utc)))
+            return 200, call, 'application/json'
+
+        if sid is None:
+            call_sid = query.get('CallSid', [None])[0]
+            recordings = [
+                self._recording_resource(account, recording)
+                for recording in self.recordings.values()
+                if call_sid is None or recording['call_sid'] == call_sid
+            ]
+            return 200, {'recordings': recordings, 'next_page_uri': None,
+                         'page': 0, 'page_size': 50}, 'application/json'
+        recording = self.recordings.get(sid)
+        if recording is None:
+            return self._not_found()
+        if match.group('format') == 'mp3':
+            return 200, self.recording_bytes, 'audio/mpeg'
+        return 200, self._recording_resource(account, recording), 'application/json'
+
+
+class FakeOpenAIAPI(FakeProviderServer):
+    """
+    Emulates the OpenAI audio transcription and chat completion endpoints
+    used by AIService.
+
+    Point the service at it with `AIService(base_url=fake.base_url)` or the
+    `OPENAI_API_BASE_URL` setting. Transcriptions return `segments`, and
+    chat completions asking for a JSON schema return `summary`.
+    """
+
+    def __init__(self, latency=0.0, errors=None, seed=None, port=0,
+                 segments=None, summary=None):
+        super().__init__(latency=latency, errors=errors, seed=seed, port=port)
+        self.segments = segments or [
+            {'start': 0.0, 'end': 2.5, 'text': ' Hi, this is Sam from SmartCallr.'},
+            {'start': 2.8, 'end': 5.0, 'text': ' Hello, thanks for calling back.'},
+        ]
+        self.summary = summary or {
+            'purpose': 'Follow-up call', 'key_points': ['Lead is interested'],
+            'decisions': [], 'action_items': [], 'interest_level': 'medium',
+            'next_step': 'Send a proposal', 'next_step_date': None, 'additional_notes': '',
+        }
+        self._initial_responses = copy.deepcopy((self.segments, self.summary))
+
+    def reset(self):
+        super().reset()
+        self.segments, self.summary = copy.deepcopy(self._initial_responses)
+
+    @property
+    def base_url(self):
+        return f"{super().base_url}/v1"
+
+    def error_payload(self, status_code):
+        kind = 'rate_limit_exceeded' if status_code == 429 else 'server_error'
+        return {'error': {'message': 'Injected error', 'type': kind, 'code': kind}}
+
+    def handle(self, method, path, query, body):
+        if method == 'POST' and path == '/v1/audio/transcriptions':
+            text = ''.join(segment['text'] for segment in self.segments).strip()
+            if b'verbose_json' not in body:
+                return 200, {'text': text}, 'application/json'
+            return 200, {
+                'task': 'transcribe',
+                'language': 'english',
+                'duration': self.segments[-1]['end'] if self.segments else 0.0,
+                'text': text,
+                'segments': [{'id': index, 'seek': 0, **segment}
+                             for index, segment in enumerate(self.segments)],
+            }, 'application/json'
+
+        if method == 'POST' and path == '/v1/chat/completions':
+            request = json.loads(body or b'{}')
+            response_format = request.get('response_format') or {}
+            content = (
+                json.dumps(self.summary) if response_format.get('type') == 'json_schema'
+                else 'The lead is interested and asked for a proposal.'
+            )
+            prompt_tokens = len(json.dumps(request.get('messages', []))) // 4
+            completion_tokens = len(content) // 4
+            return 200, {
+                'id': f"chatcmpl-{self.random.getrandbits(64):016x}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'gpt-4o-mini'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': completion_tokens,
+                    'total_tokens': prompt_tokens + completion_tokens,
+                },
+            }, 'application/json'
+
+        return 404, {'error': {'message': 'Not found', 'type': 'invalid_request_error',
+                               'code': None}}, 'application/json'
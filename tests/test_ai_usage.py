@@ -0,0 +1,163 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from calls import ai_usage
+from calls.ai_service import AIService
+from calls.models import AIBudget, AIUsage
+from calls.recording_pipeline import process_recording
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.fixture(autouse=True)
+def budgets(settings):
+    settings.AI_BUDGET_USER_PER_HOUR = 1.0
+    settings.AI_BUDGET_GLOBAL_PER_HOUR = 10.0
+    return settings
+
+
+def chat_response(prompt_tokens, completion_tokens):
+    return SimpleNamespace(
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens),
+        choices=[SimpleNamespace(message=SimpleNamespace(content='{"purpose": "Demo"}'))]
+    )
+
+
+def make_service(user, call=None):
+    service = AIService(user=user, call=call)
+    service.openai_client = mock.Mock()
+    return service
+
+
+@pytest.mark.django_db
+class TestAIUsage:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.user = UserFactory()
+        self.call = CallFactory(lead=LeadFactory(created_by=self.user))
+
+    def test_estimate_cost(self):
+        """Test cost estimation for chat and transcription models"""
+        assert ai_usage.estimate_cost('gpt-4o-mini', 1_000_000, 1_000_000) == Decimal('0.75')
+        assert ai_usage.estimate_cost('whisper-1', audio_seconds=90) == Decimal('0.009')
+        assert ai_usage.estimate_cost('unknown-model', 1000, 1000) == 0
+
+    def test_requests_are_aggregated_in_ledger(self):
+        """Test that token usage of repeated requests lands in one ledger row"""
+        service = make_service(self.user, self.call)
+        service.openai_client.chat.completions.create.return_value = chat_response(1000, 200)
+
+        assert service.summarize_structured('Hello')['success']
+        assert service.summarize_structured('Hello')['success']
+
+        usage = AIUsage.objects.get()
+        assert (usage.user, usage.call, usage.operation) == (self.user, self.call, 'summary')
+        assert usage.request_count == 2
+        assert usage.prompt_tokens == 2000
+        assert usage.completion_tokens == 400
+        assert usage.cost == ai_usage.estimate_cost(service.openai_model, 2000, 400)
+
+    def test_transcription_records_audio_seconds(self, tmp_path):
+        """Test that transcriptions are charged by audio duration"""
+        audio = tmp_path / 'call.mp3'
+        audio.write_bytes(b'audio')
+        service = make_service(self.user, self.call)
+        service.openai_client.audio.transcriptions.create.return_value = SimpleNamespace(
+            text='Hi', duration=120.0, segments=[])
+
+        assert service.transcribe_audio(str(audio)) == {'success': True, 'transcription': 'Hi'}
+
+        usage = AIUsage.objects.get()
+        assert usage.audio_seconds == 120.0
+        assert usage.cost == Decimal('0.012')
+
+    def test_failed_requests_count_as_errors(self):
+        """Test that provider errors are recorded without cost"""
+        service = make_service(self.user, self.call)
+        service.openai_client.chat.completions.create.side_effect = RuntimeError('boom')
+
+        assert not service.summarize_transcription('Hello')['success']
+
+        usage = AIUsage.objects.get()
+        assert (usage.request_count, usage.error_count, usage.cost) == (1, 1, 0)
+
+    def test_user_budget_throttles_only_that_user(self, budgets):
+        """Test that a user over budget is throttled while others continue"""
+        budgets.AI_BUDGET_USER_PER_HOUR = 0.01
+        heavy = make_service(self.user)
+        heavy.openai_client.chat.completions.create.return_value = chat_response(100_000, 0)
+
+        assert heavy.summarize_structured('Hello')['success']
+        result = heavy.summarize_structured('Hello')
+        assert result['throttled'] is True
+        assert result['retry_after'] > 0
+        assert heavy.openai_client.chat.completions.create.call_count == 1
+
+        other = make_service(UserFactory())
+        other.openai_client.chat.completions.create.return_value = chat_response(10, 10)
+        assert other.summarize_structured('Hello')['success']
+
+    def test_global_budget_throttles_everyone(self, budgets):
+        """Test that the global budget applies across users"""
+        budgets.AI_BUDGET_GLOBAL_PER_HOUR = 0.01
+        first = make_service(self.user)
+        first.openai_client.chat.completions.create.return_value = chat_response(100_000, 0)
+        assert first.summarize_structured('Hello')['success']
+
+        other = make_service(UserFactory())
+        assert other.summarize_structured('Hello')['throttled'] is True
+
+    def test_spent_budget_refills_over_time(self, budgets):
+        """Test that the shared budget rows refill at the hourly rate"""
+        budgets.AI_BUDGET_USER_PER_HOUR = 0.01
+        ai_usage.charge_budget(self.user.id, Decimal('0.02'))
+        with pytest.raises(ai_usage.AIBudgetExceeded):
+            ai_usage.check_budget(self.user.id)
+
+        AIBudget.objects.update(updated_at=timezone.now() - timedelta(hours=2))
+        ai_usage.check_budget(self.user.id)
+
+    def test_usage_without_call_is_aggregated(self):
+        """Test that requests without a call share one ledger row"""
+        ai_usage.record_usage('summary', 'gpt-4o-mini', self.user.id, None, prompt_tokens=10)
+        ai_usage.record_usage('summary', 'gpt-4o-mini', self.user.id, None, prompt_tokens=10)
+
+        usage = AIUsage.objects.get()
+        assert usage.call is None
+        assert usage.request_count == 2
+        with pytest.raises(IntegrityError), transaction.atomic():
+            AIUsage.objects.create(date=usage.date, user=self.user, call=None,
+                                   operation='summary', model='gpt-4o-mini')
+
+    def test_pipeline_defers_throttled_recording(self, settings):
+        """Test that a throttled summary is retried and eventually marked failed"""
+        settings.AI_BUDGET_MAX_DEFERRALS = 3
+        call = CallFactory(lead=LeadFactory(created_by=self.user), transcribe_content='Hi')
+        service = mock.Mock()
+        service.summarize_structured.return_value = {
+            'success': False, 'error': 'budget', 'throttled': True, 'retry_after': 0}
+
+        with mock.patch('calls.recording_pipeline.AIService', return_value=service), \
+                mock.patch('calls.recording_pipeline.backoff_delay', return_value=0):
+            process_recording(call.id, summary_only=True)
+
+        assert service.summarize_structured.call_count == 3
+        service.transcribe_audio_segments.assert_not_called()
+        call.refresh_from_db()
+        assert call.summary_status == 'failed'
+
+    def test_usage_report_command(self):
+        """Test the usage report groups spend by user"""
+        ai_usage.record_usage('summary', 'gpt-4o-mini', self.user.id, self.call.id,
+                              prompt_tokens=1000, completion_tokens=100, latency_ms=300)
+
+        out = StringIO()
+        call_command('ai_usage_report', '--by', 'user', stdout=out)
+
+        assert self.user.username in out.getvalue()
@@ -0,0 +1,95 @@
+import os
+import shutil
+import subprocess
+import pytest
+from unittest import mock
+from calls import audio_processing
+from calls.models import Call
+
+
+def fake_ffmpeg(output_bytes):
+    """subprocess.run stand-in that writes `output_bytes` to the target path"""
+    def run(command, **kwargs):
+        with open(command[-1], 'wb') as f:
+            f.write(output_bytes)
+        return subprocess.CompletedProcess(command, 0)
+    return run
+
+
+@pytest.fixture
+def recording(tmp_path):
+    path = tmp_path / 'call.mp3'
+    path.write_bytes(b'\xff' * 10_000)
+    return str(path)
+
+
+def test_build_command_downmixes_and_trims(settings):
+    """Test the ffmpeg arguments for the default opus profile"""
+    settings.AUDIO_TRANSCODE_CODEC = 'opus'
+    command = audio_processing.build_transcode_command('in.mp3', 'out.ogg')
+
+    assert command[command.index('-ac') + 1] == '1'
+    assert command[command.index('-ar') + 1] == '16000'
+    assert command[command.index('-c:a') + 1] == 'libopus'
+    assert 'silenceremove' in command[command.index('-af') + 1]
+    assert command[-1] == 'out.ogg'
+
+
+def test_transcode_replaces_original_with_smaller_file(recording):
+    """Test that a smaller result replaces the source file"""
+    with mock.patch('calls.audio_processing.subprocess.run',
+                    side_effect=fake_ffmpeg(b'x' * 2_000)):
+        result = audio_processing.transcode_audio(recording, codec='opus')
+
+    assert result['success']
+    assert result['file_path'].endswith('call.ogg')
+    assert (result['original_size'], result['compressed_size']) == (10_000, 2_000)
+    assert not os.path.exists(recording)
+
+
+def test_transcode_keeps_source_when_not_smaller(recording):
+    """Test that a larger result is discarded"""
+    with mock.patch('calls.audio_processing.subprocess.run',
+                    side_effect=fake_ffmpeg(b'x' * 20_000)):
+        result = audio_processing.transcode_audio(recording, codec='opus')
+
+    assert result['file_path'] == recording
+    assert result['compressed_size'] == 10_000
+    assert not os.path.exists(recording[:-4] + '.ogg')
+
+
+def test_transcode_failure_is_reported(recording):
+    """Test that ffmpeg errors are returned, not raised"""
+    error = subprocess.CalledProcessError(1, 'ffmpeg', stderr=b'Invalid data found')
+    with mock.patch('calls.audio_processing.subprocess.run', side_effect=error):
+        result = audio_processing.transcode_audio(recording)
+
+    assert result == {'success': False, 'error': 'Invalid data found'}
+    assert os.path.exists(recording)
+
+
+def test_process_downloaded_recording_without_ffmpeg(recording, settings):
+    """Test that the original is stored when ffmpeg isn't installed"""
+    settings.FFMPEG_BINARY = 'definitely-not-ffmpeg'
+    call = Call(recording_file_path='recordings/call.mp3')
+
+    audio_processing.process_downloaded_recording(call, recording)
+
+    assert call.recording_file_path == 'recordings/call.mp3'
+    assert call.recording_original_size == call.recording_size == 10_000
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg not installed")
+def test_transcode_real_audio(tmp_path):
+    """Test a real transcode of a generated tone with silent padding"""
+    source = str(tmp_path / 'tone.mp3')
+    subprocess.run([
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-f', 'lavfi',
+        '-i', 'sine=frequency=300:duration=5,adelay=2000:all=1,apad=pad_dur=3',
+        '-ac', '2', '-ar', '8000', '-b:a', '64k', source,
+    ], check=True)
+
+    result = audio_processing.transcode_audio(source, codec='opus')
+
+    assert result['success']
+    assert result['compressed_size'] < result['original_size']
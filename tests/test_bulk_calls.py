@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from calls import bulk
+from calls.models import Call, CallContent
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.mark.django_db
+class TestBulkCalls:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        lead = LeadFactory(created_by=self.user)
+        self.calls = [
+            CallFactory(lead=lead, status='in_progress', end_time=None,
+                        recording_file_path='recordings/x.mp3')
+            for _ in range(3)
+        ]
+        self.other_call = CallFactory(lead=LeadFactory(created_by=UserFactory()))
+
+    def test_status_refresh_returns_per_item_results(self, mock_twilio):
+        """Test that statuses are refreshed and unknown calls reported per item"""
+        mock_twilio.get_call_status.side_effect = lambda sid: (
+            {'success': False, 'error': 'Twilio is down'} if sid == self.calls[1].twilio_call_sid
+            else {'success': True, 'status': 'completed', 'duration': '42', 'end_time': None})
+        call_ids = [call.id for call in self.calls] + [self.other_call.id]
+
+        response = self.client.post(
+            reverse('calls-bulk-refresh-status'), {'call_ids': call_ids}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data['data']
+        assert (data['succeeded'], data['failed']) == (2, 2)
+        results = data['results']
+        assert [result['call_id'] for result in results] == call_ids
+        assert results[0]['call']['status'] == 'completed'
+        assert results[1]['error'] == 'Twilio is down'
+        assert results[3]['status_code'] == status.HTTP_404_NOT_FOUND
+        self.calls[0].refresh_from_db()
+        self.calls[1].refresh_from_db()
+        assert (self.calls[0].status, self.calls[0].duration) == ('completed', 42)
+        assert self.calls[1].status == 'in_progress'
+
+    def test_end_calls_writes_with_one_update(self, mock_twilio):
+        """Test that ending calls issues one query to load and one to save"""
+        items = [{'call_id': call.id, 'duration': 30, 'notes': 'Done'} for call in self.calls]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('calls-bulk-end-calls'), {'calls': items}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['succeeded'] == 3
+        assert mock_twilio.end_call.call_count == 3
+        writes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        assert len(writes) == 1
+        assert set(Call.objects.filter(pk__in=[c.id for c in self.calls])
+                   .values_list('status', 'duration', 'content__notes')) == {('completed', 30, 'Done')}
+
+    def test_end_calls_keeps_notes_when_not_given(self, mock_twilio):
+        """Test that notes are only replaced when the item has them"""
+        call = self.calls[0]
+
+        self.client.post(reverse('calls-bulk-end-calls'),
+                         {'calls': [{'call_id': call.id}]}, format='json')
+
+        notes = call.notes
+        call.refresh_from_db()
+        assert call.status == 'completed'
+        assert call.notes == notes
+        assert call.duration is not None
+
+    def test_update_notes(self):
+        """Test that notes of several calls are updated at once"""
+        items = [{'call_id': self.calls[0].id, 'notes': 'First'},
+                 {'call_id': self.other_call.id, 'notes': 'Not mine'}]
+
+        response = self.client.patch(
+            reverse('calls-bulk-update-notes'), {'calls': items}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['results'][1]['status_code'] == status.HTTP_404_NOT_FOUND
+        self.calls[0].refresh_from_db()
+        self.other_call.refresh_from_db()
+        assert self.calls[0].notes == 'First'
+        assert self.other_call.notes != 'Not mine'
+
+    def test_summarize_queues_transcribed_calls(self, mock_twilio, mock_ai):
+        """Test that transcribed calls are summarized again and others rejected"""
+        CallContent.objects.filter(call_id=self.calls[1].id).update(transcribe_content='')
+
+        response = self.client.post(
+            reverse('calls-bulk-summarize'),
+            {'call_ids': [self.calls[0].id, self.calls[1].id]}, format='json')
+
+        results = response.data['data']['results']
+        assert results[0]['success']
+        assert results[1]['status_code'] == status.HTTP_400_BAD_REQUEST
+        assert mock_ai.summarize_structured.call_count == 1
+        self.calls[0].refresh_from_db()
+        assert self.calls[0].summary_status == 'completed'
+
+    def test_rejects_too_many_and_duplicate_calls(self, settings):
+        """Test the size limit and duplicate checks of bulk requests"""
+        settings.BULK_CALL_MAX_ITEMS = 2
+        call_ids = [call.id for call in self.calls]
+
+        too_many = self.client.post(
+            reverse('calls-bulk-refresh-status'), {'call_ids': call_ids}, format='json')
+        duplicates = self.client.patch(
+            reverse('calls-bulk-update-notes'),
+            {'calls': [{'call_id': call_ids[0], 'notes': 'a'},
+                       {'call_id': call_ids[0], 'notes': 'b'}]}, format='json')
+
+        assert too_many.status_code == status.HTTP_400_BAD_REQUEST
+        assert duplicates.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_concurrency_is_bounded(self, settings):
+        """Test that at most BULK_CALL_MAX_WORKERS provider requests run at once"""
+        settings.BULK_CALL_MAX_WORKERS = 3
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def request(item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return item
+
+        assert bulk.run_concurrently(request, list(range(12))) == list(range(12))
+        assert peak[0] == 3
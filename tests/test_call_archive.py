@@ -0,0 +1,102 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from calls import archive
+from calls.models import Call, CallArchive, TranscriptSegment
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.mark.django_db
+class TestCallArchive:
+
+    @pytest.fixture(autouse=True)
+    def setup_data(self, tmp_path, monkeypatch, django_capture_on_commit_callbacks):
+        """Set up an old call with a transcript and a recording in a scratch directory"""
+        self.capture_on_commit = django_capture_on_commit_callbacks
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(archive, 'ffmpeg_available', lambda: False)
+        os.makedirs('recordings')
+        with open('recordings/old.ogg', 'wb') as f:
+            f.write(b'audio' * 100)
+
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        lead = LeadFactory(created_by=self.user)
+        self.old_call = CallFactory(
+            lead=lead, status='completed', recording_file_path='recordings/old.ogg',
+            transcribe_content='Agent: Hello\nLead: Hi there', summary_content='Greeting')
+        TranscriptSegment.objects.create(
+            call=self.old_call, start_ms=0, end_ms=900, speaker='agent', text='Hello')
+        TranscriptSegment.objects.create(
+            call=self.old_call, start_ms=1000, end_ms=2000, speaker='lead', text='Hi there')
+        self.recent_call = CallFactory(lead=lead, status='completed')
+        self.open_call = CallFactory(lead=lead, status='in_progress')
+        Call.objects.filter(pk__in=[self.old_call.id, self.open_call.id]).update(
+            start_time=timezone.now() - timedelta(days=400))
+
+    def archive(self, **kwargs):
+        # Originals are removed once the batch commits
+        with self.capture_on_commit(execute=True):
+            return archive.archive_calls(older_than=timedelta(days=180), **kwargs)
+
+    def test_archives_old_finished_calls(self):
+        """Test that old calls move their payloads to cold storage"""
+        updated_at = Call.objects.get(pk=self.old_call.id).updated_at
+
+        summary = self.archive()
+
+        assert (summary['calls'], summary['recordings']) == (1, 1)
+        call = Call.objects.get(pk=self.old_call.id)
+        assert call.archived_at is not None
+        assert (call.transcribe_content, call.summary_content) == ('', '')
+        assert call.updated_at == updated_at
+        assert not TranscriptSegment.objects.filter(call=call).exists()
+        assert call.recording_file_path == os.path.join('recordings', 'archive', 'old.ogg')
+        assert os.path.exists(call.recording_file_path)
+        assert not os.path.exists('recordings/old.ogg')
+        assert archive.load_archived(call)['transcribe_content'] == 'Agent: Hello\nLead: Hi there'
+        assert Call.objects.filter(archived_at__isnull=True).count() == 2
+
+    def test_detail_fetches_through_and_lists_skip(self, mock_twilio):
+        """Test that single calls show archived text while the history doesn't"""
+        self.archive()
+        mock_twilio.get_call_status.return_value = {
+            'success': True, 'status': 'completed', 'duration': None, 'end_time': None}
+
+        detail = self.client.get(reverse('calls-get-call-status', args=[self.old_call.id]))
+        history = self.client.get(reverse('calls-get-call-history'))
+        segments = self.client.get(
+            reverse('calls-get-transcript-segments', args=[self.old_call.id]), {'start_ms': 950})
+
+        assert detail.data['data']['transcribe_content'] == 'Agent: Hello\nLead: Hi there'
+        listed = next(c for c in history.data['data'] if c['id'] == self.old_call.id)
+        assert 'transcribe_content' not in listed
+        assert [s['text'] for s in segments.data['data']] == ['Hi there']
+        assert Call.objects.get(pk=self.old_call.id).transcribe_content == ''
+
+    def test_restore_moves_payload_back(self):
+        """Test that restoring a call puts its transcript and segments back"""
+        self.archive()
+        call = Call.objects.get(pk=self.old_call.id)
+
+        archive.restore_call(call)
+
+        call.refresh_from_db()
+        assert call.archived_at is None
+        assert call.summary_content == 'Greeting'
+        assert TranscriptSegment.objects.filter(call=call).count() == 2
+        assert not CallArchive.objects.filter(call=call).exists()
+
+    def test_io_is_throttled(self):
+        """Test that the mover sleeps once it exceeds its byte rate"""
+        with mock.patch('calls.archive.time.sleep') as sleep:
+            self.archive(io_bytes_per_second=100)
+
+        assert sleep.call_args.args[0] > 0
@@ -0,0 +1,70 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from calls.models import Call, CallContent
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.mark.django_db
+class TestCallContent:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.lead = LeadFactory(created_by=self.user)
+        self.call = CallFactory(lead=self.lead, status='in_progress', notes='Call back')
+
+    def test_content_is_loaded_lazily(self):
+        """Test that the text is read from CallContent only when accessed"""
+        with CaptureQueriesContext(connection) as loading:
+            call = Call.objects.get(pk=self.call.id)
+        with CaptureQueriesContext(connection) as reading:
+            assert call.notes == 'Call back'
+            assert call.transcribe_content == self.call.transcribe_content
+
+        assert 'calls_callcontent' not in loading.captured_queries[0]['sql']
+        assert len(reading.captured_queries) == 1
+
+    def test_content_row_is_created_on_first_write(self):
+        """Test that calls without text have no content row until it is set"""
+        call = Call.objects.create(user=self.user, lead=self.lead, phone_number=self.lead.phone)
+        assert call.notes == ''
+        assert not CallContent.objects.filter(call=call).exists()
+
+        call.notes = 'Left a voicemail'
+        call.save(update_fields=['notes', 'updated_at'])
+
+        call.refresh_from_db()
+        assert call.notes == 'Left a voicemail'
+        assert CallContent.objects.get(call=call).transcribe_content == ''
+
+    def test_status_update_leaves_content_alone(self, mock_twilio):
+        """Test that refreshing the status only rewrites the narrow call row"""
+        mock_twilio.get_call_status.return_value = {
+            'success': True, 'status': 'ringing', 'duration': None, 'end_time': None}
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('calls-get-call-status', args=[self.call.id]))
+
+        writes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        assert len(writes) == 1
+        assert '"calls_call"' in writes[0]
+        assert '"phone_number"' not in writes[0]
+
+    def test_history_does_not_read_content(self):
+        """Test that listing calls leaves the transcript, summary and notes out"""
+        CallFactory.create_batch(3, lead=self.lead)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('calls-get-call-history'))
+        detail = self.client.get(reverse('calls-get-call-status', args=[self.call.id]))
+
+        assert len(response.data['data']) == 4
+        assert 'transcribe_content' not in response.data['data'][0]
+        assert not any('calls_callcontent' in q['sql'] for q in queries.captured_queries)
+        assert 'transcribe_content' in detail.data['data']
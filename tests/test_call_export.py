@@ -0,0 +1,131 @@
+import csv
+import io
+import json
+import os
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from calls import export
+from calls.models import Call, CallExport
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.mark.django_db
+class TestCallExport:
+
+    @pytest.fixture(autouse=True)
+    def setup_data(self, tmp_path, monkeypatch, settings):
+        """Set up calls to export, with exports written to a scratch directory"""
+        monkeypatch.chdir(tmp_path)
+        settings.CALL_EXPORT_CHUNK_SIZE = 2
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        lead = LeadFactory(created_by=self.user, name='Ada Lovelace')
+        self.calls = [
+            CallFactory(lead=lead, status='completed', notes=f'Note {n}',
+                        transcribe_content=f'Agent: line {n}')
+            for n in range(3)
+        ]
+        self.old_call = CallFactory(lead=lead, status='busy', notes='Old')
+        Call.objects.filter(pk=self.old_call.id).update(
+            start_time=timezone.now() - timedelta(days=60))
+        CallFactory(lead=LeadFactory(created_by=UserFactory()))
+
+    def stream(self, **params):
+        response = self.client.get(reverse('calls-export-calls'), params)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        return b''.join(response.streaming_content).decode()
+
+    def test_streams_csv_of_own_calls(self):
+        """Test that the CSV export lists the user's calls oldest first"""
+        rows = list(csv.DictReader(io.StringIO(self.stream())))
+
+        assert [int(row['id']) for row in rows] == [self.old_call.id] + [c.id for c in self.calls]
+        assert rows[0]['lead_name'] == 'Ada Lovelace'
+        assert rows[0]['notes'] == 'Old'
+        assert 'transcript' not in rows[0]
+
+    def test_streams_jsonl_with_filters_and_transcripts(self):
+        """Test that JSON Lines exports honour filters and include transcripts"""
+        since = (timezone.now() - timedelta(days=30)).isoformat()
+
+        lines = self.stream(file_format='jsonl', started_after=since,
+                            include_transcripts='true', include_summaries='true').splitlines()
+        rows = [json.loads(line) for line in lines]
+
+        assert [row['id'] for row in rows] == [call.id for call in self.calls]
+        assert rows[1]['transcript'] == 'Agent: line 1'
+        assert rows[1]['interest_level'] == ''
+
+    @pytest.mark.skipif(export.parquet_available(), reason="pyarrow is installed")
+    def test_parquet_needs_pyarrow(self):
+        """Test that Parquet is rejected when pyarrow is missing"""
+        response = self.client.get(reverse('calls-export-calls'), {'file_format': 'parquet'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_background_export_is_written_and_downloaded(self):
+        """Test that a background export writes a file the owner can download"""
+        response = self.client.post(
+            reverse('calls-create-export'), {'file_format': 'csv', 'status': 'busy'}, format='json')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        data = response.data['data']
+        assert (data['status'], data['row_count']) == ('completed', 1)
+
+        download = self.client.get(reverse('calls-download-export', args=[data['id']]))
+        content = b''.join(download.streaming_content).decode()
+        assert download['Content-Disposition'].startswith('attachment')
+        assert [row['id'] for row in csv.DictReader(io.StringIO(content))] == [str(self.old_call.id)]
+        assert not [name for name in os.listdir('exports') if name.endswith('.tmp')]
+
+    def test_runner_writes_pending_exports(self, settings):
+        """Test that exports wait for run_call_exports outside eager mode"""
+        settings.CALL_EXPORT_EAGER = False
+        response = self.client.post(
+            reverse('calls-create-export'), {'file_format': 'jsonl'}, format='json')
+        assert response.data['data']['status'] == 'pending'
+
+        out = StringIO()
+        call_command('run_call_exports', stdout=out)
+
+        call_export = CallExport.objects.get(pk=response.data['data']['id'])
+        assert (call_export.status, call_export.row_count) == ('completed', 4)
+        assert 'Wrote 1 exports' in out.getvalue()
+        assert export.claim_export() is None
+
+    def test_interrupted_exports_are_failed_and_cleaned_up(self):
+        """Test that running exports without a heartbeat fail and leave no partial file"""
+        long_ago = timezone.now() - timedelta(hours=1)
+        stale = CallExport.objects.create(
+            user=self.user, file_format='csv', status='running', heartbeat_at=long_ago)
+        live = CallExport.objects.create(
+            user=self.user, file_format='csv', status='running', heartbeat_at=timezone.now())
+        os.makedirs('exports')
+        partial = os.path.join('exports', f'{stale.id}-calls.csv.tmp')
+        open(partial, 'w').close()
+        os.utime(partial, (long_ago.timestamp(), long_ago.timestamp()))
+
+        assert export.fail_stale_exports() == 1
+
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        assert (stale.status, live.status) == ('failed', 'running')
+        assert not os.path.exists(partial)
+
+    def test_exports_of_other_users_are_hidden(self):
+        """Test that an export can't be read by another user"""
+        other = CallExport.objects.create(user=UserFactory(), file_format='csv')
+
+        response = self.client.get(reverse('calls-get-export', args=[other.id]))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from calls import partitioning
+from calls.models import Call, TranscriptSegment
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+def test_partition_months_cross_the_year():
+    """Test that monthly partitions are laid out across a year boundary"""
+    months = partitioning.partition_months(
+        datetime(2025, 11, 20, tzinfo=dt_timezone.utc),
+        datetime(2026, 2, 3, tzinfo=dt_timezone.utc))
+
+    assert [partitioning.partition_name(month) for month in months] == [
+        'calls_call_p2025_11', 'calls_call_p2025_12', 'calls_call_p2026_01', 'calls_call_p2026_02']
+    assert partitioning.create_partition_sql('calls_call', months[1]) == (
+        'CREATE TABLE IF NOT EXISTS "calls_call_p2025_12" PARTITION OF "calls_call" '
+        "FOR VALUES FROM ('2025-12-01T00:00:00+00:00') TO ('2026-01-01T00:00:00+00:00')")
+
+
+@pytest.mark.django_db
+class TestCallPartitioning:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        lead = LeadFactory(created_by=self.user)
+        self.recent = CallFactory(lead=lead)
+        self.old = CallFactory(lead=lead)
+        Call.objects.filter(pk=self.old.id).update(
+            start_time=timezone.now() - timedelta(days=90))
+
+    def test_command_skips_other_databases(self):
+        """Test that partition_calls does nothing outside PostgreSQL"""
+        out = StringIO()
+        call_command('partition_calls', stdout=out)
+
+        assert 'not supported on sqlite' in out.getvalue()
+        assert partitioning.ensure_partitions() == []
+
+    def test_history_defaults_to_recent_calls(self, settings):
+        """Test that paginated history without bounds only reads the last CALL_HISTORY_DEFAULT_DAYS"""
+        settings.CALL_HISTORY_DEFAULT_DAYS = 30
+        url = reverse('calls-get-call-history')
+
+        recent = self.client.get(url, {'page_size': 10})
+        everything = self.client.get(
+            url, {'page_size': 10, 'started_after': '2000-01-01T00:00:00Z'})
+
+        assert [call['id'] for call in recent.data['data']['results']] == [self.recent.id]
+        assert {call['id'] for call in everything.data['data']['results']} == \
+            {self.recent.id, self.old.id}
+
+    def test_history_without_params_lists_every_call(self):
+        """Test that a plain history request still returns calls older than the default window"""
+        url = reverse('calls-get-call-history')
+        Call.objects.filter(pk=self.old.id).update(
+            start_time=timezone.now() - timedelta(days=400))
+
+        response = self.client.get(url)
+
+        assert {call['id'] for call in response.data['data']} == {self.recent.id, self.old.id}
+
+    def test_history_filters_on_start_time(self):
+        """Test that the history can be bounded to a range of start times"""
+        url = reverse('calls-get-call-history')
+        since = (timezone.now() - timedelta(days=30)).isoformat()
+
+        recent = self.client.get(url, {'started_after': since})
+        old = self.client.get(url, {'started_before': since, 'page_size': 10})
+        invalid = self.client.get(url, {'started_after': 'yesterday'})
+
+        assert [call['id'] for call in recent.data['data']] == [self.recent.id]
+        assert [call['id'] for call in old.data['data']['results']] == [self.old.id]
+        assert old.data['data']['count'] == 1
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_deletes_cascade_without_constraints(self):
+        """Test that related rows are still deleted with the call"""
+        TranscriptSegment.objects.create(call=self.old, start_ms=0, end_ms=10, text='Hi')
+
+        self.old.delete()
+
+        assert not TranscriptSegment.objects.exists()
+
+
+def _definitions(cursor):
+    cursor.execute(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() "
+        "AND tablename = %s AND indexname <> %s", [partitioning.TABLE, f'{partitioning.TABLE}_pkey'])
+    indexes = {row[0] for row in cursor.fetchall()}
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [partitioning.TABLE])
+    return indexes, {row[0] for row in cursor.fetchall()}
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql',
+                    reason="needs PostgreSQL (TEST_DATABASE=postgresql)")
+@pytest.mark.django_db
+class TestConvertToPartitioned:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        lead = LeadFactory(created_by=UserFactory())
+        self.calls = [CallFactory(lead=lead) for _ in range(5)]
+        Call.objects.filter(pk__in=[call.id for call in self.calls[:2]]).update(
+            start_time=timezone.now() - timedelta(days=60))
+        # Past every partition created ahead
+        Call.objects.filter(pk=self.calls[2].id).update(
+            start_time=timezone.now() + timedelta(days=400))
+
+    def test_convert_seeded_table(self):
+        """Test that conversion keeps rows, indexes, foreign keys and the id sequence"""
+        with connection.cursor() as cursor:
+            indexes, foreign_keys = _definitions(cursor)
+
+        partitioning.convert_to_partitioned(batch_size=2, log=lambda message: None)
+
+        assert partitioning.is_partitioned()
+        assert Call.objects.count() == len(self.calls)
+        with connection.cursor() as cursor:
+            assert _definitions(cursor) == (indexes, foreign_keys)
+            cursor.execute(
+                f'SELECT tableoid::regclass::text, COUNT(*) FROM "{partitioning.TABLE}" '
+                'GROUP BY 1')
+            rows_per_partition = dict(cursor.fetchall())
+        month = partitioning.month_start(timezone.now() - timedelta(days=60))
+        assert rows_per_partition[partitioning.partition_name(month)] == 2
+        assert rows_per_partition[partitioning.DEFAULT_PARTITION] == 1
+        assert sum(rows_per_partition.values()) == len(self.calls)
+
+        # New calls continue after the copied ids
+        new_call = CallFactory(lead=self.calls[0].lead)
+        assert new_call.id > max(call.id for call in self.calls)
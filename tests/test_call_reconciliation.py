@@ -0,0 +1,98 @@
+import pytest
+from datetime import timedelta
+from unittest import mock
+from django.utils import timezone
+from calls.models import Call
+from calls.reconciliation import apply_twilio_status, reconcile_call_statuses
+from tests.factories import CallFactory
+
+
+@pytest.fixture
+def fake_twilio(fake_twilio, settings):
+    """Shared fake Twilio API with a little latency, and no pipeline"""
+    fake_twilio.latency = 0.05
+    settings.RECORDING_PIPELINE_ENABLED = False
+    return fake_twilio
+
+
+def make_stale_call(status, sid, minutes_ago=30):
+    call = CallFactory(status=status, twilio_call_sid=sid, end_time=None)
+    Call.objects.filter(pk=call.pk).update(
+        updated_at=timezone.now() - timedelta(minutes=minutes_ago))
+    return call
+
+
+@pytest.mark.django_db
+class TestCallReconciliation:
+
+    def test_updates_stale_calls_from_twilio(self, fake_twilio):
+        """Test that stale open calls pick up Twilio's final status"""
+        completed = make_stale_call('ringing', 'CA1')
+        no_answer = make_stale_call('initiated', 'CA2')
+        fake_twilio.add_call('CA1', 'completed', duration=42)
+        fake_twilio.add_call('CA2', 'no-answer')
+
+        summary = reconcile_call_statuses(stale_after=timedelta(minutes=10))
+
+        assert summary == {'checked': 2, 'updated': 2, 'errors': 0}
+        completed.refresh_from_db()
+        assert completed.status == 'completed'
+        assert completed.duration == 42
+        assert completed.end_time is not None
+        no_answer.refresh_from_db()
+        assert no_answer.status == 'no_answer'
+
+    def test_skips_fresh_and_terminal_calls(self, fake_twilio):
+        """Test that only stale, non-terminal calls are fetched"""
+        make_stale_call('ringing', 'CA1', minutes_ago=1)
+        make_stale_call('completed', 'CA2')
+
+        summary = reconcile_call_statuses(stale_after=timedelta(minutes=10))
+
+        assert summary['checked'] == 0
+        assert fake_twilio.request_count == 0
+
+    def test_bounded_concurrency(self, fake_twilio):
+        """Test that no more than max_workers requests run at once"""
+        for i in range(8):
+            make_stale_call('ringing', f'CA{i}')
+            fake_twilio.add_call(f'CA{i}', 'in-progress')
+
+        summary = reconcile_call_statuses(
+            stale_after=timedelta(minutes=10), max_workers=3, rate_per_second=1000)
+
+        assert summary['checked'] == 8
+        assert 1 < fake_twilio.max_in_flight <= 3
+        # Still open, but touched so it isn't re-fetched until stale again
+        assert not Call.objects.filter(
+            updated_at__lt=timezone.now() - timedelta(minutes=10)).exists()
+        assert set(Call.objects.values_list('status', flat=True)) == {'in_progress'}
+
+    def test_unknown_call_counts_as_error(self, fake_twilio):
+        """Test that Twilio errors leave the call untouched"""
+        call = make_stale_call('ringing', 'CA404')
+
+        summary = reconcile_call_statuses(stale_after=timedelta(minutes=10))
+
+        assert summary == {'checked': 1, 'updated': 0, 'errors': 1}
+        call.refresh_from_db()
+        assert call.status == 'ringing'
+
+    def test_call_ended_during_run_is_not_overwritten(self, settings):
+        """Test that a call completed between the Twilio fetch and the write keeps its status"""
+        settings.RECORDING_PIPELINE_ENABLED = False
+        call = make_stale_call('ringing', 'CA7')
+        twilio_service = mock.Mock()
+        twilio_service.get_call_status.return_value = {
+            'success': True, 'status': 'in-progress', 'duration': '5'}
+
+        def end_call_then_apply(*args):
+            # end_call finishes the call after its status was fetched
+            Call.objects.filter(pk=call.pk).update(status='completed', duration=99)
+            return apply_twilio_status(*args)
+
+        with mock.patch('calls.reconciliation.apply_twilio_status', side_effect=end_call_then_apply):
+            reconcile_call_statuses(stale_after=timedelta(minutes=10), twilio_service=twilio_service)
+
+        call.refresh_from_db()
+        assert (call.status, call.duration) == ('completed', 99)
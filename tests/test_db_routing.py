@@ -0,0 +1,68 @@
+import pytest
+from unittest import mock
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+from leads.models import Lead
+from tests.factories import UserFactory, LeadFactory
+from utils import db_routing
+from utils.db_routing import ReplicaRouter, read_from_replica
+
+
+class TestReplicaRouter:
+
+    def test_reads_use_replica_only_inside_block(self):
+        """Test that reads go to the replica only inside read_from_replica"""
+        router = ReplicaRouter()
+        with mock.patch.dict(settings.DATABASES, replica=settings.DATABASES['default']):
+            assert router.db_for_read(Lead) is None
+            with read_from_replica():
+                assert router.db_for_read(Lead) == 'replica'
+                assert router.db_for_write(Lead) == 'default'
+            assert router.db_for_read(Lead) is None
+
+    def test_without_replica_reads_stay_on_primary(self):
+        """Test that the block is a no-op when no replica is configured"""
+        with read_from_replica():
+            assert ReplicaRouter().db_for_read(Lead) is None
+
+    def test_replica_is_never_migrated(self):
+        """Test that migrations only run on the primary"""
+        router = ReplicaRouter()
+        assert router.allow_migrate('replica', 'leads') is False
+        assert router.allow_migrate('default', 'leads') is True
+
+
+@pytest.mark.django_db
+class TestReplicaEndpoints:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.lead = LeadFactory(created_by=self.user)
+
+    def queries_on_replica(self, url):
+        routed = []
+
+        def record(execute, sql, params, many, context):
+            if 'leads_lead' in sql:
+                routed.append(db_routing._use_replica.get())
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = self.client.get(url)
+        assert response.status_code == 200
+        return routed
+
+    def test_list_reads_from_replica(self):
+        """Test that the lead list runs its lead queries in replica mode"""
+        routed = self.queries_on_replica(reverse('leads-list-leads'))
+        assert routed and all(routed)
+
+    def test_detail_reads_from_primary(self):
+        """Test that detail endpoints keep reading from the primary"""
+        routed = self.queries_on_replica(reverse('leads-get-lead', args=[self.lead.id]))
+        assert routed and not any(routed)
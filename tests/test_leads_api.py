@@ -1,10 +1,13 @@
 import pytest
+from datetime import timedelta
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
+from calls.models import Call
 from leads.models import Lead
-from tests.factories import UserFactory, LeadFactory
+from tests.factories import UserFactory, LeadFactory, CallFactory
 
 
 @pytest.mark.django_db
@@ -26,7 +29,9 @@ class TestLeadsAPIFinal:
 
         assert response.status_code == status.HTTP_200_OK
         assert response.data['status'] == 'success'
-        assert len(response.data['data']) == 3
+        assert len(response.data['data']['results']) == 3
+        # Paginated by default
+        assert response.data['data']['page_size'] == 50
 
     def test_list_leads_unauthenticated(self):
         """Test that unauthenticated requests are rejected"""
@@ -150,13 +155,24 @@ class TestLeadsAPIFinal:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['status'] == 'success'
         # Should only return current user's leads
-        assert len(response.data['data']) == 2
+        assert len(response.data['data']['results']) == 2
 
         # Verify all returned leads belong to current user
-        for lead_data in response.data['data']:
+        for lead_data in response.data['data']['results']:
             lead = Lead.objects.get(id=lead_data['id'])
             assert lead.created_by == self.user
 
+    def test_list_leads_includes_called_leads(self):
+        """Test that the unfiltered list returns called and uncalled leads"""
+        called = LeadFactory(created_by=self.user)
+        uncalled = LeadFactory(created_by=self.user)
+        CallFactory(lead=called)
+
+        response = self.client.get(reverse('leads-list-leads'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert {lead['id'] for lead in response.data['data']['results']} == {called.id, uncalled.id}
+
     def test_create_lead_with_minimal_data(self):
         """Test creating lead with only required fields"""
         lead_data = {
@@ -191,3 +207,100 @@ class TestLeadsAPIFinal:
         assert response.data['data']['name'] == 'Partially Updated'
         assert response.data['data']['phone'] == lead.phone
         assert response.data['data']['email'] == lead.email
+
+
+@pytest.mark.django_db
+class TestLeadsListFilters:
+    """
+    Read-only tests sharing one dataset, built once for the class (see
+    `class_db`). Each test's own writes are rolled back after it.
+    """
+
+    @pytest.fixture(scope='class')
+    def seeded(self, class_db):
+        """One user with five leads, one of them called twice"""
+        user = UserFactory()
+        leads = {
+            name: LeadFactory(created_by=user, name=name,
+                              email=f"{name.split()[0].lower()}@example.com")
+            for name in ['Charlie Brown', 'Alice Smith', 'Bob Jones',
+                         'Dana White', 'Evan Stone']
+        }
+        called = leads['Bob Jones']
+        CallFactory(lead=called, status='failed')
+        latest = CallFactory(lead=called, status='completed')
+        Call.objects.filter(pk=latest.pk).update(
+            start_time=timezone.now() + timedelta(minutes=5))
+        # Another user's leads are never listed
+        LeadFactory.create_batch(2)
+        return {'user': user, 'leads': leads, 'called': called}
+
+    @pytest.fixture(autouse=True)
+    def setup_client(self, seeded):
+        """Set up an authenticated client for each test method"""
+        self.client = APIClient()
+        self.user = seeded['user']
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('leads-list-leads')
+
+    def test_search_by_name_prefix(self):
+        """Test that search matches the start of name, phone or email"""
+        response = self.client.get(self.url, {'search': 'ali'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [lead['name'] for lead in response.data['data']['results']] == ['Alice Smith']
+
+    def test_has_called_and_last_call_status(self, seeded):
+        """Test the call-based filters and the last call annotation"""
+        called = seeded['called']
+
+        response = self.client.get(self.url, {'has_called': 'true'})
+        assert [lead['id'] for lead in response.data['data']['results']] == [called.id]
+        assert response.data['data']['results'][0]['last_call_status'] == 'completed'
+
+        response = self.client.get(self.url, {'has_called': 'false'})
+        assert len(response.data['data']['results']) == 4
+        assert called.id not in [lead['id'] for lead in response.data['data']['results']]
+
+        response = self.client.get(self.url, {'last_call_status': 'failed'})
+        assert response.data['data']['results'] == []
+
+    def test_ordering_by_name(self):
+        """Test sorting by name, with called and uncalled leads"""
+        response = self.client.get(self.url, {'ordering': 'name'})
+
+        assert [lead['name'] for lead in response.data['data']['results']] == [
+            'Alice Smith', 'Bob Jones', 'Charlie Brown', 'Dana White', 'Evan Stone']
+
+    def test_pagination(self):
+        """Test that page params select a page of the paginated envelope"""
+        response = self.client.get(self.url, {'page': 2, 'page_size': 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['count'] == 5
+        assert response.data['data']['has_next'] is True
+        assert len(response.data['data']['results']) == 2
+
+    def test_unpaginated_opt_out(self):
+        """Test that paginate=false returns the whole list without an envelope"""
+        response = self.client.get(self.url, {'paginate': 'false', 'ordering': 'name'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [lead['name'] for lead in response.data['data']][:2] == ['Alice Smith', 'Bob Jones']
+        assert len(response.data['data']) == 5
+
+    def test_writes_stay_in_the_test(self):
+        """Test that a test's writes are rolled back to the seeded dataset"""
+        Lead.objects.filter(created_by=self.user).delete()
+        assert not Lead.objects.filter(created_by=self.user).exists()
+
+    def test_seeded_rows_survive_earlier_writes(self):
+        """Test that the previous test's delete did not reach the dataset"""
+        assert Lead.objects.filter(created_by=self.user).count() == 5
+
+    def test_invalid_ordering(self):
+        """Test that unknown sort keys are rejected"""
+        response = self.client.get(self.url, {'ordering': 'password'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['status'] == 'error'
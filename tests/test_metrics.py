@@ -0,0 +1,143 @@
+import json
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from monitoring.metrics import (
+    REGISTRY, Registry, collect_external_time, merge_exited_process, merge_snapshot,
+    render_prometheus, track_external
+)
+from tests.factories import UserFactory, LeadFactory
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    REGISTRY.reset()
+    yield REGISTRY
+    REGISTRY.reset()
+
+
+def sample(metric_name, **labels):
+    """Return the recorded sample of a metric for the given labels"""
+    metric = REGISTRY.metrics[metric_name]
+    return metric.samples.get(tuple(str(labels[name]) for name in metric.labelnames))
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        LeadFactory.create_batch(3, created_by=self.user)
+
+    def test_middleware_records_request_metrics(self):
+        """Test that latency, queries and size are recorded per endpoint"""
+        response = self.client.get(reverse('leads-list-leads'))
+        assert response.status_code == 200
+
+        endpoint = 'leads-list-leads'
+        duration = sample('smartcallr_http_request_duration_seconds',
+                          endpoint=endpoint, method='GET', status=200)
+        assert sum(duration[:-1]) == 1
+        queries = sample('smartcallr_http_request_db_queries', endpoint=endpoint)
+        # The sum holds the total number of queries run by the request
+        assert queries[-1] >= 1
+        size = sample('smartcallr_http_response_size_bytes', endpoint=endpoint)
+        assert size[-1] == len(response.content)
+
+    def test_external_time_attributed_to_request(self):
+        """Test that track_external time is added to the current request"""
+        with collect_external_time() as external:
+            with track_external('twilio'):
+                pass
+        assert external[0] > 0
+        assert sum(sample('smartcallr_external_request_duration_seconds',
+                          service='twilio', outcome='success')[:-1]) == 1
+
+    def test_external_errors_are_labelled(self):
+        """Test that failing external calls are recorded with outcome=error"""
+        with pytest.raises(RuntimeError):
+            with track_external('openai'):
+                raise RuntimeError('boom')
+        assert sample('smartcallr_external_request_duration_seconds',
+                      service='openai', outcome='error') is not None
+
+    def test_metrics_endpoint_prometheus_format(self, settings):
+        """Test that /metrics serves histograms in the text format"""
+        settings.METRICS_PUBLIC = True
+        self.client.get(reverse('leads-list-leads'))
+
+        response = APIClient().get(reverse('metrics-list'))
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        body = response.content.decode()
+        assert '# TYPE smartcallr_http_request_duration_seconds histogram' in body
+        assert ('smartcallr_http_request_duration_seconds_count'
+                '{endpoint="leads-list-leads",method="GET",status="200"} 1') in body
+        assert 'le="+Inf"' in body
+
+    def test_metrics_endpoint_requires_token(self, settings):
+        """Test that a configured token is enforced"""
+        settings.METRICS_AUTH_TOKEN = 'scrape-secret'
+        client = APIClient()
+
+        assert client.get(reverse('metrics-list')).status_code == 401
+        response = client.get(reverse('metrics-list'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        assert response.status_code == 200
+
+    def test_metrics_endpoint_is_closed_without_token(self, settings):
+        """Test that /metrics isn't public unless METRICS_PUBLIC is set"""
+        settings.METRICS_AUTH_TOKEN = ''
+        settings.METRICS_PUBLIC = False
+
+        assert APIClient().get(reverse('metrics-list')).status_code == 403
+
+    def test_multiprocess_snapshots_are_merged(self, settings, tmp_path):
+        """Test that the snapshots of several worker processes are summed"""
+        settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+        worker = Registry()
+        histogram = worker.histogram('demo_seconds', 'Demo.', ['endpoint'], buckets=(1,))
+        counter = worker.counter('demo_requests', 'Demo.', ['endpoint'])
+        histogram.observe(0.5, endpoint='a')
+        counter.inc(endpoint='a')
+        (tmp_path / 'metrics_1_aaaa.json').write_text(json.dumps(worker.dump()))
+        histogram.observe(2, endpoint='a')
+        counter.inc(endpoint='a')
+        (tmp_path / 'metrics_2_bbbb.json').write_text(json.dumps(worker.dump()))
+
+        body = render_prometheus(REGISTRY.collect())
+
+        assert 'demo_seconds_bucket{endpoint="a",le="1.0"} 2' in body
+        assert 'demo_seconds_bucket{endpoint="a",le="+Inf"} 3' in body
+        assert 'demo_seconds_sum{endpoint="a"} 3.0' in body
+        assert 'demo_requests_total{endpoint="a"} 3' in body
+        # The serving process wrote its own snapshot too
+        assert len(list(tmp_path.glob('metrics_*.json'))) == 3
+
+    def test_exited_process_snapshots_are_folded(self, settings, tmp_path):
+        """Test that exited workers' snapshots are merged into one file"""
+        settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+        worker = Registry()
+        counter = worker.counter('demo_requests', 'Demo.', ['endpoint'])
+        counter.inc(endpoint='a')
+        for name in ('metrics_1_aaaa.json', 'metrics_2_bbbb.json', 'metrics_3_cccc.json'):
+            (tmp_path / name).write_text(json.dumps(worker.dump()))
+
+        merge_exited_process(1)
+        merge_exited_process(2)
+
+        assert sorted(path.name for path in tmp_path.glob('metrics_*.json')) == [
+            'metrics_3_cccc.json', 'metrics_exited.json']
+        body = render_prometheus(REGISTRY.collect())
+        assert 'demo_requests_total{endpoint="a"} 3' in body
+
+    def test_merge_snapshot_adds_new_label_sets(self):
+        """Test merging samples with distinct labels"""
+        merged = merge_snapshot({}, {'c': {'type': 'counter', 'help': '', 'labelnames': ['x'],
+                                           'samples': [[['1'], 2]]}})
+        merge_snapshot(merged, {'c': {'type': 'counter', 'help': '', 'labelnames': ['x'],
+                                      'samples': [[['2'], 5]]}})
+        assert sorted(merged['c']['samples']) == [[['1'], 2], [['2'], 5]]
@@ -0,0 +1,77 @@
+import pytest
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.urls import reverse
+from leads.models import Lead
+from utils.phone import normalize_phone_number, backfill_phone_e164
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('+1 (555) 123-4567', '+15551234567'),
+    ('555.123.4567', '+15551234567'),
+    ('001-555-123-4567x890', '+15551234567'),
+    ('1-555-123-4567 ext. 12', '+15551234567'),
+    ('+44 20 7946 0958', '+442079460958'),
+    ('0044 20 7946 0958', '+442079460958'),
+    ('123', None),
+    ('invalid-phone', None),
+    ('', None),
+])
+def test_normalize_phone_number(raw, expected):
+    """Test E.164 normalization of common input formats"""
+    assert normalize_phone_number(raw) == expected
+
+
+def test_normalize_national_number_with_country_code():
+    """Test that national numbers use the given default country code"""
+    assert normalize_phone_number('020 7946 0958', '44') == '+442079460958'
+
+
+@pytest.mark.django_db
+class TestPhoneLookup:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+    def test_lead_save_stores_e164(self):
+        """Test that saving a lead fills the normalized column"""
+        lead = LeadFactory(created_by=self.user, phone='(555) 123-4567')
+        assert lead.phone_e164 == '+15551234567'
+
+    def test_backfill_phone_e164(self):
+        """Test the batched backfill used by the data migration"""
+        leads = LeadFactory.create_batch(3, created_by=self.user)
+        Lead.objects.update(phone_e164='')
+
+        updated = backfill_phone_e164(Lead, 'phone', batch_size=2)
+
+        assert updated == 3
+        for lead in leads:
+            assert Lead.objects.get(pk=lead.pk).phone_e164 == \
+                normalize_phone_number(lead.phone)
+
+    def test_lookup_returns_lead_and_calls(self):
+        """Test that lookup matches the lead regardless of formatting"""
+        lead = LeadFactory(created_by=self.user, phone='555-123-4567')
+        CallFactory.create_batch(2, lead=lead)
+        LeadFactory(phone='555-123-4567')  # another user's lead
+
+        url = reverse('leads-lookup-by-phone')
+        response = self.client.get(url, {'phone': '+1 (555) 123 4567'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['phone_e164'] == '+15551234567'
+        assert response.data['data']['lead']['id'] == lead.id
+        assert len(response.data['data']['calls']) == 2
+
+    def test_lookup_invalid_phone(self):
+        """Test that unparseable numbers are rejected"""
+        url = reverse('leads-lookup-by-phone')
+        response = self.client.get(url, {'phone': 'not-a-number'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['status'] == 'error'
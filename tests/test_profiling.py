@@ -0,0 +1,116 @@
+import marshal
+import time
+import zlib
+import pytest
+from datetime import timedelta
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from monitoring.models import ProfileCapture, ProfilingRule
+from monitoring.profiling import StackSampler, clear_rules_cache, prune_captures
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.fixture(autouse=True)
+def rules_cache():
+    clear_rules_cache()
+    yield
+    clear_rules_cache()
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def create_capture(**kwargs):
+    payload = b'a;b 1\n'
+    defaults = dict(kind='stacks', endpoint='calls-get-call-history', method='GET',
+                    path='/calls/history/', duration_ms=1.0,
+                    data=zlib.compress(payload), size=len(payload))
+    return ProfileCapture.objects.create(**{**defaults, **kwargs})
+
+
+@pytest.mark.django_db
+class TestProfiling:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        CallFactory.create_batch(3, lead=LeadFactory(created_by=self.user))
+
+    def test_rule_profiles_matching_requests(self):
+        """Test that a rule with sample rate 1 captures both profile kinds"""
+        ProfilingRule.objects.create(
+            endpoint='calls-get-call-history', mode='both', sample_rate=1.0)
+
+        response = self.client.get(reverse('calls-get-call-history'))
+        assert response.status_code == 200
+        self.client.get(reverse('leads-list-leads'))
+
+        captures = {capture.kind: capture for capture in ProfileCapture.objects.all()}
+        assert set(captures) == {'stacks', 'cprofile'}
+        assert captures['cprofile'].status_code == 200
+        assert captures['cprofile'].user == self.user
+        stats = marshal.loads(zlib.decompress(bytes(captures['cprofile'].data)))
+        assert any(name == 'get_call_history' for _, _, name in stats)
+
+    def test_disabled_and_expired_rules_are_ignored(self):
+        """Test that only enabled, unexpired rules select requests"""
+        ProfilingRule.objects.create(
+            endpoint='calls-get-call-history', sample_rate=1.0, enabled=False)
+        ProfilingRule.objects.create(
+            endpoint='calls-get-call-history', sample_rate=1.0,
+            expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.client.get(reverse('calls-get-call-history'))
+
+        assert not ProfileCapture.objects.exists()
+
+    def test_stack_sampler_collapsed_output(self, settings):
+        """Test that stack samples are aggregated in collapsed format"""
+        sampler = StackSampler(interval=0.001).start()
+        busy_wait(0.05)
+        sampler.stop()
+
+        assert sampler.sample_count > 0
+        lines = sampler.collapsed().splitlines()
+        assert any('busy_wait' in line for line in lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        assert int(count) >= 1 and ';' in stack
+
+    def test_prune_captures_applies_retention(self, settings):
+        """Test that old and excess captures are deleted"""
+        settings.PROFILING_MAX_CAPTURES = 2
+        old = create_capture()
+        ProfileCapture.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=30))
+        kept = [create_capture() for _ in range(3)]
+
+        prune_captures()
+
+        assert list(ProfileCapture.objects.values_list('id', flat=True).order_by('id')) == \
+            [kept[1].id, kept[2].id]
+
+    def test_admin_download_requires_view_permission(self):
+        """Test that only users allowed to view captures can download them"""
+        capture = create_capture()
+        url = reverse('admin:monitoring_profilecapture_download', args=[capture.id])
+
+        client = Client()
+        client.force_login(self.user)
+        assert client.get(url).status_code == 302
+
+        # Staff without the view permission on captures
+        client.force_login(UserFactory(is_staff=True))
+        assert client.get(url).status_code == 403
+
+        client.force_login(UserFactory(is_staff=True, is_superuser=True))
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.content == b'a;b 1\n'
+        assert 'collapsed.txt' in response['Content-Disposition']
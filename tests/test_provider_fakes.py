@@ -0,0 +1,62 @@
+import pytest
+from calls.ai_service import AIService
+from calls.models import AIUsage
+from calls.twilio_service import TwilioService
+
+
+class TestFakeTwilioAPI:
+
+    def test_call_and_recording_round_trip(self, fake_twilio, tmp_path):
+        """Test that TwilioService can create, fetch and download through the fake"""
+        service = TwilioService()
+
+        created = service.initiate_call('+15551234567')
+        assert created['success'] and created['status'] == 'queued'
+
+        status = service.get_call_status(created['call_sid'])
+        assert status['status'] == 'completed'
+
+        recordings = service.get_call_recordings(created['call_sid'])
+        assert len(recordings['recordings']) == 1
+
+        path = tmp_path / 'recordings' / 'call.mp3'
+        downloaded = service.download_recording(recordings['recordings'][0]['sid'], str(path))
+        assert downloaded['success']
+        assert path.read_bytes() == fake_twilio.recording_bytes
+
+    def test_injected_errors(self, fake_twilio):
+        """Test that the error distribution turns requests into provider errors"""
+        fake_twilio.errors = {503: 1.0}
+
+        result = TwilioService().initiate_call('+15551234567')
+
+        assert not result['success']
+        assert fake_twilio.error_count == fake_twilio.request_count == 1
+
+    def test_reset_between_tests(self, fake_twilio):
+        """Test that the shared server starts every test with no state"""
+        assert fake_twilio.calls == {} and fake_twilio.recordings == {}
+        assert fake_twilio.errors == {} and fake_twilio.request_count == 0
+
+
+@pytest.mark.django_db
+class TestFakeOpenAIAPI:
+
+    def test_transcription_and_structured_summary(self, fake_openai, tmp_path):
+        """Test that AIService talks to the configured OpenAI base URL"""
+        audio = tmp_path / 'call.mp3'
+        audio.write_bytes(b'\x00' * 64)
+        service = AIService()
+
+        transcription = service.transcribe_audio_segments(str(audio))
+        assert transcription['success']
+        assert [segment['end_ms'] for segment in transcription['segments']] == [2500, 5000]
+
+        summary = service.summarize_structured(transcription['transcription'])
+        assert summary['summary'] == fake_openai.summary
+
+        assert fake_openai.paths == {
+            'POST /v1/audio/transcriptions': 1, 'POST /v1/chat/completions': 1}
+        usage = {row.operation: row for row in AIUsage.objects.all()}
+        assert usage['transcription'].audio_seconds == 5.0
+        assert usage['summary'].prompt_tokens > 0
@@ -0,0 +1,178 @@
+import pytest
+from datetime import timedelta
+from unittest import mock
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from calls import recording_pipeline
+from calls.models import Call
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.mark.django_db
+class TestRecordingPipeline:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.call = CallFactory(
+            lead=LeadFactory(created_by=self.user), status='in_progress',
+            recording_file_path=None, transcribe_content='', summary_content='')
+
+    def test_end_call_fetches_and_processes_recording(self, mock_twilio, mock_ai):
+        """Test that completing a call chains download and transcription"""
+        url = reverse('calls-end-call', kwargs={'pk': self.call.id})
+        response = self.client.post(
+            url, {'call_id': self.call.id, 'duration': 30}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_twilio.download_recording.assert_called_once()
+        self.call.refresh_from_db()
+        assert self.call.twilio_recording_sid == 'RE1'
+        assert self.call.recording_file_path.startswith('recordings/')
+        assert self.call.transcribe_content == 'Hello there'
+        assert self.call.summary_status == 'completed'
+
+    def test_fetch_retries_until_recording_is_ready(self, mock_twilio, mock_ai, settings):
+        """Test that the fetch task polls again while Twilio is processing"""
+        settings.RECORDING_FETCH_MAX_ATTEMPTS = 5
+        not_ready = {'success': True, 'recordings': []}
+        mock_twilio.get_call_recordings.side_effect = [
+            not_ready, not_ready, mock_twilio.get_call_recordings.return_value]
+
+        with mock.patch.object(recording_pipeline, 'backoff_delay',
+                               wraps=recording_pipeline.backoff_delay) as delay:
+            recording_pipeline.fetch_recording(self.call.id)
+
+        assert mock_twilio.get_call_recordings.call_count == 3
+        assert [c.args[0] for c in delay.call_args_list] == [1, 2]
+        self.call.refresh_from_db()
+        assert self.call.twilio_recording_sid == 'RE1'
+
+    def test_fetch_gives_up_after_max_attempts(self, mock_twilio, mock_ai, settings):
+        """Test that polling stops after RECORDING_FETCH_MAX_ATTEMPTS"""
+        settings.RECORDING_FETCH_MAX_ATTEMPTS = 3
+        mock_twilio.get_call_recordings.return_value = {'success': True, 'recordings': []}
+
+        recording_pipeline.fetch_recording(self.call.id)
+
+        assert mock_twilio.get_call_recordings.call_count == 3
+        mock_ai.transcribe_audio_segments.assert_not_called()
+
+    def test_backoff_delay_is_exponential_and_capped(self, settings):
+        """Test the retry delay schedule"""
+        settings.RECORDING_FETCH_INITIAL_DELAY = 2
+        settings.RECORDING_FETCH_MAX_DELAY = 10
+
+        with mock.patch('calls.recording_pipeline.random.uniform', return_value=1):
+            delays = [recording_pipeline.backoff_delay(n) for n in range(1, 6)]
+
+        assert delays == [2, 4, 8, 10, 10]
+
+    def test_webhook_rejects_invalid_signature(self):
+        """Test that unsigned recording callbacks are refused"""
+        url = reverse('calls-recording-status-webhook')
+        response = APIClient().post(url, {
+            'CallSid': self.call.twilio_call_sid,
+            'RecordingSid': 'RE9',
+            'RecordingStatus': 'completed'
+        })
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_webhook_downloads_given_recording(self, mock_twilio, mock_ai, settings):
+        """Test that the callback downloads the recording without polling"""
+        settings.TWILIO_VALIDATE_WEBHOOKS = False
+
+        url = reverse('calls-recording-status-webhook')
+        response = APIClient().post(url, {
+            'CallSid': self.call.twilio_call_sid,
+            'RecordingSid': 'RE9',
+            'RecordingStatus': 'completed'
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['queued'] is True
+        mock_twilio.get_call_recordings.assert_not_called()
+        self.call.refresh_from_db()
+        assert self.call.twilio_recording_sid == 'RE9'
+
+    def test_webhook_after_fetch_gave_up(self, mock_twilio, mock_ai, settings):
+        """Test that the recording callback fetches a call whose polling had given up"""
+        settings.TWILIO_VALIDATE_WEBHOOKS = False
+        settings.RECORDING_FETCH_MAX_ATTEMPTS = 1
+        mock_twilio.get_call_recordings.return_value = {'success': True, 'recordings': []}
+        recording_pipeline.fetch_recording(self.call.id)
+        self.call.refresh_from_db()
+        assert self.call.transcribe_status == 'failed'
+
+        url = reverse('calls-recording-status-webhook')
+        data = {'CallSid': self.call.twilio_call_sid, 'RecordingSid': 'RE9',
+                'RecordingStatus': 'completed'}
+        response = APIClient().post(url, data)
+        again = APIClient().post(url, data)
+
+        assert response.data['data']['queued'] is True
+        self.call.refresh_from_db()
+        assert self.call.twilio_recording_sid == 'RE9'
+        assert self.call.transcribe_status == 'completed'
+        # Already downloaded: nothing left to queue
+        assert again.data['data']['queued'] is False
+
+    def test_webhook_validates_configured_callback_url(self, mock_twilio, mock_ai, settings):
+        """Test that the signature is checked against the public callback URL"""
+        settings.TWILIO_RECORDING_STATUS_CALLBACK_URL = 'https://api.example.com/calls/recording-status/'
+
+        url = reverse('calls-recording-status-webhook')
+        APIClient().post(url, {
+            'CallSid': self.call.twilio_call_sid,
+            'RecordingSid': 'RE9',
+            'RecordingStatus': 'completed'
+        }, HTTP_X_TWILIO_SIGNATURE='signature')
+
+        mock_twilio.validate_webhook.assert_called_once()
+        assert mock_twilio.validate_webhook.call_args.args[0] == \
+            'https://api.example.com/calls/recording-status/'
+
+    def test_process_skips_call_claimed_by_another_task(self, mock_twilio, mock_ai):
+        """Test that a call already being processed is not processed twice"""
+        self.call.status = 'completed'
+        self.call.recording_file_path = 'recordings/call.mp3'
+        self.call.transcribe_status = 'processing'
+        self.call.save()
+
+        recording_pipeline.process_recording(self.call.id)
+
+        mock_ai.transcribe_audio_segments.assert_not_called()
+
+    def test_requeue_stalled_recordings(self, mock_twilio, mock_ai):
+        """Test that dropped fetches and stale claims are queued again"""
+        self.call.status = 'completed'
+        self.call.transcribe_status = 'pending'
+        self.call.save()
+        claimed = CallFactory(
+            lead=self.call.lead, status='completed', recording_file_path='recordings/other.mp3',
+            transcribe_status='processing', transcribe_content='', summary_content='')
+        long_ago = timezone.now() - timedelta(hours=2)
+        Call.objects.filter(pk__in=[self.call.id, claimed.id]).update(updated_at=long_ago)
+
+        with mock.patch.object(recording_pipeline, 'enqueue_recording_fetch') as fetch, \
+                mock.patch.object(recording_pipeline, 'enqueue_recording_processing') as process:
+            summary = recording_pipeline.requeue_stalled_recordings()
+
+        assert summary == {'fetch': 1, 'transcribe': 1, 'summarize': 0}
+        fetch.assert_called_once_with(self.call.id)
+        process.assert_called_once_with(claimed.id)
+        claimed.refresh_from_db()
+        assert claimed.transcribe_status == 'pending'
+
+    def test_task_closes_its_connection(self):
+        """Test that a pool thread doesn't keep its DB connection after a task"""
+        with mock.patch('calls.recording_pipeline.connection') as connection:
+            recording_pipeline._run_task(mock.Mock(__name__='task'))
+            recording_pipeline._run_task(mock.Mock(__name__='task', side_effect=ValueError))
+
+        assert connection.close.call_count == 2
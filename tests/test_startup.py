@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+from django.conf import settings
+
+PROVIDER_SDKS = ('openai', 'groq', 'twilio')
+
+LOAD_APP = f"""
+import sys
+import backend.wsgi, backend.urls
+print(','.join(m for m in {PROVIDER_SDKS!r} if m in sys.modules))
+"""
+
+
+class TestStartup:
+
+    def test_app_loads_without_provider_sdks(self):
+        """Test that loading the app and URL conf does not import provider SDKs"""
+        # Warmup imports them on purpose, see test_warmup.py
+        result = subprocess.run(
+            [sys.executable, '-c', LOAD_APP], cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'backend.test_settings',
+                 'WARMUP_ENABLED': 'False'},
+            capture_output=True, text=True, check=True)
+
+        assert result.stdout.strip() == ''
+
+    def test_sdks_load_on_first_use(self, monkeypatch):
+        """Test that the service clients are still built when needed"""
+        monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+        from calls.ai_service import AIService
+        from calls.twilio_service import TwilioService
+
+        assert AIService().openai_client.api_key == 'test-key'
+        assert TwilioService().client.account_sid
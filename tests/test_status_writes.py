@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from calls import status_writes
+from calls.models import Call
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.mark.django_db
+class TestStatusWrites:
+
+    @pytest.fixture(autouse=True)
+    def setup_data(self, mock_twilio):
+        """Set up a live call polled through the status endpoint"""
+        self.twilio = mock_twilio
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.call = CallFactory(lead=LeadFactory(created_by=self.user),
+                                status='ringing', duration=None, end_time=None)
+        self.url = reverse('calls-get-call-status', args=[self.call.id])
+
+    @pytest.fixture
+    def buffer(self, settings, monkeypatch):
+        """Coalesce writes into a buffer that is only flushed by the test"""
+        settings.CALL_STATUS_COALESCE_SECONDS = 60
+        buffer = status_writes.StatusWriteBuffer()
+        monkeypatch.setattr(status_writes, 'status_writes', buffer)
+        yield buffer
+        buffer.shutdown()
+
+    def poll(self, twilio_status, duration=None):
+        self.twilio.get_call_status.return_value = {
+            'success': True, 'status': twilio_status, 'duration': duration, 'end_time': None}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        assert response.status_code == 200
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+
+    def test_unchanged_poll_is_not_written(self):
+        """Test that a poll returning the stored status issues no UPDATE"""
+        assert self.poll('ringing') == []
+        assert len(self.poll('in-progress')) == 1
+
+    def test_open_changes_are_coalesced(self, buffer):
+        """Test that open-call changes are buffered and flushed as the latest values"""
+        assert self.poll('in-progress') == []
+        assert self.poll('in-progress', duration='12') == []
+        assert Call.objects.get(pk=self.call.id).status == 'ringing'
+
+        assert buffer.flush() == 1
+
+        call = Call.objects.get(pk=self.call.id)
+        assert (call.status, call.duration) == ('in_progress', 12)
+
+    def test_final_status_is_written_at_once(self, buffer):
+        """Test that a finished call is stored directly and not overwritten by the buffer"""
+        self.poll('in-progress')
+        self.poll('completed', duration='30')
+
+        assert buffer.flush() == 0
+        call = Call.objects.get(pk=self.call.id)
+        assert (call.status, call.duration) == ('completed', 30)
+        assert call.end_time is not None
+
+    def test_flush_keeps_calls_that_ended(self, buffer):
+        """Test that a flush doesn't reopen a call ended since it was buffered"""
+        self.poll('in-progress')
+        Call.objects.filter(pk=self.call.id).update(status='completed')
+
+        buffer.flush()
+
+        assert Call.objects.get(pk=self.call.id).status == 'completed'
@@ -0,0 +1,150 @@
+import pytest
+from datetime import date
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from calls.models import ActionItem, CallSummary
+from calls.summaries import render_summary_markdown, store_structured_summary
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+SUMMARY = {
+    'purpose': 'Discuss the premium plan',
+    'key_points': ['Pricing', 'Onboarding'],
+    'decisions': ['Start a trial'],
+    'action_items': [
+        {'description': 'Send the proposal', 'owner': 'Agent', 'due_date': '2026-10-21'},
+        {'description': 'Review contract', 'owner': 'Lead', 'due_date': 'next week'},
+    ],
+    'interest_level': 'high',
+    'next_step': 'Follow-up call',
+    'next_step_date': '2026-10-23',
+    'additional_notes': '',
+}
+
+
+@pytest.mark.django_db
+class TestStructuredSummaries:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.call = CallFactory(lead=LeadFactory(created_by=self.user))
+
+    def test_store_structured_summary(self):
+        """Test that summaries are stored as rows and rendered to Markdown"""
+        summary = store_structured_summary(self.call, SUMMARY)
+
+        assert summary.user == self.user
+        assert summary.interest_level == 'high'
+        assert summary.next_step_date == date(2026, 10, 23)
+        items = list(self.call.action_items.order_by('id'))
+        assert [item.description for item in items] == ['Send the proposal', 'Review contract']
+        assert items[0].due_date == date(2026, 10, 21)
+        # Unparseable dates are dropped rather than failing the summary
+        assert items[1].due_date is None
+
+        self.call.refresh_from_db()
+        assert self.call.summary_status == 'completed'
+        assert '**Call Purpose:** Discuss the premium plan' in self.call.summary_content
+        assert '• Send the proposal - Agent (due 2026-10-21)' in self.call.summary_content
+
+    def test_store_replaces_previous_results(self):
+        """Test that re-summarizing replaces the summary and action items"""
+        store_structured_summary(self.call, SUMMARY)
+        store_structured_summary(self.call, {**SUMMARY, 'interest_level': 'bogus',
+                                             'action_items': SUMMARY['action_items'][:1]})
+
+        assert CallSummary.objects.get(call=self.call).interest_level == 'unknown'
+        assert ActionItem.objects.filter(call=self.call).count() == 1
+
+    def test_store_keeps_action_item_status(self):
+        """Test that re-summarizing keeps items marked done by the user"""
+        store_structured_summary(self.call, SUMMARY)
+        proposal, contract = self.call.action_items.order_by('id')
+        ActionItem.objects.filter(pk__in=[proposal.pk, contract.pk]).update(status='done')
+
+        store_structured_summary(self.call, {**SUMMARY, 'action_items': [
+            {'description': 'send the  proposal', 'owner': 'Agent', 'due_date': '2026-10-22'},
+            {'description': 'Book a demo'},
+        ]})
+
+        items = {item.description: item for item in self.call.action_items.all()}
+        assert set(items) == {'Send the proposal', 'Review contract', 'Book a demo'}
+        assert items['Send the proposal'].pk == proposal.pk
+        assert items['Send the proposal'].status == 'done'
+        assert items['Send the proposal'].due_date == date(2026, 10, 22)
+        assert items['Book a demo'].status == 'open'
+
+    def test_render_summary_markdown_handles_empty_sections(self):
+        """Test that missing fields still render every section"""
+        text = render_summary_markdown({'purpose': 'Hello'})
+        assert '**Decisions Made:**\n• None' in text
+        assert '**Lead Interest Level:** Unknown' in text
+
+    def test_summarize_endpoint_returns_structured_summary(self):
+        """Test that the summarize action stores and returns structured data"""
+        service = mock.Mock()
+        service.summarize_structured.return_value = {'success': True, 'summary': SUMMARY}
+        url = reverse('calls-summarize-call', kwargs={'pk': self.call.id})
+
+        with mock.patch('calls.views.AIService', return_value=service):
+            response = self.client.post(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        structured = response.data['data']['structured_summary']
+        assert structured['interest_level'] == 'high'
+        assert len(structured['action_items']) == 2
+
+    def test_list_summaries_filters_by_interest_level(self):
+        """Test filtering summaries by interest level"""
+        store_structured_summary(self.call, SUMMARY)
+        other = CallFactory(lead=LeadFactory(created_by=self.user))
+        store_structured_summary(other, {**SUMMARY, 'interest_level': 'low'})
+        # Another user's summary is never listed
+        store_structured_summary(CallFactory(), SUMMARY)
+
+        url = reverse('calls-list-summaries')
+        response = self.client.get(url, {'interest_level': 'high'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['count'] == 1
+        assert response.data['data']['results'][0]['call'] == self.call.id
+
+    def test_list_action_items_due_window(self):
+        """Test listing open action items due in a date range"""
+        store_structured_summary(self.call, SUMMARY)
+
+        url = reverse('calls-list-action-items')
+        response = self.client.get(url, {
+            'status': 'open', 'due_after': '2026-10-20', 'due_before': '2026-10-22'})
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data['data']['results']
+        assert [item['description'] for item in results] == ['Send the proposal']
+
+    def test_update_action_item_status(self):
+        """Test marking an action item as done"""
+        store_structured_summary(self.call, SUMMARY)
+        item = self.call.action_items.order_by('id').first()
+
+        url = reverse('calls-update-action-item', kwargs={'item_id': item.id})
+        response = self.client.patch(url, {'status': 'done'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        item.refresh_from_db()
+        assert item.status == 'done'
+
+    def test_update_action_item_of_other_user(self):
+        """Test that another user's action item is not found"""
+        other_call = CallFactory()
+        store_structured_summary(other_call, SUMMARY)
+        item = other_call.action_items.order_by('id').first()
+
+        url = reverse('calls-update-action-item', kwargs={'item_id': item.id})
+        response = self.client.patch(url, {'status': 'done'}, format='json')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from leads.models import Lead
+from sync.changes import encode_token
+from sync.models import Tombstone
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+@pytest.mark.django_db
+class TestSyncChanges:
+
+    @pytest.fixture(autouse=True)
+    def setup_data(self, settings):
+        """Set up test data for each test method"""
+        settings.SYNC_OVERLAP_SECONDS = 0
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.leads = [LeadFactory(created_by=self.user) for _ in range(3)]
+        self.call = CallFactory(lead=self.leads[0])
+        self.other_lead = LeadFactory(created_by=UserFactory())
+        self.url = reverse('sync-changes')
+
+    def sync(self, token=None, **params):
+        if token:
+            params['token'] = token
+        response = self.client.get(self.url, params)
+        assert response.status_code == status.HTTP_200_OK, response.data
+        return response.data['data']
+
+    def test_first_sync_returns_everything(self):
+        """Test that a sync without a token returns all of the user's records"""
+        data = self.sync()
+
+        assert {lead['id'] for lead in data['leads']} == {lead.id for lead in self.leads}
+        assert [call['id'] for call in data['calls']] == [self.call.id]
+        assert data['calls'][0]['lead'] == self.leads[0].id
+        assert 'transcribe_content' not in data['calls'][0]
+        assert data['deleted'] == {'leads': [], 'calls': []}
+        assert data['has_more'] is False
+
+    def test_next_sync_returns_only_changes(self):
+        """Test that a token limits the feed to later changes and deletions"""
+        token = self.sync()['sync_token']
+        assert self.sync(token)['leads'] == []
+
+        self.leads[1].name = 'Renamed'
+        self.leads[1].save()
+        lead_id = self.leads[0].id
+        self.leads[0].delete()
+
+        data = self.sync(token)
+        assert [lead['name'] for lead in data['leads']] == ['Renamed']
+        assert data['calls'] == []
+        assert data['deleted'] == {'leads': [lead_id], 'calls': [self.call.id]}
+
+    def test_pages_until_caught_up(self):
+        """Test that a small limit pages through the streams with has_more"""
+        seen = []
+        data = self.sync(limit=2)
+        seen += data['leads']
+        assert data['has_more'] is True
+
+        data = self.sync(data['sync_token'], limit=2)
+        seen += data['leads']
+        assert data['has_more'] is False
+        assert sorted(lead['id'] for lead in seen) == sorted(lead.id for lead in self.leads)
+
+    def test_overlap_sends_recent_changes_again(self, settings):
+        """Test that changes inside the overlap window are repeated"""
+        settings.SYNC_OVERLAP_SECONDS = 60
+        token = self.sync()['sync_token']
+
+        assert len(self.sync(token)['leads']) == 3
+
+    def test_paging_through_recent_rows_keeps_overlap(self, settings):
+        """Test that a paged sync still catches rows committed late inside the overlap window"""
+        settings.SYNC_OVERLAP_SECONDS = 60
+        data = self.sync(limit=2)
+        while data['has_more']:
+            data = self.sync(data['sync_token'], limit=2)
+
+        # Committed after the sync, with an `updated_at` behind its last page
+        late = LeadFactory(created_by=self.user)
+        Lead.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(seconds=30))
+
+        seen = []
+        data = {'sync_token': data['sync_token'], 'has_more': True}
+        while data['has_more']:
+            data = self.sync(data['sync_token'], limit=2)
+            seen += data['leads']
+        assert late.id in {lead['id'] for lead in seen}
+
+    def test_rejects_invalid_and_expired_tokens(self, settings):
+        """Test that bad tokens are refused and old ones need a full sync"""
+        settings.SYNC_TOMBSTONE_RETENTION_DAYS = 30
+        token = self.sync()['sync_token']
+        old = (timezone.now() - timedelta(days=31), 0)
+        old_token = encode_token({'leads': old, 'calls': old, 'deleted': old})
+
+        invalid = self.client.get(self.url, {'token': token[:-2]})
+        expired = self.client.get(self.url, {'token': old_token})
+
+        assert invalid.status_code == status.HTTP_400_BAD_REQUEST
+        assert expired.status_code == status.HTTP_410_GONE
+
+    def test_prune_tombstones(self):
+        """Test that tombstones past the retention period are deleted"""
+        old_id, recent_id = self.leads[2].id, self.leads[1].id
+        self.leads[2].delete()
+        Tombstone.objects.filter(object_id=old_id).update(
+            deleted_at=timezone.now() - timedelta(days=60))
+        self.leads[1].delete()
+
+        call_command('prune_tombstones', days=30)
+
+        assert list(Tombstone.objects.values_list('object_id', flat=True)) == [recent_id]
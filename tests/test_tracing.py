@@ -0,0 +1,130 @@
+import json
+import pytest
+from unittest import mock
+from django.urls import reverse
+from rest_framework.test import APIClient
+from monitoring import tracing
+from monitoring.tracing import current_span, otlp_payload, span
+from tests.factories import UserFactory, LeadFactory
+
+
+@pytest.fixture
+def exported(settings):
+    """Collect finished spans in a list instead of exporting them"""
+    settings.TRACING_SAMPLE_RATE = 1.0
+    spans = []
+    exporter = mock.Mock()
+    exporter.export.side_effect = spans.extend
+    with mock.patch('monitoring.tracing.get_exporter', return_value=exporter):
+        yield spans
+
+
+def by_name(spans):
+    return {finished.name: finished for finished in spans}
+
+
+class TestTracing:
+
+    def test_nested_spans_share_trace(self, exported):
+        """Test that child spans nest under the current span"""
+        with span('parent', **{'call.id': 7}) as parent:
+            with span('child') as child:
+                child.set_attribute('bytes', 42)
+            assert current_span() is parent
+
+        spans = by_name(exported)
+        assert spans['child'].trace_id == spans['parent'].trace_id
+        assert spans['child'].parent_id == spans['parent'].span_id
+        assert spans['child'].attributes == {'bytes': 42}
+        assert spans['parent'].attributes == {'call.id': 7}
+        assert spans['parent'].end_ns >= spans['child'].end_ns
+
+    def test_exceptions_mark_span_as_error(self, exported):
+        """Test that an exception is recorded on the span and re-raised"""
+        with pytest.raises(ValueError):
+            with span('failing'):
+                raise ValueError('bad input')
+
+        assert exported[0].status == 'error'
+        assert exported[0].error == 'bad input'
+
+    def test_disabled_tracing_is_noop(self, settings):
+        """Test that spans are no-ops without an exporter"""
+        settings.TRACING_EXPORTER = 'none'
+        with span('ignored') as current:
+            current.set_attribute('key', 'value')
+            with span('nested') as nested:
+                assert nested.span_id is None
+        assert current.span_id is None
+
+    def test_unsampled_traces_drop_children(self, exported, settings):
+        """Test that the sampling decision of the root applies to the whole trace"""
+        settings.TRACING_SAMPLE_RATE = 0.0
+        with span('root'):
+            with span('child'):
+                pass
+        assert exported == []
+
+    def test_json_exporter_writes_lines(self, settings, tmp_path):
+        """Test the JSON lines file exporter"""
+        settings.TRACING_EXPORTER = 'json'
+        settings.TRACING_JSON_PATH = str(tmp_path / 'traces' / 'spans.jsonl')
+        try:
+            with span('root'):
+                with span('child'):
+                    pass
+        finally:
+            tracing.shutdown()
+
+        lines = (tmp_path / 'traces' / 'spans.jsonl').read_text().splitlines()
+        assert [json.loads(line)['name'] for line in lines] == ['child', 'root']
+
+    def test_otlp_payload(self, exported):
+        """Test OTLP/HTTP JSON encoding of spans"""
+        with span('twilio.calls.fetch', kind='client', **{'twilio.call_sid': 'CA1', 'bytes': 3}):
+            pass
+
+        payload = otlp_payload(exported, 'smartcallr-test')
+        encoded = payload['resourceSpans'][0]['scopeSpans'][0]['spans'][0]
+        assert encoded['name'] == 'twilio.calls.fetch'
+        assert encoded['kind'] == 3
+        assert len(encoded['traceId']) == 32 and len(encoded['spanId']) == 16
+        assert {'key': 'bytes', 'value': {'intValue': '3'}} in encoded['attributes']
+        assert encoded['status'] == {'code': 1}
+
+    def test_otlp_exporter_posts_batches(self, settings):
+        """Test that the OTLP exporter sends queued spans to the collector"""
+        settings.TRACING_EXPORTER = 'otlp'
+        settings.TRACING_OTLP_ENDPOINT = 'http://collector:4318/v1/traces'
+        with mock.patch('monitoring.tracing.requests.post') as post:
+            post.return_value.status_code = 200
+            with span('root'):
+                pass
+            tracing.shutdown()
+
+        post.assert_called_once()
+        assert post.call_args.args[0] == 'http://collector:4318/v1/traces'
+        spans = post.call_args.kwargs['json']['resourceSpans'][0]['scopeSpans'][0]['spans']
+        assert spans[0]['name'] == 'root'
+
+
+@pytest.mark.django_db
+class TestRequestTracing:
+
+    def test_request_root_span_with_db_queries(self, exported, settings):
+        """Test that requests get a root span with nested query spans"""
+        settings.TRACING_DB_QUERIES = True
+        user = UserFactory()
+        LeadFactory(created_by=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(reverse('leads-list-leads'))
+
+        assert response.status_code == 200
+        root = next(finished for finished in exported if finished.parent_id is None)
+        assert root.name == 'GET leads-list-leads'
+        assert root.attributes['http.status_code'] == 200
+        assert root.attributes['user.id'] == user.id
+        queries = [finished for finished in exported if finished.name == 'db.query']
+        assert queries and all(query.parent_id == root.span_id for query in queries)
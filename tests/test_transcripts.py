@@ -0,0 +1,111 @@
+import pytest
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from calls import transcripts
+from calls.ai_service import AIService
+from calls.models import TranscriptSegment
+from tests.factories import UserFactory, LeadFactory, CallFactory
+
+
+def segment(start_ms, end_ms, text, speaker=''):
+    return {'start_ms': start_ms, 'end_ms': end_ms, 'text': text, 'speaker': speaker}
+
+
+@pytest.mark.django_db
+class TestTranscriptSegments:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.call = CallFactory(lead=LeadFactory(created_by=self.user))
+
+    def test_store_segments_derives_flat_text(self):
+        """Test that segments replace old rows and refresh the flat text"""
+        transcripts.store_segments(self.call, [segment(0, 1000, 'old')])
+        transcripts.store_segments(self.call, [
+            segment(0, 1500, 'Hi, this is Sam.', 'agent'),
+            segment(1600, 2500, 'Hello!', 'lead'),
+        ])
+
+        assert TranscriptSegment.objects.filter(call=self.call).count() == 2
+        self.call.refresh_from_db()
+        assert self.call.transcribe_content == 'Agent: Hi, this is Sam.\nLead: Hello!'
+        assert self.call.transcribe_status == 'completed'
+
+    def test_dual_channel_recording_is_diarized(self, settings):
+        """Test that each channel is transcribed and labelled with its speaker"""
+        settings.TRANSCRIPT_DIARIZE_BY_CHANNEL = True
+        settings.TRANSCRIPT_CHANNEL_SPEAKERS = ['agent', 'lead']
+        ai_service = mock.Mock()
+        ai_service.check_transcription_budget.return_value = {'success': True}
+        # The channels are transcribed concurrently, in either order
+        ai_service.transcribe_audio_segments.side_effect = lambda path: {
+            'c0': {'success': True, 'segments': [segment(0, 1000, 'Hi'), segment(3000, 4000, 'Bye')]},
+            'c1': {'success': True, 'segments': [segment(1200, 2500, 'Hello')]},
+        }[path]
+
+        with mock.patch('calls.transcripts.ffmpeg_available', return_value=True), \
+                mock.patch('calls.transcripts.probe_channels', return_value=2), \
+                mock.patch('calls.transcripts.probe_duration', return_value=60.0), \
+                mock.patch('calls.transcripts.split_channels', return_value=['c0', 'c1']):
+            result = transcripts.transcribe_segments(ai_service, 'call.ogg')
+
+        assert [(s['speaker'], s['text']) for s in result['segments']] == [
+            ('agent', 'Hi'), ('lead', 'Hello'), ('agent', 'Bye')]
+        ai_service.check_transcription_budget.assert_called_once_with(60.0, requests=2)
+
+    def test_diarization_needs_budget_for_every_channel(self, settings):
+        """Test that no channel is sent unless the budget covers all of them"""
+        settings.TRANSCRIPT_DIARIZE_BY_CHANNEL = True
+        # One minute of whisper-1 is $0.006: one channel fits, two don't
+        settings.AI_BUDGET_USER_PER_HOUR = 0.01
+        ai_service = AIService(user=self.user, call=self.call)
+
+        with mock.patch.object(ai_service, 'transcribe_audio_segments') as transcribe, \
+                mock.patch('calls.transcripts.ffmpeg_available', return_value=True), \
+                mock.patch('calls.transcripts.probe_channels', return_value=2), \
+                mock.patch('calls.transcripts.probe_duration', return_value=60.0), \
+                mock.patch('calls.transcripts.split_channels', return_value=['c0', 'c1']):
+            result = transcripts.transcribe_segments(ai_service, 'call.ogg')
+
+        assert result['success'] is False
+        assert result['throttled'] is True
+        transcribe.assert_not_called()
+
+    def test_mono_recording_has_no_speakers(self):
+        """Test the single-pass path used for mono recordings"""
+        ai_service = mock.Mock()
+        ai_service.transcribe_audio_segments.return_value = {
+            'success': True, 'segments': [segment(0, 1000, 'Hi')]}
+
+        with mock.patch('calls.transcripts.probe_channels', return_value=1):
+            result = transcripts.transcribe_segments(ai_service, 'call.ogg')
+
+        assert result['segments'] == [segment(0, 1000, 'Hi')]
+        assert result['transcription'] == 'Hi'
+
+    def test_segments_endpoint_returns_window(self):
+        """Test that only segments overlapping the window are returned"""
+        transcripts.store_segments(self.call, [
+            segment(0, 1000, 'one'), segment(1000, 2000, 'two'),
+            segment(2000, 3000, 'three'), segment(3000, 4000, 'four'),
+        ])
+
+        url = reverse('calls-get-transcript-segments', kwargs={'pk': self.call.id})
+        response = self.client.get(url, {'start_ms': 1500, 'end_ms': 3000})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [s['text'] for s in response.data['data']] == ['two', 'three']
+
+    def test_segments_endpoint_other_users_call(self):
+        """Test that segments of other users' calls are not exposed"""
+        other_call = CallFactory()
+
+        url = reverse('calls-get-transcript-segments', kwargs={'pk': other_call.id})
+        response = self.client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,112 @@
+import pytest
+from unittest import mock
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from monitoring import warmup
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    """Start every test as a process that has not warmed up"""
+    monkeypatch.setattr(warmup, '_state', {
+        'status': 'pending', 'started_at': None, 'finished_at': None,
+        'steps': {}, 'errors': {}})
+
+
+class TestWarmup:
+
+    def setup_method(self):
+        """Set up test data for each test method"""
+        self.client = APIClient()
+        self.url = reverse('ready-list')
+
+    def test_warmup_runs_every_step(self):
+        """Test that a successful warmup reports each step's time"""
+        state = warmup.warmup()
+
+        assert state['status'] == 'ready'
+        assert set(state['steps']) == {'urls', 'models', 'serializers', 'authentication', 'providers', 'database'}
+        assert state['errors'] == {}
+
+    def test_provider_step_can_be_disabled(self, settings):
+        """Test that WARMUP_PROVIDER_SDKS=False skips the SDK imports"""
+        settings.WARMUP_PROVIDER_SDKS = False
+
+        state = warmup.warmup()
+
+        assert state['status'] == 'ready'
+        assert 'providers' not in state['steps']
+
+    def test_ready_endpoint_runs_pending_warmup(self):
+        """Test that a process that has not warmed up (e.g. under ASGI) does so on the first check"""
+        response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['status'] == 'ready'
+
+    def test_ready_endpoint_reports_failed_warmup(self):
+        """Test that a step that keeps failing makes the process unready"""
+        database = mock.Mock(side_effect=RuntimeError('database down'))
+
+        with mock.patch.dict(warmup.STEPS, database=database):
+            response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.data['message']['errors'] == {'database': 'database down'}
+
+    def test_ready_endpoint_after_warmup(self):
+        """Test that readiness reports the warmup steps once done"""
+        warmup.warmup()
+
+        response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['status'] == 'ready'
+        assert 'database' in response.data['data']['steps']
+
+    def test_failed_step_is_retried_by_readiness_check(self):
+        """Test that a failing step does not raise and is retried on the next check"""
+        database = mock.Mock(side_effect=[RuntimeError('database down'), None])
+
+        with mock.patch.dict(warmup.STEPS, database=database):
+            state = warmup.warmup()
+            assert state['status'] == 'failed'
+            assert state['errors'] == {'database': 'database down'}
+
+            response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['data']['errors'] == {}
+        assert database.call_count == 2
+
+    def test_named_steps_run_again(self):
+        """Test that a worker can reconnect after inheriting a warm state"""
+        warmup.warmup()
+        database = mock.Mock()
+
+        with mock.patch.dict(warmup.STEPS, database=database):
+            state = warmup.warmup(steps=['database'])
+
+        database.assert_called_once()
+        assert state['status'] == 'ready'
+
+    def test_database_step_closes_its_connection(self):
+        """Test that the database check does not leave a connection open on the warmup thread"""
+        with mock.patch.object(warmup, 'connections') as connections:
+            connection = mock.Mock()
+            connections.__getitem__.return_value = connection
+            warmup.warm_database()
+
+        connection.ensure_connection.assert_called()
+        connection.close.assert_called()
+
+    def test_close_database_connections(self):
+        """Test that connections opened during warmup can be closed before fork"""
+        with mock.patch.object(warmup, 'connections') as connections:
+            connection = mock.Mock(settings_dict={'OPTIONS': {}})
+            connections.all.return_value = [connection]
+            warmup.close_database_connections()
+
+        connection.close.assert_called_once()
+        connection.close_pool.assert_not_called()
@@ -0,0 +1,30 @@
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def paginate_queryset(queryset, page: int = 1, page_size: int = DEFAULT_PAGE_SIZE):
+    """
+    This function slices a queryset into a single page.
+
+    Args:
+        queryset (QuerySet): The ordered queryset to paginate.
+        page (int): The 1-based page number.
+        page_size (int): The number of items per page, capped at MAX_PAGE_SIZE.
+
+    Returns:
+        tuple: The page items (QuerySet) and a dict with the pagination metadata.
+    """
+    page = max(int(page or 1), 1)
+    page_size = min(max(int(page_size or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+
+    total = queryset.count()
+    offset = (page - 1) * page_size
+    items = queryset[offset:offset + page_size]
+
+    meta = {
+        "count": total,
+        "page": page,
+        "page_size": page_size,
+        "has_next": offset + page_size < total,
+    }
+    return items, meta
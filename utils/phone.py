@@ -0,0 +1,99 @@
+import re
+from typing import Optional
+
+from django.conf import settings
+
+# Trailing extensions such as "x123", "ext. 12" or "#4" are not dialable
+# parts of the number and are dropped before normalization.
+EXTENSION_RE = re.compile(r'\s*(?:x|ext\.?|extension|#)\s*\d+\s*$', re.IGNORECASE)
+ALLOWED_CHARS_RE = re.compile(r'^\+?[\d\s().\-/]+$')
+
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+
+
+def normalize_phone_number(value: str, default_country_code: Optional[str] = None) -> Optional[str]:
+    """
+    This function converts a free-form phone number into E.164 format.
+
+    Numbers without an international prefix (`+` or `00`) are treated as
+    national numbers of `default_country_code`, which falls back to the
+    `DEFAULT_PHONE_COUNTRY_CODE` setting.
+
+    Args:
+        value (str): The phone number as typed, e.g. "(555) 123-4567 x89".
+        default_country_code (str): The country calling code for national numbers.
+
+    Returns:
+        str: The E.164 number (e.g. "+15551234567"), or None if it can't be parsed.
+    """
+    if not value:
+        return None
+
+    value = EXTENSION_RE.sub('', str(value).strip())
+    if not value or not ALLOWED_CHARS_RE.match(value):
+        return None
+
+    country_code = str(default_country_code or settings.DEFAULT_PHONE_COUNTRY_CODE)
+    digits = re.sub(r'\D', '', value)
+
+    if value.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif country_code == '1' and digits.startswith('011'):
+        digits = digits[3:]
+    elif country_code == '1':
+        # North American numbers: 10 national digits, optionally with the 1
+        if len(digits) == 10:
+            digits = country_code + digits
+        elif not (len(digits) == 11 and digits.startswith('1')):
+            return None
+    else:
+        # Drop the national trunk prefix (e.g. the leading 0 in the UK)
+        digits = country_code + digits.lstrip('0')
+
+    if digits.startswith('0'):
+        return None
+    if not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+        return None
+
+    return f'+{digits}'
+
+
+def backfill_phone_e164(model, source_field: str, batch_size: int = 1000) -> int:
+    """
+    This function fills `phone_e164` for existing rows in primary-key batches.
+
+    Rows are read in keyset-paginated chunks and written with `bulk_update`,
+    so memory use stays flat and no single statement locks the whole table.
+
+    Args:
+        model (Model): The model class (a historical model inside migrations).
+        source_field (str): The name of the free-form phone field.
+        batch_size (int): The number of rows per batch.
+
+    Returns:
+        int: The number of rows updated.
+    """
+    updated = 0
+    last_pk = 0
+    while True:
+        batch = list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', source_field, 'phone_e164')[:batch_size]
+        )
+        if not batch:
+            return updated
+
+        changed = []
+        for obj in batch:
+            e164 = normalize_phone_number(getattr(obj, source_field)) or ''
+            if obj.phone_e164 != e164:
+                obj.phone_e164 = e164
+                changed.append(obj)
+        if changed:
+            model.objects.bulk_update(changed, ['phone_e164'])
+            updated += len(changed)
+        last_pk = batch[-1].pk
@@ -0,0 +1,84 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens are added continuously at `rate` per second up to `capacity`.
+    Callers take tokens with `acquire` (blocking) or `try_acquire`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """
+        Take `tokens` if they are available right now.
+
+        Returns:
+            bool: True if the tokens were taken, False otherwise.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Block until `tokens` are available or `timeout` seconds have passed.
+
+        Returns:
+            bool: True if the tokens were taken, False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def debit(self, tokens: float):
+        """
+        Take `tokens` unconditionally, letting the balance go negative.
+
+        Used when the cost of an operation is only known after it ran.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+
+    def time_until_positive(self) -> float:
+        """
+        Seconds until the balance is above zero again, 0 if it already is.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens > 0:
+                return 0.0
+            return max(-self._tokens / self.rate, 0.001)